@@ -14,6 +14,7 @@ from rlcard.utils import (
     Logger,
     plot_curve,
 )
+from rlcard.utils.exploitability import exploitability
 
 def train(args):
     # Make environments, CFR only supports Leduc Holdem
@@ -31,6 +32,13 @@ def train(args):
         }
     )
 
+    br_env = rlcard.make(
+        'leduc-holdem',
+        config={
+            'allow_step_back': True,
+        }
+    )
+
     # Seed numpy, torch, random
     set_seed(args.seed)
 
@@ -41,6 +49,8 @@ def train(args):
             args.log_dir,
             'cfr_model',
         ),
+        update_rule=args.update_rule,
+        alternating=args.alternating,
     )
     agent.load()  # If we have saved model, we first load the model
 
@@ -65,6 +75,8 @@ def train(args):
                         args.num_eval_games
                     )[0]
                 )
+                if args.exploitability:
+                    logger.log('exploitability: {}'.format(exploitability(br_env, agent)))
 
         # Get the paths
         csv_path, fig_path = logger.csv_path, logger.fig_path
@@ -93,6 +105,22 @@ if __name__ == '__main__':
         type=int,
         default=100,
     )
+    parser.add_argument(
+        '--update_rule',
+        type=str,
+        default='vanilla',
+        choices=CFRAgent.UPDATE_RULES,
+    )
+    parser.add_argument(
+        '--alternating',
+        action='store_true',
+        help='Update the policy after the traversal of each player',
+    )
+    parser.add_argument(
+        '--exploitability',
+        action='store_true',
+        help='Log the exact exploitability of the average policy',
+    )
     parser.add_argument(
         '--log_dir',
         type=str,
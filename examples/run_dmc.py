@@ -21,8 +21,12 @@ def train(args):
         xpid=args.xpid,
         savedir=args.savedir,
         save_interval=args.save_interval,
+        sync_interval=args.sync_interval,
+        compress_checkpoint=args.compress_checkpoint,
+        keep_checkpoints=args.keep_checkpoints,
         num_actor_devices=args.num_actor_devices,
-        num_actors=args.num_actors,
+        num_actors=args.num_actors or None,
+        num_buffers=args.num_buffers or None,
         training_device=args.training_device,
     )
 
@@ -72,6 +76,23 @@ if __name__ == '__main__':
         type=int,
         help='Time interval (in minutes) at which to save the model',
     )
+    parser.add_argument(
+        '--compress_checkpoint',
+        action='store_true',
+        help='Gzip the checkpoints',
+    )
+    parser.add_argument(
+        '--keep_checkpoints',
+        default=1,
+        type=int,
+        help='The number of checkpoints to keep',
+    )
+    parser.add_argument(
+        '--sync_interval',
+        default=1,
+        type=int,
+        help='Number of learner steps of a position between two weight broadcasts to the actors',
+    )
     parser.add_argument(
         '--num_actor_devices',
         default=1,
@@ -82,7 +103,13 @@ if __name__ == '__main__':
         '--num_actors',
         default=5,
         type=int,
-        help='The number of actors for each simulation device',
+        help='The number of actors for each simulation device, 0 for one actor per core left to the actors',
+    )
+    parser.add_argument(
+        '--num_buffers',
+        default=50,
+        type=int,
+        help='The number of shared-memory buffers, 0 to size them from the learner threads and actors',
     )
     parser.add_argument(
         '--training_device',
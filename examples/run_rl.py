@@ -14,6 +14,7 @@ from rlcard.utils import (
     reorganize,
     Logger,
     plot_curve,
+    RolloutPool,
 )
 
 def train(args):
@@ -44,7 +45,8 @@ def train(args):
                 mlp_layers=[64,64],
                 device=device,
                 save_path=args.log_dir,
-                save_every=args.save_every
+                save_every=args.save_every,
+                prioritized_replay=args.prioritized_replay,
             )
 
     elif args.algorithm == 'nfsp':
@@ -66,6 +68,15 @@ def train(args):
         agents.append(RandomAgent(num_actions=env.num_actions))
     env.set_agents(agents)
 
+    # Evaluate in parallel worker processes if requested
+    pool = None
+    if args.num_eval_workers > 0:
+        pool = RolloutPool(
+            args.env,
+            num_workers=args.num_eval_workers,
+            seed=args.seed,
+        )
+
     # Start training
     with Logger(args.log_dir) as logger:
         for episode in range(args.num_episodes):
@@ -87,17 +98,25 @@ def train(args):
 
             # Evaluate the performance. Play with random agents.
             if episode % args.evaluate_every == 0:
-                logger.log_performance(
-                    episode,
-                    tournament(
+                if pool is not None:
+                    pool.set_agents(agents)
+                    payoffs = pool.tournament(args.num_eval_games)
+                else:
+                    payoffs = tournament(
                         env,
                         args.num_eval_games,
-                    )[0]
+                    )
+                logger.log_performance(
+                    episode,
+                    payoffs[0]
                 )
 
         # Get the paths
         csv_path, fig_path = logger.csv_path, logger.fig_path
 
+    if pool is not None:
+        pool.close()
+
     # Plot the learning curve
     plot_curve(csv_path, fig_path, args.algorithm)
 
@@ -158,6 +177,17 @@ if __name__ == '__main__':
         type=int,
         default=100,
     )
+    parser.add_argument(
+        '--num_eval_workers',
+        type=int,
+        default=0,
+        help='Number of worker processes for evaluation. 0 evaluates in the main process',
+    )
+    parser.add_argument(
+        '--prioritized_replay',
+        action='store_true',
+        help='Use prioritized experience replay in DQN',
+    )
     parser.add_argument(
         '--log_dir',
         type=str,
@@ -1,33 +1,93 @@
 import numpy as np
-import collections
 
 import os
 import pickle
 
 from rlcard.utils.utils import *
+from rlcard.agents.cfr_table import CFRTable
 
 class CFRAgent():
     ''' Implement CFR (chance sampling) algorithm
+
+    The update rule can be one of
+        'vanilla': CFR, where the average policy is weighted by the iteration
+        'cfr+': CFR+, where the negative regrets are set to zero after each traversal
+        'linear': Linear CFR, where the regrets and the average policy of iteration t are weighted by t
+        'dcfr': Discounted CFR, where after iteration t the positive regrets are multiplied by
+            t^alpha / (t^alpha + 1), the negative regrets by t^beta / (t^beta + 1), and the
+            average policy by (t / (t + 1))^gamma
     '''
 
-    def __init__(self, env, model_path='./cfr_model'):
+    UPDATE_RULES = ['vanilla', 'cfr+', 'linear', 'dcfr']
+
+    def __init__(self,
+                 env,
+                 model_path='./cfr_model',
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 update_rule='vanilla',
+                 alternating=False,
+                 alpha=1.5,
+                 beta=0.0,
+                 gamma=2.0,
+                 abstraction=None):
         ''' Initilize Agent
 
         Args:
             env (Env): Env class
+            model_path (str): The directory to save the model
+            memmap_dir (str): If not None, the tables are memory-mapped files in this
+                directory, which allows tables larger than the memory
+            dtype (numpy.dtype): The data type of the tables
+            update_rule (str): One of 'vanilla', 'cfr+', 'linear' and 'dcfr'
+            alternating (bool): If True, the policy is updated after the traversal of
+                each player. Otherwise, all the players are updated simultaneously at
+                the end of the iteration
+            alpha (float): The discount exponent of the positive regrets in DCFR
+            beta (float): The discount exponent of the negative regrets in DCFR
+            gamma (float): The discount exponent of the average policy in DCFR
+            abstraction (object): If not None, an abstraction with an `infoset_key(state)`
+                method, such as the `CardAbstraction` of hold'em, giving the keys
+                of the info sets. Otherwise the keys are the observations
         '''
+        if update_rule not in self.UPDATE_RULES:
+            raise ValueError('Unknown update rule {}, it should be one of {}'.format(update_rule, self.UPDATE_RULES))
         self.use_raw = False
+        self.abstraction = abstraction
         self.env = env
         self.model_path = model_path
+        self.update_rule = update_rule
+        self.alternating = alternating
+        if update_rule == 'linear':
+            # Linear CFR is DCFR with alpha = beta = gamma = 1
+            alpha, beta, gamma = 1.0, 1.0, 1.0
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+
+        # The info sets are interned to rows of the table, which stores
+        # the current policy, the cumulative policy and the regrets
+        self.table = CFRTable(self.env.num_actions, dtype=dtype, memmap_dir=memmap_dir)
 
-        # A policy is a dict state_str -> action probabilities
-        self.policy = collections.defaultdict(list)
-        self.average_policy = collections.defaultdict(np.array)
+        self.iteration = 0
 
-        # Regret is a dict state_str -> action regrets
-        self.regrets = collections.defaultdict(np.array)
+    @property
+    def policy(self):
+        ''' (numpy.array): The current policy of each info set, (num_infosets, num_actions)
+        '''
+        return self.table.policy
 
-        self.iteration = 0
+    @property
+    def average_policy(self):
+        ''' (numpy.array): The cumulative policy of each info set, (num_infosets, num_actions)
+        '''
+        return self.table.strategy_sum
+
+    @property
+    def regrets(self):
+        ''' (numpy.array): The regrets of each info set, (num_infosets, num_actions)
+        '''
+        return self.table.regrets
 
     def train(self):
         ''' Do one iteration of CFR
@@ -39,6 +99,17 @@ class CFRAgent():
             self.env.reset()
             probs = np.ones(self.env.num_players)
             self.traverse_tree(probs, player_id)
+            if self.update_rule == 'cfr+':
+                self.table.floor_regrets()
+            if self.alternating:
+                self.update_policy()
+
+        # Discount the regrets and the average policy of the previous iterations
+        if self.update_rule in ('linear', 'dcfr'):
+            t = float(self.iteration)
+            self.table.discount(t ** self.alpha / (t ** self.alpha + 1),
+                                t ** self.beta / (t ** self.beta + 1),
+                                (t / (t + 1)) ** self.gamma)
 
         # Update policy
         self.update_policy()
@@ -58,10 +129,11 @@ class CFRAgent():
 
         current_player = self.env.get_player_id()
 
-        action_utilities = {}
+        action_utilities = np.zeros((self.env.num_actions, self.env.num_players))
         state_utility = np.zeros(self.env.num_players)
         obs, legal_actions = self.get_state(current_player)
-        action_probs = self.action_probs(obs, legal_actions, self.policy)
+        infoset_id = self.table.index(obs)
+        action_probs = self.action_probs(infoset_id, legal_actions, self.table.policy)
 
         for action in legal_actions:
             action_prob = action_probs[action]
@@ -85,61 +157,44 @@ class CFRAgent():
                                 np.prod(probs[current_player + 1:]))
         player_state_utility = state_utility[current_player]
 
-        if obs not in self.regrets:
-            self.regrets[obs] = np.zeros(self.env.num_actions)
-        if obs not in self.average_policy:
-            self.average_policy[obs] = np.zeros(self.env.num_actions)
-        for action in legal_actions:
-            action_prob = action_probs[action]
-            regret = counterfactual_prob * (action_utilities[action][current_player]
-                    - player_state_utility)
-            self.regrets[obs][action] += regret
-            self.average_policy[obs][action] += self.iteration * player_prob * action_prob
+        self.table.regrets[infoset_id, legal_actions] += counterfactual_prob * \
+            (action_utilities[legal_actions, current_player] - player_state_utility)
+        self.table.strategy_sum[infoset_id, legal_actions] += \
+            self._strategy_weight() * player_prob * action_probs[legal_actions]
         return state_utility
 
-    def update_policy(self):
-        ''' Update policy based on the current regrets
-        '''
-        for obs in self.regrets:
-            self.policy[obs] = self.regret_matching(obs)
-
-    def regret_matching(self, obs):
-        ''' Apply regret matching
+    def _strategy_weight(self):
+        ''' Get the weight of the current policy in the average policy. The discounted
+            rules weight the iterations by discounting the cumulative policy instead
 
-        Args:
-            obs (string): The state_str
+        Returns:
+            (float): The weight
         '''
-        regret = self.regrets[obs]
-        positive_regret_sum = sum([r for r in regret if r > 0])
+        if self.update_rule in ('linear', 'dcfr'):
+            return 1.0
+        return self.iteration
 
-        action_probs = np.zeros(self.env.num_actions)
-        if positive_regret_sum > 0:
-            for action in range(self.env.num_actions):
-                action_probs[action] = max(0.0, regret[action] / positive_regret_sum)
-        else:
-            for action in range(self.env.num_actions):
-                action_probs[action] = 1.0 / self.env.num_actions
-        return action_probs
+    def update_policy(self):
+        ''' Update policy based on the current regrets, with regret matching
+            vectorized over all the info sets
+        '''
+        self.table.update_policy()
 
-    def action_probs(self, obs, legal_actions, policy):
+    def action_probs(self, infoset_id, legal_actions, policy):
         ''' Obtain the action probabilities of the current state
 
         Args:
-            obs (str): state_str
+            infoset_id (int): The id of the info set in the table, or None if it is unknown
             legal_actions (list): List of leagel actions
-            player_id (int): The current player
-            policy (dict): The used policy
+            policy (numpy.array): The used policy, one row for each info set
 
         Returns:
-            (tuple) that contains:
-                action_probs(numpy.array): The action probabilities
-                legal_actions (list): Indices of legal actions
+            action_probs(numpy.array): The action probabilities
         '''
-        if obs not in policy.keys():
-            action_probs = np.array([1.0/self.env.num_actions for _ in range(self.env.num_actions)])
-            self.policy[obs] = action_probs
+        if infoset_id is None:
+            action_probs = np.ones(self.env.num_actions) / self.env.num_actions
         else:
-            action_probs = policy[obs]
+            action_probs = policy[infoset_id]
         action_probs = remove_illegal(action_probs, legal_actions)
         return action_probs
 
@@ -153,7 +208,7 @@ class CFRAgent():
             action (int): Predicted action
             info (dict): A dictionary containing information
         '''
-        probs = self.action_probs(state['obs'].tostring(), list(state['legal_actions'].keys()), self.average_policy)
+        probs = self.action_probs(self.table.get(self.infoset_key(state)), list(state['legal_actions'].keys()), self.table.strategy_sum)
         action = np.random.choice(len(probs), p=probs)
 
         info = {}
@@ -173,7 +228,20 @@ class CFRAgent():
                 legal_actions (list): Indices of legal actions
         '''
         state = self.env.get_state(player_id)
-        return state['obs'].tostring(), list(state['legal_actions'].keys())
+        return self.infoset_key(state), list(state['legal_actions'].keys())
+
+    def infoset_key(self, state):
+        ''' Get the key of the info set of a state
+
+        Args:
+            state (dict): The extracted state
+
+        Returns:
+            (hashable): The key
+        '''
+        if self.abstraction is not None:
+            return self.abstraction.infoset_key(state)
+        return state['obs'].tobytes()
 
     def save(self):
         ''' Save model
@@ -181,17 +249,7 @@ class CFRAgent():
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
 
-        policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'wb')
-        pickle.dump(self.policy, policy_file)
-        policy_file.close()
-
-        average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'wb')
-        pickle.dump(self.average_policy, average_policy_file)
-        average_policy_file.close()
-
-        regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'wb')
-        pickle.dump(self.regrets, regrets_file)
-        regrets_file.close()
+        self.table.save(self.model_path)
 
         iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'wb')
         pickle.dump(self.iteration, iteration_file)
@@ -200,22 +258,11 @@ class CFRAgent():
     def load(self):
         ''' Load model
         '''
-        if not os.path.exists(self.model_path):
+        if not CFRTable.exists(self.model_path):
             return
 
-        policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'rb')
-        self.policy = pickle.load(policy_file)
-        policy_file.close()
-
-        average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'rb')
-        self.average_policy = pickle.load(average_policy_file)
-        average_policy_file.close()
-
-        regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'rb')
-        self.regrets = pickle.load(regrets_file)
-        regrets_file.close()
+        self.table.load(self.model_path)
 
         iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'rb')
         self.iteration = pickle.load(iteration_file)
         iteration_file.close()
-
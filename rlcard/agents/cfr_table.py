@@ -0,0 +1,263 @@
+''' Array-backed tabular storage for CFR
+'''
+import os
+import pickle
+
+import numpy as np
+
+class CFRTable(object):
+    '''
+    CFRTable interns the information set keys to integer ids and stores the
+    cumulative regrets, the cumulative strategies (the unnormalized average
+    policy) and the current policy of all the information sets in 2D arrays
+    of shape (num_infosets, num_actions). Row i belongs to the i-th key.
+
+    If `memmap_dir` is given, the arrays are backed by `np.memmap` files in
+    that directory, so tables larger than the memory can be solved.
+    '''
+    ARRAY_NAMES = ['regrets', 'strategy_sum', 'policy']
+
+    # The pickled dicts of the models saved before the tables, by array
+    LEGACY_FILES = {'regrets': 'regrets.pkl', 'strategy_sum': 'average_policy.pkl', 'policy': 'policy.pkl'}
+
+    def __init__(self, num_actions, capacity=1024, dtype=np.float64, memmap_dir=None, chunk_size=65536):
+        ''' Initialize the table
+
+        Args:
+            num_actions (int): The number of actions
+            capacity (int): The initial number of rows. The arrays grow when needed
+            dtype (numpy.dtype): The data type of the arrays
+            memmap_dir (str): If not None, the directory of the memory-mapped arrays
+            chunk_size (int): The number of rows processed at a time by the vectorized updates
+        '''
+        self.num_actions = num_actions
+        self.dtype = np.dtype(dtype)
+        self.memmap_dir = memmap_dir
+        self.chunk_size = chunk_size
+        self.key_to_id = {}
+        self.keys = []
+        self.capacity = 0
+        self._regrets = None
+        self._strategy_sum = None
+        self._policy = None
+        if memmap_dir is not None and not os.path.exists(memmap_dir):
+            os.makedirs(memmap_dir)
+        self._grow(max(1, capacity))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.key_to_id
+
+    @property
+    def regrets(self):
+        ''' (numpy.array): The cumulative regrets, (num_infosets, num_actions)
+        '''
+        return self._regrets[:len(self.keys)]
+
+    @property
+    def strategy_sum(self):
+        ''' (numpy.array): The cumulative strategies, (num_infosets, num_actions)
+        '''
+        return self._strategy_sum[:len(self.keys)]
+
+    @property
+    def policy(self):
+        ''' (numpy.array): The current policy, (num_infosets, num_actions)
+        '''
+        return self._policy[:len(self.keys)]
+
+    def get(self, key):
+        ''' Get the id of an information set without adding it
+
+        Args:
+            key (hashable): The key of the information set
+
+        Returns:
+            (int): The id, or None if the key is not in the table
+        '''
+        return self.key_to_id.get(key)
+
+    def index(self, key):
+        ''' Get the id of an information set. A new row with a uniform policy
+            is added if the key is not in the table.
+
+        Args:
+            key (hashable): The key of the information set
+
+        Returns:
+            (int): The id of the information set
+        '''
+        infoset_id = self.key_to_id.get(key)
+        if infoset_id is None:
+            infoset_id = len(self.keys)
+            if infoset_id >= self.capacity:
+                self._grow(2 * self.capacity)
+            self.key_to_id[key] = infoset_id
+            self.keys.append(key)
+            self._policy[infoset_id] = 1.0 / self.num_actions
+        return infoset_id
+
+    def update_policy(self):
+        ''' Compute the current policy of all the information sets from the
+            cumulative regrets with regret matching
+        '''
+        for start in range(0, len(self.keys), self.chunk_size):
+            end = min(start + self.chunk_size, len(self.keys))
+            self._policy[start:end] = self.regret_matching(self._regrets[start:end])
+
+    def regret_matching(self, regrets):
+        ''' Apply regret matching to a batch of rows
+
+        Args:
+            regrets (numpy.array): The regrets, (num_rows, num_actions)
+
+        Returns:
+            (numpy.array): The action probabilities, (num_rows, num_actions).
+                Rows without positive regret are uniform.
+        '''
+        positive_regrets = np.maximum(regrets, 0)
+        positive_regret_sum = positive_regrets.sum(axis=1, keepdims=True)
+        has_positive = positive_regret_sum > 0
+        return np.where(has_positive,
+                        positive_regrets / np.where(has_positive, positive_regret_sum, 1),
+                        1.0 / self.num_actions)
+
+    def floor_regrets(self):
+        ''' Set the negative regrets to zero, as in CFR+
+        '''
+        for start in range(0, len(self.keys), self.chunk_size):
+            regrets = self._regrets[start:start + self.chunk_size]
+            np.maximum(regrets, 0, out=regrets)
+
+    def discount(self, positive_factor, negative_factor, strategy_factor):
+        ''' Discount the cumulative regrets and strategies, as in Linear CFR
+            and Discounted CFR
+
+        Args:
+            positive_factor (float): The factor of the positive regrets
+            negative_factor (float): The factor of the negative regrets
+            strategy_factor (float): The factor of the cumulative strategies
+        '''
+        for start in range(0, len(self.keys), self.chunk_size):
+            end = min(start + self.chunk_size, len(self.keys))
+            regrets = self._regrets[start:end]
+            regrets *= np.where(regrets > 0, positive_factor, negative_factor)
+            self._strategy_sum[start:end] *= strategy_factor
+
+    def average_policy(self):
+        ''' Get the normalized average policy of all the information sets
+
+        Returns:
+            (numpy.array): The average policy, (num_infosets, num_actions).
+                Rows that have never been updated are uniform.
+        '''
+        return self.regret_matching(self.strategy_sum)
+
+    def _allocate(self, name, capacity):
+        ''' Allocate one array with the given number of rows, keeping the
+            existing rows
+        '''
+        shape = (capacity, self.num_actions)
+        old = getattr(self, '_' + name)
+        if self.memmap_dir is None:
+            array = np.zeros(shape, dtype=self.dtype)
+            if old is not None:
+                array[:old.shape[0]] = old
+            return array
+        # Extend the file and map it again, the existing rows are kept on disk
+        if old is not None:
+            old.flush()
+        path = os.path.join(self.memmap_dir, name + '.dat')
+        with open(path, 'ab' if old is not None else 'wb') as f:
+            f.truncate(int(np.prod(shape)) * self.dtype.itemsize)
+        return np.memmap(path, dtype=self.dtype, mode='r+', shape=shape)
+
+    def _grow(self, capacity):
+        for name in self.ARRAY_NAMES:
+            setattr(self, '_' + name, self._allocate(name, capacity))
+        self.capacity = capacity
+
+    def flush(self):
+        ''' Write the memory-mapped arrays to the disk
+        '''
+        if self.memmap_dir is not None:
+            for name in self.ARRAY_NAMES:
+                getattr(self, '_' + name).flush()
+
+    def save(self, path):
+        ''' Save the table
+
+        Args:
+            path (str): The directory to save the table
+        '''
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for name in self.ARRAY_NAMES:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+        with open(os.path.join(path, 'infoset_keys.pkl'), 'wb') as f:
+            pickle.dump(self.keys, f)
+
+    def load(self, path):
+        ''' Load a table saved by `save`, or converted from the pickled dicts
+            of the older models
+
+        Args:
+            path (str): The directory of the saved table
+        '''
+        if not os.path.exists(os.path.join(path, 'infoset_keys.pkl')):
+            self._load_legacy(path)
+            return
+        with open(os.path.join(path, 'infoset_keys.pkl'), 'rb') as f:
+            keys = pickle.load(f)
+        self._regrets = self._strategy_sum = self._policy = None
+        self.keys = []
+        self.key_to_id = {}
+        self.capacity = 0
+        self._grow(max(1, len(keys)))
+        for name in self.ARRAY_NAMES:
+            array = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+            if array.shape != (len(keys), self.num_actions):
+                raise ValueError('The shape of {} does not match the saved keys'.format(name))
+            for start in range(0, len(keys), self.chunk_size):
+                getattr(self, '_' + name)[start:start + self.chunk_size] = array[start:start + self.chunk_size]
+        self.keys = keys
+        self.key_to_id = {key: i for i, key in enumerate(keys)}
+
+    def _load_legacy(self, path):
+        ''' Convert the pickled dicts of an older model, which map the keys to
+            the rows of the regrets, the cumulative strategies and the policy
+        '''
+        dicts = {}
+        for name, filename in self.LEGACY_FILES.items():
+            with open(os.path.join(path, filename), 'rb') as f:
+                dicts[name] = pickle.load(f)
+        self._regrets = self._strategy_sum = self._policy = None
+        self.keys = []
+        self.key_to_id = {}
+        self.capacity = 0
+        self._grow(1)
+        for name, rows in dicts.items():
+            for key, row in rows.items():
+                row = np.asarray(row, dtype=self.dtype)
+                if row.shape != (self.num_actions,):
+                    raise ValueError('The {} of {} have {} actions, expected {}'.format(
+                        name, self.LEGACY_FILES[name], row.shape, self.num_actions))
+                # Index first, as adding a key may grow the arrays
+                infoset_id = self.index(key)
+                getattr(self, '_' + name)[infoset_id] = row
+
+    @classmethod
+    def exists(cls, path):
+        ''' Check whether a table, or an older model to convert, is saved in the directory
+
+        Args:
+            path (str): The directory
+
+        Returns:
+            (bool): True if a saved table is found
+        '''
+        if os.path.exists(os.path.join(path, 'infoset_keys.pkl')):
+            return True
+        return all(os.path.exists(os.path.join(path, filename)) for filename in cls.LEGACY_FILES.values())
@@ -0,0 +1,129 @@
+import copy
+import gzip
+import inspect
+import io
+import os
+import threading
+import traceback
+
+import torch
+
+from .utils import log
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+# torch.load can memory map the checkpoints since torch 2.1
+_TORCH_LOAD_MMAP = 'mmap' in inspect.signature(torch.load).parameters
+
+def snapshot(obj):
+    ''' Copy the tensors of a nested structure to the CPU so that it can be
+        written while the training goes on
+
+    Args:
+        obj (object): A tensor, or a dict, list or tuple of them. Other objects are deep copied
+
+    Returns:
+        (object): The copy
+    '''
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return type(obj)((k, snapshot(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return copy.deepcopy(obj)
+
+class CheckpointWriter:
+    ''' Write checkpoints on a background thread
+
+    A checkpoint is written to a temporary file which is then renamed, so a
+    job preempted while writing keeps the previous checkpoint. The older
+    checkpoints are rotated to `path.1`, `path.2`, ... and only the last
+    `keep` of them are kept.
+    '''
+    def __init__(self, path, compress=False, keep=1):
+        ''' Initialize the writer
+
+        Args:
+            path (str): The path of the latest checkpoint
+            compress (boolean): Whether to gzip the checkpoints
+            keep (int): The number of checkpoints to keep
+        '''
+        if keep < 1:
+            raise ValueError('At least one checkpoint should be kept')
+        self.path = path
+        self.compress = compress
+        self.keep = keep
+        self._thread = None
+
+    def save(self, checkpoint, extra=None):
+        ''' Snapshot a checkpoint and write it in the background. It waits
+            for the previous checkpoint to be written first.
+
+        Args:
+            checkpoint (dict): The checkpoint
+            extra (dict): Other objects to save uncompressed, by path
+        '''
+        self.wait()
+        checkpoint = snapshot(checkpoint)
+        extra = {path: snapshot(obj) for path, obj in (extra or {}).items()}
+        self._thread = threading.Thread(target=self._write, args=(checkpoint, extra), name='checkpoint-writer')
+        self._thread.start()
+
+    def wait(self):
+        ''' Wait for the checkpoint being written
+        '''
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _write(self, checkpoint, extra):
+        try:
+            tmp_path = self.path + '.tmp'
+            if self.compress:
+                with gzip.open(tmp_path, 'wb', compresslevel=1) as f:
+                    torch.save(checkpoint, f)
+            else:
+                torch.save(checkpoint, tmp_path)
+            for k in range(self.keep - 1, 0, -1):
+                previous = self._rotated_path(k - 1)
+                if os.path.exists(previous):
+                    os.replace(previous, self._rotated_path(k))
+            os.replace(tmp_path, self.path)
+
+            for path, obj in extra.items():
+                torch.save(obj, path + '.tmp')
+                os.replace(path + '.tmp', path)
+            log.info('Saved checkpoint to %s', self.path)
+        except Exception:
+            log.error('Failed to save checkpoint to %s', self.path)
+            traceback.print_exc()
+
+    def _rotated_path(self, k):
+        return self.path if k == 0 else '%s.%d' % (self.path, k)
+
+    def load(self, map_location=None):
+        ''' Load the latest checkpoint. Uncompressed checkpoints are memory
+            mapped if torch supports it, so the tensors are read when they are used.
+
+        Args:
+            map_location (str): The device to load the tensors to
+
+        Returns:
+            (dict): The checkpoint, or None if there is no checkpoint
+        '''
+        # The latest checkpoint is missing if the job stopped while rotating
+        for k in range(self.keep):
+            path = self._rotated_path(k)
+            if os.path.exists(path):
+                break
+        else:
+            return None
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == _GZIP_MAGIC
+        if compressed:
+            with gzip.open(path, 'rb') as f:
+                return torch.load(io.BytesIO(f.read()), map_location=map_location)
+        if _TORCH_LOAD_MMAP:
+            return torch.load(path, map_location=map_location, mmap=True)
+        return torch.load(path, map_location=map_location)
@@ -19,10 +19,12 @@ import csv
 import json
 import logging
 import os
+import threading
 import time
-from typing import Dict
+from typing import Dict, List
 
 import git
+import numpy as np
 
 
 def gather_metadata() -> Dict:
@@ -33,7 +35,7 @@ def gather_metadata() -> Dict:
         git_sha = repo.commit().hexsha
         git_data = dict(
             commit=git_sha,
-            branch=repo.active_branch.name,
+            branch=None if repo.head.is_detached else repo.active_branch.name,
             is_dirty=repo.is_dirty(),
             path=repo.git_dir,
         )
@@ -58,11 +60,42 @@ def gather_metadata() -> Dict:
     )
 
 
+def load_columns(basepath: str) -> Dict[str, np.ndarray]:
+    """Load the columnar chunks written by a FileWriter as one array per field."""
+    chunkdir = os.path.join(os.path.expandvars(os.path.expanduser(basepath)), 'chunks')
+    chunks = []
+    for name in sorted(os.listdir(chunkdir)):
+        if name.endswith('.npz'):
+            with np.load(os.path.join(chunkdir, name)) as chunk:
+                chunks.append({k: chunk[k] for k in chunk.files})
+    fields = []
+    for chunk in chunks:
+        fields.extend(k for k in chunk if k not in fields)
+    columns = {}
+    for k in fields:
+        columns[k] = np.concatenate([
+            chunk[k] if k in chunk else np.full(len(chunk['_tick']), np.nan)
+            for chunk in chunks
+        ])
+    return columns
+
+
 class FileWriter:
+    """Log rows of stats to csv files.
+
+    The rows are kept in memory and written by a background thread once
+    `flush_rows` rows are buffered or every `flush_secs` seconds, so that
+    `log` does not touch the disk. With `columnar`, every flush also writes
+    the rows as a chunk of one array per field in `chunks/*.npz`, which
+    `load_columns` reads back much faster than the csv.
+    """
     def __init__(self,
                  xpid: str = None,
                  xp_args: dict = None,
-                 rootdir: str = '~/palaas'):
+                 rootdir: str = '~/palaas',
+                 flush_rows: int = 1000,
+                 flush_secs: float = 10.0,
+                 columnar: bool = False):
         if not xpid:
             # make unique id
             xpid = '{proc}_{unixtime}'.format(
@@ -143,40 +176,92 @@ class FileWriter:
         else:
             self.fieldnames = ['_tick', '_time']
 
+        self.flush_rows = flush_rows
+        self.flush_secs = flush_secs
+        self.columnar = columnar
+        if self.columnar:
+            os.makedirs(os.path.join(self.basepath, 'chunks'), exist_ok=True)
+
+        self._rows: List[Dict] = []
+        self._rows_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._closed = False
+        self._flush_thread = threading.Thread(
+            target=self._flush_loop, name='file-writer', daemon=True)
+        self._flush_thread.start()
+
     def log(self, to_log: Dict, tick: int = None,
             verbose: bool = False) -> None:
         if tick is not None:
             raise NotImplementedError
-        else:
+        with self._rows_lock:
             to_log['_tick'] = self._tick
             self._tick += 1
-        to_log['_time'] = time.time()
-
-        old_len = len(self.fieldnames)
-        for k in to_log:
-            if k not in self.fieldnames:
-                self.fieldnames.append(k)
-        if old_len != len(self.fieldnames):
-            with open(self.paths['fields'], 'w') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(self.fieldnames)
-            self._logger.info('Updated log fields: %s', self.fieldnames)
-
-        if to_log['_tick'] == 0:
-            # print("\ncreating logs file ")
-            with open(self.paths['logs'], 'a') as f:
-                f.write('# %s\n' % ','.join(self.fieldnames))
+            to_log['_time'] = time.time()
+            self._rows.append(to_log)
+            num_rows = len(self._rows)
 
         if verbose:
             self._logger.info('LOG | %s', ', '.join(
                 ['{}: {}'.format(k, to_log[k]) for k in sorted(to_log)]))
 
-        with open(self.paths['logs'], 'a') as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writerow(to_log)
-            # print("\nadded to log file")
+        if num_rows >= self.flush_rows:
+            self._flush_event.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._flush_event.wait(self.flush_secs)
+            self._flush_event.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows."""
+        with self._flush_lock:
+            with self._rows_lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return
+
+            old_len = len(self.fieldnames)
+            for to_log in rows:
+                for k in to_log:
+                    if k not in self.fieldnames:
+                        self.fieldnames.append(k)
+            if old_len != len(self.fieldnames):
+                with open(self.paths['fields'], 'w') as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(self.fieldnames)
+                self._logger.info('Updated log fields: %s', self.fieldnames)
+
+            with open(self.paths['logs'], 'a') as f:
+                if rows[0]['_tick'] == 0:
+                    f.write('# %s\n' % ','.join(self.fieldnames))
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                writer.writerows(rows)
+
+            if self.columnar:
+                self._write_chunk(rows)
+
+    def _write_chunk(self, rows: List[Dict]) -> None:
+        fields = []
+        for to_log in rows:
+            fields.extend(k for k in to_log if k not in fields)
+        columns = {
+            k: np.asarray([to_log.get(k, np.nan) for to_log in rows])
+            for k in fields
+        }
+        # The ticks restart from 0 when resuming, so the chunks are named by time
+        name = '{:.6f}_{:010d}.npz'.format(rows[0]['_time'], rows[0]['_tick'])
+        path = os.path.join(self.basepath, 'chunks', name)
+        np.savez(path + '.tmp.npz', **columns)
+        os.replace(path + '.tmp.npz', path)
 
     def close(self, successful: bool = True) -> None:
+        self._closed = True
+        self._flush_event.set()
+        self._flush_thread.join()
+        self.flush()
         self.metadata['date_end'] = datetime.datetime.now().strftime(
             '%Y-%m-%d %H:%M:%S.%f')
         self.metadata['successful'] = successful
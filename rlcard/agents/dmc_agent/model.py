@@ -17,6 +17,7 @@ import numpy as np
 
 import torch
 from torch import nn
+import torch.nn.functional as F
 
 class DMCNet(nn.Module):
     def __init__(
@@ -42,6 +43,28 @@ class DMCNet(nn.Module):
         values = self.fc_layers(x).flatten()
         return values
 
+    def forward_split(self, obs, actions, state_index):
+        ''' Compute the values of many actions of a few states. The first
+            layer is linear, so its observation half is computed once per
+            state and broadcast to the actions of that state. The result
+            equals `forward` with the observations repeated per action.
+
+        Args:
+            obs (Tensor): The observations, (num_states, *state_shape)
+            actions (Tensor): The action features, (num_actions, *action_shape)
+            state_index (Tensor): The index of the state of each action, (num_actions,)
+
+        Returns:
+            (Tensor): The values, (num_actions,)
+        '''
+        obs = torch.flatten(obs, 1)
+        actions = torch.flatten(actions, 1)
+        first_layer = self.fc_layers[0]
+        obs_dim = obs.shape[1]
+        obs_hidden = F.linear(obs, first_layer.weight[:, :obs_dim])
+        hidden = obs_hidden[state_index] + F.linear(actions, first_layer.weight[:, obs_dim:], first_layer.bias)
+        return self.fc_layers[1:](hidden).flatten()
+
 class DMCAgent:
     def __init__(
         self,
@@ -56,6 +79,13 @@ class DMCAgent:
         self.net = DMCNet(state_shape, action_shape, mlp_layers).to(self.device)
         self.exp_epsilon = exp_epsilon
         self.action_shape = action_shape
+        self.state_shape = state_shape
+
+        # The features of the seen action ids are cached on the device
+        self._action_features = None
+        self._known_actions = np.zeros(0, dtype=bool)
+        # Reused staging buffer of the observations
+        self._obs_buffer = np.zeros((0, int(np.prod(state_shape))), dtype=np.float32)
 
     def step(self, state):
         action_keys, values = self.predict(state)
@@ -88,26 +118,85 @@ class DMCAgent:
     def parameters(self):
         return self.net.parameters()
 
+    def step_batch(self, states):
+        actions = []
+        for action_keys, values in self.predict_batch(states):
+            if self.exp_epsilon > 0 and np.random.rand() < self.exp_epsilon:
+                actions.append(np.random.choice(action_keys))
+            else:
+                actions.append(action_keys[np.argmax(values)])
+
+        return actions
+
+    def eval_step_batch(self, states):
+        actions, infos = [], []
+        for state, (action_keys, values) in zip(states, self.predict_batch(states)):
+            actions.append(action_keys[np.argmax(values)])
+            info = {}
+            info['values'] = {state['raw_legal_actions'][i]: float(values[i]) for i in range(len(action_keys))}
+            infos.append(info)
+
+        return actions, infos
+
+    def _cache_action_features(self, action_keys, legal_actions):
+        ''' Add the features of the unseen actions to the cache. Actions without
+            features (None) are one-hot encoded.
+        '''
+        if len(action_keys) > 0 and action_keys.max() >= len(self._known_actions):
+            size = max(2 * len(self._known_actions), int(action_keys.max()) + 1)
+            features = torch.zeros((size, int(np.prod(self.action_shape))), device=self.device)
+            if self._action_features is not None:
+                features[:len(self._known_actions)] = self._action_features
+            self._action_features = features
+            self._known_actions = np.concatenate([self._known_actions, np.zeros(size - len(self._known_actions), dtype=bool)])
+        unknown = action_keys[~self._known_actions[action_keys]]
+        if len(unknown) == 0:
+            return
+        rows = np.zeros((len(unknown), self._action_features.shape[1]), dtype=np.float32)
+        for i, action in enumerate(unknown):
+            feature = legal_actions[action]
+            if feature is None:
+                rows[i, action] = 1
+            else:
+                rows[i] = np.asarray(feature).flatten()
+        self._action_features[torch.from_numpy(unknown).to(self.device)] = torch.from_numpy(rows).to(self.device)
+        self._known_actions[unknown] = True
+
     def predict(self, state):
-        # Prepare obs and actions
-        obs = state['obs'].astype(np.float32)
-        legal_actions = state['legal_actions']
-        action_keys = np.array(list(legal_actions.keys()))
-        action_values = list(legal_actions.values())
-        # One-hot encoding if there is no action features
-        for i in range(len(action_values)):
-            if action_values[i] is None:
-                action_values[i] = np.zeros(self.action_shape[0])
-                action_values[i][action_keys[i]] = 1
-        action_values = np.array(action_values, dtype=np.float32)
-
-        obs = np.repeat(obs[np.newaxis, :], len(action_keys), axis=0)
-
-        # Predict Q values
-        values = self.net.forward(torch.from_numpy(obs).to(self.device),
-                                  torch.from_numpy(action_values).to(self.device))
-
-        return action_keys, values.cpu().detach().numpy()
+        return self.predict_batch([state])[0]
+
+    def predict_batch(self, states):
+        ''' Predict the values of the legal actions of a batch of states, which may
+            come from different environments, with a single forward pass. The
+            observation part of the network is computed once per state.
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            (list): A list of (action_keys, values) for each state
+        '''
+        num_states = len(states)
+        if len(self._obs_buffer) < num_states:
+            self._obs_buffer = np.zeros((num_states, self._obs_buffer.shape[1]), dtype=np.float32)
+        action_keys = []
+        for i, state in enumerate(states):
+            self._obs_buffer[i] = state['obs'].reshape(-1)
+            legal_actions = state['legal_actions']
+            keys = np.fromiter(legal_actions.keys(), dtype=np.int64, count=len(legal_actions))
+            self._cache_action_features(keys, legal_actions)
+            action_keys.append(keys)
+
+        counts = [len(keys) for keys in action_keys]
+        with torch.no_grad():
+            obs = torch.from_numpy(self._obs_buffer[:num_states]).to(self.device)
+            keys = torch.from_numpy(np.concatenate(action_keys)).to(self.device)
+            state_index = torch.from_numpy(np.repeat(np.arange(num_states), counts)).to(self.device)
+            values = self.net.forward_split(obs, self._action_features[keys], state_index)
+        values = values.cpu().numpy()
+        offsets = np.cumsum([0] + counts)
+
+        return [(keys, values[offsets[i]:offsets[i+1]]) for i, keys in enumerate(action_keys)]
 
     def forward(self, obs, actions):
         return self.net.forward(obs, actions)
@@ -120,6 +209,8 @@ class DMCAgent:
 
     def set_device(self, device):
         self.device = device
+        self._action_features = None
+        self._known_actions = np.zeros(0, dtype=bool)
 
 class DMCModel:
     def __init__(
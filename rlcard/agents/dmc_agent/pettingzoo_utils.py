@@ -1,9 +1,10 @@
+import copy
 import traceback
 
 import numpy as np
 import torch
 
-from .utils import log
+from .utils import log, set_cpu_affinity
 from rlcard.utils import run_game_pettingzoo
 
 def create_buffers_pettingzoo(
@@ -48,10 +49,22 @@ def act_pettingzoo(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    parameter_server=None,
+    worker_id=0,
+    cpus=None,
+    frame_counter=None,
 ):
     log.info('Device %s Actor %i started.', str(device), i)
     try:
+        if cpus is not None:
+            set_cpu_affinity(cpus)
+
+        # The actor plays with a private copy of the weights
+        if parameter_server is not None:
+            model = copy.deepcopy(model)
+            parameter_server.sync(model, worker_id)
+
         done_buf = [[] for _ in range(env.num_agents)]
         episode_return_buf = [[] for _ in range(env.num_agents)]
         target_buf = [[] for _ in range(env.num_agents)]
@@ -61,10 +74,14 @@ def act_pettingzoo(
 
         while True:
             trajectories = run_game_pettingzoo(env, model.agents, is_training=True)
+            if parameter_server is not None:
+                parameter_server.sync(model, worker_id)
             for agent_id, agent_name in enumerate(env.possible_agents):
                 traj_size = len(trajectories[agent_name]) // 2
                 if traj_size > 0:
                     size[agent_id] += traj_size
+                    if frame_counter is not None:
+                        frame_counter[worker_id] += traj_size
                     target_return = trajectories[agent_name][-2][1]
                     target_buf[agent_id].extend([target_return for _ in range(traj_size)])
                     for i in range(0, len(trajectories[agent_name]), 2):
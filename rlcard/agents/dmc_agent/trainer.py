@@ -24,6 +24,7 @@ import torch
 from torch import multiprocessing as mp
 from torch import nn
 
+from .checkpoint import CheckpointWriter
 from .file_writer import FileWriter
 from .model import DMCModel
 from .pettingzoo_model import DMCModelPettingZoo
@@ -33,6 +34,9 @@ from .utils import (
     create_optimizers,
     act,
     log,
+    ParameterServer,
+    plan_cpus,
+    set_cpu_affinity,
 )
 from .pettingzoo_utils import (
     create_buffers_pettingzoo,
@@ -45,7 +49,7 @@ def compute_loss(logits, targets):
 
 def learn(
     position,
-    actor_models,
+    parameter_server,
     agent,
     batch,
     optimizer,
@@ -68,6 +72,7 @@ def learn(
         stats = {
             'mean_episode_return_'+str(position): torch.mean(torch.stack([_r for _r in mean_episode_return_buf[position]])).item(),
             'loss_'+str(position): loss.item(),
+            'staleness_'+str(position): parameter_server.staleness(position),
         }
 
         optimizer.zero_grad()
@@ -75,8 +80,7 @@ def learn(
         nn.utils.clip_grad_norm_(agent.parameters(), max_grad_norm)
         optimizer.step()
 
-        for actor_model in actor_models.values():
-            actor_model.get_agent(position).load_state_dict(agent.state_dict())
+        parameter_server.update(position, agent.parameters())
         return stats
 
 
@@ -90,20 +94,25 @@ class DMCTrainer:
         xpid (string): Experiment id (default: dmc)
         save_interval (int): Time interval (in minutes) at which to save the model
         num_actor_devices (int): The number devices used for simulation
-        num_actors (int): Number of actors for each simulation device
+        num_actors (int): Number of actors for each simulation device. If None, one actor per core left to the actors
         training_device (str): The index of the GPU used for training models, or `cpu`.
         savedir (string): Root dir where experiment data will be saved
         total_frames (int): Total environment frames to train for
         exp_epsilon (float): The prbability for exploration
         batch_size (int): Learner batch size
         unroll_length (int): The unroll length (time dimension)
-        num_buffers (int): Number of shared-memory buffers
+        num_buffers (int): Number of shared-memory buffers. If None, enough for all the learner threads and actors
         num_threads (int): Number learner threads
         max_grad_norm (int): Max norm of gradients
         learning_rate (float): Learning rate
         alpha (float): RMSProp smoothing constant
         momentum (float): RMSProp momentum
         epsilon (float): RMSProp epsilon
+        sync_interval (int): Number of learner steps of a position between two weight broadcasts to the actors
+        cpu_affinity (boolean): On CPU, pin the learner and every actor to their own cores and size their thread pools
+        compress_checkpoint (boolean): Whether to gzip the checkpoints
+        keep_checkpoints (int): Number of checkpoints to keep
+        columnar_logs (boolean): Whether to also write the logs as npz chunks of columns
     """
     def __init__(
         self,
@@ -127,17 +136,28 @@ class DMCTrainer:
         learning_rate=0.0001,
         alpha=0.99,
         momentum=0,
-        epsilon=0.00001
+        epsilon=0.00001,
+        sync_interval=1,
+        cpu_affinity=True,
+        compress_checkpoint=False,
+        keep_checkpoints=1,
+        columnar_logs=False,
     ):
         self.env = env
 
         self.plogger = FileWriter(
             xpid=xpid,
             rootdir=savedir,
+            columnar=columnar_logs,
         )
 
         self.checkpointpath = os.path.expandvars(
             os.path.expanduser('%s/%s/%s' % (savedir, xpid, 'model.tar')))
+        self.checkpoint_writer = CheckpointWriter(
+            self.checkpointpath,
+            compress=compress_checkpoint,
+            keep=keep_checkpoints,
+        )
 
         self.T = unroll_length
         self.B = batch_size
@@ -147,17 +167,16 @@ class DMCTrainer:
         self.savedir = savedir
         self.save_interval = save_interval
         self.num_actor_devices = num_actor_devices
-        self.num_actors = num_actors
         self.training_device = training_device
         self.total_frames = total_frames
         self.exp_epsilon = exp_epsilon
-        self.num_buffers = num_buffers
         self.num_threads = num_threads
         self.max_grad_norm = max_grad_norm
         self.learning_rate =learning_rate
         self.alpha = alpha
         self.momentum = momentum
         self.epsilon = epsilon
+        self.sync_interval = sync_interval
 
         self.is_pettingzoo_env = is_pettingzoo_env
         if not self.is_pettingzoo_env:
@@ -192,6 +211,19 @@ class DMCTrainer:
         else:
             self.device_iterator = range(num_actor_devices)
 
+        # Split the cores between the learner and the actors. Without it, every
+        # process uses all the cores and adding actors slows down the training
+        learner_cpus, actor_cpus = plan_cpus(num_actors)
+        if num_actors is None:
+            num_actors = len(actor_cpus)
+        self.num_actors = num_actors
+        self.learner_cpus, self.actor_cpus = None, None
+        if cuda == "" and cpu_affinity:
+            self.learner_cpus, self.actor_cpus = learner_cpus, actor_cpus
+        if num_buffers is None:
+            num_buffers = self.B * self.num_threads + self.num_actors
+        self.num_buffers = num_buffers
+
     def start(self):
         # Initialize actor models
         models = {}
@@ -247,34 +279,50 @@ class DMCTrainer:
         for p in range(self.num_players):
             stat_keys.append('mean_episode_return_'+str(p))
             stat_keys.append('loss_'+str(p))
+            stat_keys.append('staleness_'+str(p))
         frames, stats = 0, {k: 0 for k in stat_keys}
 
         # Load models if any
-        if self.load_model and os.path.exists(self.checkpointpath):
-            checkpoint_states = torch.load(
-                    self.checkpointpath,
-                    map_location="cuda:"+str(self.training_device) if self.training_device != "cpu" else "cpu"
+        checkpoint_states = None
+        if self.load_model:
+            checkpoint_states = self.checkpoint_writer.load(
+                map_location="cuda:"+str(self.training_device) if self.training_device != "cpu" else "cpu"
             )
+        if checkpoint_states is not None:
             for p in range(self.num_players):
                 learner_model.get_agent(p).load_state_dict(checkpoint_states["model_state_dict"][p])
                 optimizers[p].load_state_dict(checkpoint_states["optimizer_state_dict"][p])
-                for device in self.device_iterator:
-                    models[device].get_agent(p).load_state_dict(learner_model.get_agent(p).state_dict())
-            stats = checkpoint_states["stats"]
+            stats.update(checkpoint_states["stats"])
             frames = checkpoint_states["frames"]
             log.info(f"Resuming preempted job, current stats:\n{stats}")
 
 
+        # Frames generated by each actor
+        actor_frames = torch.zeros(len(self.device_iterator) * self.num_actors, dtype=torch.int64).share_memory_()
+
+        # Broadcast the learner weights to the actors
+        parameter_server = ParameterServer(
+            learner_model,
+            self.num_players,
+            len(self.device_iterator) * self.num_actors,
+            self.sync_interval,
+        )
+
         # Starting actor processes
-        for device in self.device_iterator:
+        for d, device in enumerate(self.device_iterator):
             num_actors = self.num_actors
             for i in range(self.num_actors):
                 actor = ctx.Process(
                     target=act_pettingzoo if self.is_pettingzoo_env else act,
-                    args=(i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env))
+                    args=(i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env,
+                          parameter_server, d * self.num_actors + i,
+                          self.actor_cpus[i] if self.actor_cpus else None, actor_frames))
                 actor.start()
                 actor_processes.append(actor)
 
+        if self.learner_cpus:
+            set_cpu_affinity(self.learner_cpus)
+
         def batch_and_learn(i, device, position, local_lock, position_lock, lock=threading.Lock()):
             """Thread target for the learning process."""
             nonlocal frames, stats
@@ -288,7 +336,7 @@ class DMCTrainer:
                 )
                 _stats = learn(
                     position,
-                    models,
+                    parameter_server,
                     learner_model.get_agent(position),
                     batch,
                     optimizers[position],
@@ -303,8 +351,8 @@ class DMCTrainer:
                         stats[k] = _stats[k]
                     to_log = dict(frames=frames)
                     to_log.update({k: stats[k] for k in stat_keys})
-                    self.plogger.log(to_log)
                     frames += self.T * self.B
+                self.plogger.log(to_log)
 
         for device in self.device_iterator:
             for m in range(self.num_buffers):
@@ -334,27 +382,34 @@ class DMCTrainer:
         def checkpoint(frames):
             log.info('Saving checkpoint to %s', self.checkpointpath)
             _agents = learner_model.get_agents()
-            torch.save({
-                'model_state_dict': [_agent.state_dict() for _agent in _agents],
-                'optimizer_state_dict': [optimizer.state_dict() for optimizer in optimizers],
-                "stats": stats,
-                'frames': frames,
-            }, self.checkpointpath)
-
             # Save the weights for evaluation purpose
+            weights = {}
             for position in range(self.num_players):
                 model_weights_dir = os.path.expandvars(os.path.expanduser(
                     '%s/%s/%s' % (self.savedir, self.xpid, str(position)+'_'+str(frames)+'.pth')))
-                torch.save(
-                    learner_model.get_agent(position),
-                    model_weights_dir
-                )
+                weights[model_weights_dir] = learner_model.get_agent(position)
+
+            # Snapshot the models while no learner updates them, the
+            # snapshot is written in the background
+            for lock in position_locks:
+                lock.acquire()
+            try:
+                self.checkpoint_writer.save({
+                    'model_state_dict': [_agent.state_dict() for _agent in _agents],
+                    'optimizer_state_dict': [optimizer.state_dict() for optimizer in optimizers],
+                    "stats": stats,
+                    'frames': frames,
+                }, weights)
+            finally:
+                for lock in position_locks:
+                    lock.release()
 
         timer = timeit.default_timer
         try:
             last_checkpoint_time = timer() - self.save_interval * 60
             while frames < self.total_frames:
                 start_frames = frames
+                start_actor_frames = actor_frames.clone()
                 start_time = timer()
                 time.sleep(5)
 
@@ -364,13 +419,18 @@ class DMCTrainer:
 
                 end_time = timer()
                 fps = (frames - start_frames) / (end_time - start_time)
+                actor_fps = (actor_frames - start_actor_frames).double() / (end_time - start_time)
                 log.info(
-                    'After %i frames: @ %.1f fps Stats:\n%s',
+                    'After %i frames: @ %.1f fps, actors @ %.1f fps (min %.1f, max %.1f) Stats:\n%s',
                     frames,
                     fps,
+                    actor_fps.mean().item(),
+                    actor_fps.min().item(),
+                    actor_fps.max().item(),
                     pprint.pformat(stats),
                 )
         except KeyboardInterrupt:
+            self.plogger.flush()
             return
         else:
             for thread in threads:
@@ -378,4 +438,5 @@ class DMCTrainer:
             log.info('Learning finished after %d frames.', frames)
 
         checkpoint(frames)
+        self.checkpoint_writer.wait()
         self.plogger.close()
@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import logging
+import os
 import traceback
 
 import numpy as np
@@ -94,6 +96,275 @@ def create_optimizers(
         optimizers.append(optimizer)
     return optimizers
 
+def available_cpus():
+    ''' The cores the current process is allowed to run on
+    '''
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def plan_cpus(num_actors=None, cpus=None, learner_fraction=0.25):
+    ''' Split the cores between the learner and the actors
+
+    Args:
+        num_actors (int): The number of actors. If None, one actor is started per core left to the actors
+        cpus (list): The cores to use. If None, all the available cores
+        learner_fraction (float): The fraction of the cores reserved for the learner
+
+    Returns:
+        (tuple): A tuple containing
+
+            (list): The cores of the learner
+            (list): The cores of each actor
+    '''
+    if cpus is None:
+        cpus = available_cpus()
+    cpus = sorted(cpus)
+    if len(cpus) < 2:
+        return cpus, [cpus for _ in range(num_actors or 1)]
+    num_learner_cpus = max(1, int(len(cpus) * learner_fraction))
+    learner_cpus, actor_pool = cpus[:num_learner_cpus], cpus[num_learner_cpus:]
+    if num_actors is None:
+        num_actors = len(actor_pool)
+    actor_cpus = [[actor_pool[i % len(actor_pool)]] for i in range(num_actors)]
+    return learner_cpus, actor_cpus
+
+def set_cpu_affinity(cpus):
+    ''' Pin the current process to some cores and size the torch thread pool to them
+
+    Args:
+        cpus (list): The cores
+    '''
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(len(cpus))
+
+class ParameterServer:
+    ''' A versioned double buffer of the weights of every position in shared memory
+
+    The learner publishes the flattened weights of a position into the slot
+    that actors are not reading and then bumps the version, so publishing
+    never waits for the actors. Actors pull the latest version between
+    episodes into a private model. A pull that is overwritten while copying
+    is detected through the version of the slot and retried after the next
+    episode. The versions held by every actor are kept in shared memory to
+    report the staleness of the actors.
+    '''
+    def __init__(self, model, num_players, num_workers, sync_interval=1):
+        ''' Initialize the parameter server
+
+        Args:
+            model (DMCModel): A model whose weights are published initially
+            num_players (int): The number of positions
+            num_workers (int): The number of actors over all the devices
+            sync_interval (int): The number of learner updates of a position between two publishes
+        '''
+        if sync_interval < 1:
+            raise ValueError('sync_interval should be at least 1')
+        self.num_players = num_players
+        self.sync_interval = sync_interval
+        self.weights = []
+        for position in range(num_players):
+            num_params = sum(param.numel() for param in model.parameters(position))
+            self.weights.append(torch.zeros((2, num_params)).share_memory_())
+        # The version of the weights in each slot, -1 while it is written
+        self.slot_versions = torch.full((num_players, 2), -1, dtype=torch.int64).share_memory_()
+        self.versions = torch.zeros(num_players, dtype=torch.int64).share_memory_()
+        self.worker_versions = torch.zeros((num_workers, num_players), dtype=torch.int64).share_memory_()
+        self._num_updates = [0 for _ in range(num_players)]
+        self._staging = {}
+        for position in range(num_players):
+            self.publish(position, model.parameters(position))
+
+    def publish(self, position, parameters):
+        ''' Publish the weights of a position as a new version
+
+        Args:
+            position (int): The position
+            parameters (iterator): The parameters of the agent of the position
+        '''
+        version = int(self.versions[position]) + 1
+        slot = version % 2
+        self.slot_versions[position, slot] = -1
+        weights = self.weights[position][slot]
+        offset = 0
+        with torch.no_grad():
+            for param in parameters:
+                num_params = param.numel()
+                weights[offset:offset + num_params].copy_(param.detach().reshape(-1))
+                offset += num_params
+        self.slot_versions[position, slot] = version
+        self.versions[position] = version
+
+    def update(self, position, parameters):
+        ''' Count a learner update of a position and publish every `sync_interval` updates
+        '''
+        self._num_updates[position] += 1
+        if self._num_updates[position] % self.sync_interval == 0:
+            self.publish(position, parameters)
+
+    def pull(self, position, parameters, version):
+        ''' Copy the latest weights of a position if they are newer than a version
+
+        Args:
+            position (int): The position
+            parameters (iterator): The parameters to overwrite
+            version (int): The version of the parameters
+
+        Returns:
+            (int): The version of the parameters after the pull
+        '''
+        latest = int(self.versions[position])
+        if latest <= version:
+            return version
+        slot = latest % 2
+        if int(self.slot_versions[position, slot]) != latest:
+            return version
+        if position not in self._staging:
+            self._staging[position] = torch.empty_like(self.weights[position][slot])
+        staging = self._staging[position]
+        staging.copy_(self.weights[position][slot])
+        if int(self.slot_versions[position, slot]) != latest:
+            return version
+        offset = 0
+        with torch.no_grad():
+            for param in parameters:
+                num_params = param.numel()
+                param.copy_(staging[offset:offset + num_params].view_as(param))
+                offset += num_params
+        return latest
+
+    def sync(self, model, worker_id):
+        ''' Pull the latest weights of all the positions into the model of an actor
+
+        Args:
+            model (DMCModel): The private model of the actor
+            worker_id (int): The index of the actor
+        '''
+        for position in range(self.num_players):
+            version = int(self.worker_versions[worker_id, position])
+            version = self.pull(position, model.parameters(position), version)
+            self.worker_versions[worker_id, position] = version
+
+    def staleness(self, position):
+        ''' The average number of versions the actors are behind the learner
+
+        Args:
+            position (int): The position
+
+        Returns:
+            (float): The staleness of the position
+        '''
+        behind = self.versions[position] - self.worker_versions[:, position]
+        return behind.float().mean().item()
+
+class TrajectoryStager:
+    ''' The staging area of the transitions of one player in an actor
+
+    The transitions are kept in contiguous numpy arrays used as a ring: the
+    episodes are written after the last transition and the full rollouts of
+    length T are copied from the first transition into the shared buffers
+    with at most two slice copies per key.
+    '''
+    def __init__(self, T, state_shape, action_shape, capacity=None):
+        ''' Initialize the staging area
+
+        Args:
+            T (int): The length of a rollout
+            state_shape (list): The shape of the state
+            action_shape (list): The shape of the action feature
+            capacity (int): The initial number of transitions. It grows when an episode does not fit
+        '''
+        self.T = T
+        self.specs = dict(
+            done=((), bool),
+            episode_return=((), np.float32),
+            target=((), np.float32),
+            state=(tuple(state_shape), np.int8),
+            action=(tuple(action_shape), np.int8),
+        )
+        self.capacity = 0
+        self.start = 0
+        self.size = 0
+        self.arrays = {}
+        self._grow(capacity or 4 * T)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, capacity):
+        ''' Reallocate the arrays, the transitions are moved to the beginning
+        '''
+        arrays = {key: np.zeros((capacity,) + shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()}
+        if self.size > 0:
+            for key in self.arrays:
+                arrays[key][:self.size] = self._take(key, self.size)
+        self.arrays = arrays
+        self.capacity = capacity
+        self.start = 0
+
+    def _slices(self, offset, length):
+        ''' The one or two contiguous slices of the ring from the given offset
+        '''
+        begin = (self.start + offset) % self.capacity
+        first = min(length, self.capacity - begin)
+        slices = [slice(begin, begin + first)]
+        if first < length:
+            slices.append(slice(0, length - first))
+        return slices
+
+    def _take(self, key, length):
+        array = self.arrays[key]
+        return np.concatenate([array[s] for s in self._slices(0, length)])
+
+    def add_episode(self, states, actions, payoff):
+        ''' Add the transitions of an episode of the player
+
+        Args:
+            states (numpy.array): The observations, (num_steps, *state_shape)
+            actions (numpy.array): The action features, (num_steps, *action_shape)
+            payoff (float): The payoff of the player
+        '''
+        num_steps = len(states)
+        if num_steps == 0:
+            return
+        if self.size + num_steps > self.capacity:
+            self._grow(max(2 * self.capacity, self.size + num_steps))
+        done = np.zeros(num_steps, dtype=bool)
+        done[-1] = True
+        episode_return = np.zeros(num_steps, dtype=np.float32)
+        episode_return[-1] = payoff
+        values = dict(
+            done=done,
+            episode_return=episode_return,
+            target=np.full(num_steps, payoff, dtype=np.float32),
+            state=states,
+            action=actions,
+        )
+        offset = 0
+        for s in self._slices(self.size, num_steps):
+            length = s.stop - s.start
+            for key, value in values.items():
+                self.arrays[key][s] = value[offset:offset + length]
+            offset += length
+        self.size += num_steps
+
+    def flush(self, buffers, index):
+        ''' Copy the first T transitions into a shared buffer and remove them
+
+        Args:
+            buffers (dict): The shared buffers of the player
+            index (int): The index of the free buffer
+        '''
+        offset = 0
+        for s in self._slices(0, self.T):
+            length = s.stop - s.start
+            for key, array in self.arrays.items():
+                buffers[key][index][offset:offset + length] = torch.from_numpy(array[s])
+            offset += length
+        self.start = (self.start + self.T) % self.capacity
+        self.size -= self.T
+
 def act(
     i,
     device,
@@ -102,57 +373,54 @@ def act(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    parameter_server=None,
+    worker_id=0,
+    cpus=None,
+    frame_counter=None,
 ):
     try:
         log.info('Device %s Actor %i started.', str(device), i)
+        if cpus is not None:
+            set_cpu_affinity(cpus)
+
+        # The actor plays with a private copy of the weights
+        if parameter_server is not None:
+            model = copy.deepcopy(model)
+            parameter_server.sync(model, worker_id)
 
         # Configure environment
         env.seed(i)
         env.set_agents(model.get_agents())
 
-        done_buf = [[] for _ in range(env.num_players)]
-        episode_return_buf = [[] for _ in range(env.num_players)]
-        target_buf = [[] for _ in range(env.num_players)]
-        state_buf = [[] for _ in range(env.num_players)]
-        action_buf = [[] for _ in range(env.num_players)]
-        size = [0 for _ in range(env.num_players)]
+        # The action features of all the action ids
+        action_features = np.stack([env.get_action_feature(action) for action in range(env.num_actions)]).astype(np.int8)
+        stagers = [
+            TrajectoryStager(T, buffers[p]['state'][0].shape[1:], buffers[p]['action'][0].shape[1:])
+            for p in range(env.num_players)
+        ]
 
         while True:
             trajectories, payoffs = env.run(is_training=True)
+            if parameter_server is not None:
+                parameter_server.sync(model, worker_id)
             for p in range(env.num_players):
-                size[p] += len(trajectories[p][:-1]) // 2
-                diff = size[p] - len(target_buf[p])
-                if diff > 0:
-                    done_buf[p].extend([False for _ in range(diff-1)])
-                    done_buf[p].append(True)
-                    episode_return_buf[p].extend([0.0 for _ in range(diff-1)])
-                    episode_return_buf[p].append(float(payoffs[p]))
-                    target_buf[p].extend([float(payoffs[p]) for _ in range(diff)])
-                    # State and action
-                    for i in range(0, len(trajectories[p])-2, 2):
-                        state = trajectories[p][i]['obs']
-                        action = env.get_action_feature(trajectories[p][i+1])
-                        state_buf[p].append(torch.from_numpy(state))
-                        action_buf[p].append(torch.from_numpy(action))
-                
-                while size[p] > T:
+                # The trajectory is [state, action, state, action, ..., state]
+                trajectory = trajectories[p]
+                num_steps = (len(trajectory) - 1) // 2
+                if num_steps > 0:
+                    states = np.stack([trajectory[t]['obs'] for t in range(0, 2 * num_steps, 2)])
+                    actions = action_features[[trajectory[t] for t in range(1, 2 * num_steps, 2)]]
+                    stagers[p].add_episode(states, actions, float(payoffs[p]))
+                    if frame_counter is not None:
+                        frame_counter[worker_id] += num_steps
+
+                while len(stagers[p]) > T:
                     index = free_queue[p].get()
                     if index is None:
                         break
-                    for t in range(T):
-                        buffers[p]['done'][index][t, ...] = done_buf[p][t]
-                        buffers[p]['episode_return'][index][t, ...] = episode_return_buf[p][t]
-                        buffers[p]['target'][index][t, ...] = target_buf[p][t]
-                        buffers[p]['state'][index][t, ...] = state_buf[p][t]
-                        buffers[p]['action'][index][t, ...] = action_buf[p][t]
+                    stagers[p].flush(buffers[p], index)
                     full_queue[p].put(index)
-                    done_buf[p] = done_buf[p][T:]
-                    episode_return_buf[p] = episode_return_buf[p][T:]
-                    target_buf[p] = target_buf[p][T:]
-                    state_buf[p] = state_buf[p][T:]
-                    action_buf[p] = action_buf[p][T:]
-                    size[p] -= T
 
     except KeyboardInterrupt:
         pass
@@ -59,7 +59,12 @@ class DQNAgent(object):
                  learning_rate=0.00005,
                  device=None,
                  save_path=None,
-                 save_every=float('inf'),):
+                 save_every=float('inf'),
+                 pin_memory=False,
+                 prioritized_replay=False,
+                 prioritized_replay_alpha=0.6,
+                 prioritized_replay_beta=0.4,
+                 prioritized_replay_beta_steps=100000):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -86,6 +91,11 @@ class DQNAgent(object):
             device (torch.device): whether to use the cpu or gpu
             save_path (str): The path to save the model checkpoints
             save_every (int): Save the model every X training steps
+            pin_memory (bool): Whether to sample the replay batches into pinned memory
+            prioritized_replay (bool): Whether to sample the transitions in proportion to their TD errors
+            prioritized_replay_alpha (float): How much the priorities are used, 0 is uniform
+            prioritized_replay_beta (float): The initial exponent of the importance-sampling weights
+            prioritized_replay_beta_steps (int): Number of training steps to anneal beta to 1
         '''
         self.use_raw = False
         self.replay_memory_init_size = replay_memory_init_size
@@ -95,6 +105,7 @@ class DQNAgent(object):
         self.batch_size = batch_size
         self.num_actions = num_actions
         self.train_every = train_every
+        self.prioritized_replay = prioritized_replay
 
         # Torch device
         if device is None:
@@ -118,7 +129,14 @@ class DQNAgent(object):
             mlp_layers=mlp_layers, device=self.device)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, num_actions=num_actions,
+                                            state_shape=state_shape, pin_memory=pin_memory,
+                                            alpha=prioritized_replay_alpha, beta=prioritized_replay_beta,
+                                            beta_steps=prioritized_replay_beta_steps)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, num_actions=num_actions,
+                                 state_shape=state_shape, pin_memory=pin_memory)
         
         # Checkpoint saving parameters
         self.save_path = save_path
@@ -194,22 +212,84 @@ class DQNAgent(object):
 
         return masked_q_values
 
+    def step_batch(self, states):
+        ''' Predict the actions of a batch of states for generating data,
+            with one forward pass of the Q-network
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): The action ids
+        '''
+        q_values = self.predict_batch(states)
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        actions = []
+        for state, _q_values in zip(states, q_values):
+            legal_actions = list(state['legal_actions'].keys())
+            probs = np.ones(len(legal_actions), dtype=float) * epsilon / len(legal_actions)
+            best_action_idx = legal_actions.index(np.argmax(_q_values))
+            probs[best_action_idx] += (1.0 - epsilon)
+            action_idx = np.random.choice(np.arange(len(probs)), p=probs)
+            actions.append(legal_actions[action_idx])
+
+        return actions
+
+    def eval_step_batch(self, states):
+        ''' Predict the actions of a batch of states for evaluation purpose,
+            with one forward pass of the Q-network
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): The action ids
+            infos (list): A list of dictionaries containing information
+        '''
+        q_values = self.predict_batch(states)
+        actions = [int(a) for a in np.argmax(q_values, axis=1)]
+
+        infos = []
+        for state, _q_values in zip(states, q_values):
+            info = {}
+            info['values'] = {state['raw_legal_actions'][i]: float(_q_values[list(state['legal_actions'].keys())[i]]) for i in range(len(state['legal_actions']))}
+            infos.append(info)
+
+        return actions, infos
+
+    def predict_batch(self, states):
+        ''' Predict the masked Q-values of a batch of states
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            q_values (numpy.array): a 2-d array of shape (len(states), num_actions)
+        '''
+        obs = np.stack([state['obs'] for state in states])
+        q_values = self.q_estimator.predict_nograd(obs)
+        masked_q_values = -np.inf * np.ones((len(states), self.num_actions), dtype=float)
+        for b, state in enumerate(states):
+            legal_actions = list(state['legal_actions'].keys())
+            masked_q_values[b, legal_actions] = q_values[b, legal_actions]
+
+        return masked_q_values
+
     def train(self):
         ''' Train the network
 
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
+        if self.prioritized_replay:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, weights, indices = self.memory.sample()
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
+            weights = None
 
         # Calculate best next actions using Q-network (Double DQN)
         q_values_next = self.q_estimator.predict_nograd(next_state_batch)
-        legal_actions = []
-        for b in range(self.batch_size):
-            legal_actions.extend([i + b * self.num_actions for i in legal_actions_batch[b]])
-        masked_q_values = -np.inf * np.ones(self.num_actions * self.batch_size, dtype=float)
-        masked_q_values[legal_actions] = q_values_next.flatten()[legal_actions]
-        masked_q_values = masked_q_values.reshape((self.batch_size, self.num_actions))
+        masked_q_values = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(masked_q_values, axis=1)
 
         # Evaluate best next actions using Target-network (Double DQN)
@@ -218,9 +298,9 @@ class DQNAgent(object):
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
         # Perform gradient descent update
-        state_batch = np.array(state_batch)
-
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
+        loss = self.q_estimator.update(state_batch, action_batch, target_batch, weights)
+        if self.prioritized_replay:
+            self.memory.update_priorities(indices, self.q_estimator.td_errors)
         print('\rINFO - Step {}, rl-loss: {}'.format(self.total_t, loss), end='')
 
         # Update the target estimator
@@ -277,6 +357,7 @@ class DQNAgent(object):
             'batch_size': self.batch_size,
             'num_actions': self.num_actions,
             'train_every': self.train_every,
+            'prioritized_replay': self.prioritized_replay,
             'device': self.device,
             'save_path': self.save_path,
             'save_every': self.save_every
@@ -309,6 +390,8 @@ class DQNAgent(object):
             device=checkpoint['device'],
             save_path=checkpoint['save_path'],
             save_every=checkpoint['save_every'],
+            pin_memory=checkpoint['memory'].get('pin_memory', False),
+            prioritized_replay=checkpoint.get('prioritized_replay', False),
         )
         
         agent_instance.total_t = checkpoint['total_t']
@@ -316,7 +399,7 @@ class DQNAgent(object):
         
         agent_instance.q_estimator = Estimator.from_checkpoint(checkpoint['q_estimator'])
         agent_instance.target_estimator = deepcopy(agent_instance.q_estimator)
-        agent_instance.memory = Memory.from_checkpoint(checkpoint['memory'])
+        agent_instance.memory = type(agent_instance.memory).from_checkpoint(checkpoint['memory'], num_actions=checkpoint['num_actions'])
 
         return agent_instance
                      
@@ -384,11 +467,11 @@ class Estimator(object):
           action values.
         '''
         with torch.no_grad():
-            s = torch.from_numpy(s).float().to(self.device)
+            s = torch.from_numpy(s).to(self.device).float()
             q_as = self.qnet(s).cpu().numpy()
         return q_as
 
-    def update(self, s, a, y):
+    def update(self, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
             In this case y is the target-network estimated
             value of the Q-network optimal actions, which
@@ -398,15 +481,16 @@ class Estimator(object):
           s (np.ndarray): (batch, state_shape) state representation
           a (np.ndarray): (batch,) integer sampled actions
           y (np.ndarray): (batch,) value of optimal actions according to Q-target
+          weights (np.ndarray): (batch,) importance-sampling weights of the squared errors
 
         Returns:
-          The calculated loss on the batch.
+          The calculated loss on the batch. The TD errors of the batch are kept in `td_errors`.
         '''
         self.optimizer.zero_grad()
 
         self.qnet.train()
 
-        s = torch.from_numpy(s).float().to(self.device)
+        s = torch.from_numpy(s).to(self.device).float()
         a = torch.from_numpy(a).long().to(self.device)
         y = torch.from_numpy(y).float().to(self.device)
 
@@ -417,10 +501,15 @@ class Estimator(object):
         Q = torch.gather(q_as, dim=-1, index=a.unsqueeze(-1)).squeeze(-1)
 
         # update model
-        batch_loss = self.mse_loss(Q, y)
+        if weights is None:
+            batch_loss = self.mse_loss(Q, y)
+        else:
+            weights = torch.from_numpy(weights).float().to(self.device)
+            batch_loss = (weights * (Q - y) ** 2).mean()
         batch_loss.backward()
         self.optimizer.step()
         batch_loss = batch_loss.item()
+        self.td_errors = (Q - y).detach().cpu().numpy()
 
         self.qnet.eval()
 
@@ -495,16 +584,61 @@ class EstimatorNetwork(nn.Module):
 
 class Memory(object):
     ''' Memory for saving transitions
+
+    The transitions are kept in preallocated arrays that are used as a ring
+    buffer. The observations are stored with their own dtype and the legal
+    actions of the next states are stored as boolean masks. The arrays are
+    allocated when the first transition is saved if the shape of the state
+    is not given.
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, num_actions=None, state_shape=None, dtype=None, pin_memory=False):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions, which is the size of the legal action masks
+            state_shape (list): the shape of the state
+            dtype (numpy.dtype): the dtype of the stored states. By default, the dtype of
+                the first saved state is used
+            pin_memory (bool): whether to sample the batches into pinned memory, which
+                speeds up the copy to the GPU. It is ignored if CUDA is not available
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
-        self.memory = []
+        self.num_actions = num_actions
+        self.state_shape = None if state_shape is None else tuple(state_shape)
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.pin_memory = pin_memory
+        self.position = 0
+        self.size = 0
+        self.states = None
+        if self.state_shape is not None and self.dtype is not None:
+            self._allocate()
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self):
+        ''' Allocate the arrays of the transitions and of the sampled batch
+        '''
+        if self.num_actions is None:
+            raise ValueError('num_actions is required to store the legal actions')
+        self.states = np.zeros((self.memory_size,) + self.state_shape, dtype=self.dtype)
+        self.next_states = np.zeros((self.memory_size,) + self.state_shape, dtype=self.dtype)
+        self.actions = np.zeros(self.memory_size, dtype=np.int64)
+        self.rewards = np.zeros(self.memory_size, dtype=np.float32)
+        self.dones = np.zeros(self.memory_size, dtype=bool)
+        self.legal_actions = np.zeros((self.memory_size, self.num_actions), dtype=bool)
+
+        # The sampled transitions are gathered into these arrays
+        self._batch = tuple(self._empty((self.batch_size,) + array.shape[1:], array.dtype)
+                            for array in (self.states, self.actions, self.rewards, self.next_states, self.dones, self.legal_actions))
+
+    def _empty(self, shape, dtype):
+        if self.pin_memory and torch.cuda.is_available():
+            return torch.from_numpy(np.empty(0, dtype=dtype)).new_empty(shape).pin_memory().numpy()
+        return np.empty(shape, dtype=dtype)
 
     def save(self, state, action, reward, next_state, legal_actions, done):
         ''' Save transition into memory
@@ -517,47 +651,289 @@ class Memory(object):
             legal_actions (list): the legal actions of the next state
             done (boolean): whether the episode is finished
         '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, done, legal_actions)
-        self.memory.append(transition)
+        if self.states is None:
+            state = np.asarray(state)
+            self.state_shape = state.shape
+            if self.dtype is None:
+                self.dtype = state.dtype
+            self._allocate()
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.legal_actions[i] = False
+        self.legal_actions[i, legal_actions] = True
+        self.position = (self.position + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
 
     def sample(self):
         ''' Sample a minibatch from the replay memory
 
+        The returned arrays are reused by the next call of `sample`.
+
+        Returns:
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            done_batch (numpy.array): a batch of dones
+            legal_actions_batch (numpy.array): a batch of boolean masks of the legal actions
+        '''
+        indices = self.sample_indices()
+        return self.gather(indices)
+
+    def sample_indices(self):
+        ''' Sample the indices of a minibatch without replacement
+
         Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
+            (numpy.array): the indices of the sampled transitions
         '''
-        samples = random.sample(self.memory, self.batch_size)
-        samples = tuple(zip(*samples))
-        return tuple(map(np.array, samples[:-1])) + (samples[-1],)
+        return np.array(random.sample(range(self.size), self.batch_size), dtype=np.int64)
+
+    def gather(self, indices):
+        ''' Gather the transitions of the given indices into the batch arrays
+
+        Args:
+            indices (numpy.array): the indices of the transitions
+
+        Returns:
+            (tuple): the batch arrays, see `sample`
+        '''
+        arrays = (self.states, self.actions, self.rewards, self.next_states, self.dones, self.legal_actions)
+        for array, out in zip(arrays, self._batch):
+            np.take(array, indices, axis=0, out=out)
+        return self._batch
 
     def checkpoint_attributes(self):
         ''' Returns the attributes that need to be checkpointed
         '''
-        
-        return {
+        attributes = {
             'memory_size': self.memory_size,
             'batch_size': self.batch_size,
-            'memory': self.memory
+            'num_actions': self.num_actions,
+            'state_shape': self.state_shape,
+            'dtype': None if self.dtype is None else self.dtype.str,
+            'pin_memory': self.pin_memory,
+            'position': self.position,
+            'size': self.size,
         }
-            
+        if self.states is not None:
+            for name in ('states', 'actions', 'rewards', 'next_states', 'dones', 'legal_actions'):
+                attributes[name] = getattr(self, name)[:self.size]
+        return attributes
+
     @classmethod
-    def from_checkpoint(cls, checkpoint):
+    def from_checkpoint(cls, checkpoint, num_actions=None):
         ''' 
         Restores the attributes from the checkpoint
         
         Args:
             checkpoint (dict): the checkpoint dictionary
-            
+            num_actions (int): the number of actions. It is only needed for the checkpoints
+                of the list-based memory of older versions
+
         Returns:
             instance (Memory): the restored instance
         '''
-        
-        instance = cls(checkpoint['memory_size'], checkpoint['batch_size'])
-        instance.memory = checkpoint['memory']
+        instance = cls(checkpoint['memory_size'],
+                       checkpoint['batch_size'],
+                       num_actions=checkpoint.get('num_actions', num_actions),
+                       state_shape=checkpoint.get('state_shape'),
+                       dtype=checkpoint.get('dtype'),
+                       pin_memory=checkpoint.get('pin_memory', False))
+        if 'memory' in checkpoint:
+            # The transitions of older versions are a list of Transition
+            for transition in checkpoint['memory']:
+                instance.save(transition.state, transition.action, transition.reward,
+                              transition.next_state, transition.legal_actions, transition.done)
+        elif 'states' in checkpoint:
+            size = checkpoint['size']
+            for name in ('states', 'actions', 'rewards', 'next_states', 'dones', 'legal_actions'):
+                getattr(instance, name)[:size] = checkpoint[name]
+            instance.position = checkpoint['position']
+            instance.size = size
+        return instance
+
+
+class SegmentTree(object):
+    ''' A binary tree over an array, where each node holds the sum (or the
+        minimum) of its children. Updates and prefix-sum searches take
+        O(log N) and are vectorized over batches of indices.
+    '''
+
+    def __init__(self, capacity, operation=np.add, neutral=0.0):
+        ''' Initialize
+        Args:
+            capacity (int): the number of leaves
+            operation (numpy.ufunc): np.add for a sum tree or np.minimum for a min tree
+            neutral (float): the neutral element of the operation, 0 for sum and inf for min
+        '''
+        self.capacity = capacity
+        self.operation = operation
+        self.neutral = neutral
+        self.num_leaves = 1
+        while self.num_leaves < capacity:
+            self.num_leaves *= 2
+        self.tree = np.full(2 * self.num_leaves, neutral, dtype=np.float64)
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.num_leaves]
+
+    def root(self):
+        ''' Returns the reduction of all the leaves
+        '''
+        return self.tree[1]
+
+    def update(self, indices, values):
+        ''' Set the values of the leaves and update their ancestors
+
+        Args:
+            indices (numpy.array): the indices of the leaves
+            values (numpy.array): the new values
+        '''
+        nodes = np.asarray(indices, dtype=np.int64) + self.num_leaves
+        self.tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.operation(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find_prefix_sum(self, values):
+        ''' Find the leaves where the prefix sums reach the given values. Only
+            valid for sum trees.
+
+        Args:
+            values (numpy.array): the values, in [0, root())
+
+        Returns:
+            (numpy.array): the indices of the leaves
+        '''
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.num_leaves:
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return np.minimum(nodes - self.num_leaves, self.capacity - 1)
+
+class PrioritizedMemory(Memory):
+    ''' Prioritized experience replay (Schaul et al., 2016)
+
+    A transition is sampled with a probability proportional to its priority
+    (|TD error| + eps) ** alpha. New transitions get the maximal priority so
+    far. The bias of the sampling is corrected with the importance-sampling
+    weights (N * P(i)) ** -beta, normalized by their maximum, where beta is
+    annealed to 1.
+    '''
+
+    def __init__(self, memory_size, batch_size, num_actions=None, state_shape=None, dtype=None, pin_memory=False,
+                 alpha=0.6, beta=0.4, beta_steps=100000, eps=1e-6):
+        ''' Initialize
+        Args:
+            alpha (float): how much the priorities are used, 0 is uniform
+            beta (float): the initial exponent of the importance-sampling weights
+            beta_steps (int): the number of sampled batches to anneal beta to 1
+            eps (float): a small number added to the TD errors
+
+        See `Memory` for the other arguments.
+        '''
+        super().__init__(memory_size, batch_size, num_actions=num_actions, state_shape=state_shape,
+                         dtype=dtype, pin_memory=pin_memory)
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta_steps = beta_steps
+        self.eps = eps
+        self.num_samples = 0
+        self.max_priority = 1.0
+        self.sum_tree = SegmentTree(memory_size, np.add, 0.0)
+        self.min_tree = SegmentTree(memory_size, np.minimum, np.inf)
+
+    @property
+    def beta(self):
+        ''' (float): The current exponent of the importance-sampling weights
+        '''
+        fraction = min(self.num_samples / self.beta_steps, 1.0) if self.beta_steps > 0 else 1.0
+        return self.beta_start + fraction * (1.0 - self.beta_start)
+
+    def save(self, state, action, reward, next_state, legal_actions, done):
+        ''' Save transition into memory with the maximal priority, see `Memory.save`
+        '''
+        index = self.position
+        super().save(state, action, reward, next_state, legal_actions, done)
+        self._set_priorities([index], self.max_priority ** self.alpha)
+
+    def _set_priorities(self, indices, priorities):
+        self.sum_tree.update(indices, priorities)
+        self.min_tree.update(indices, priorities)
+
+    def sample(self):
+        ''' Sample a minibatch in proportion to the priorities. The batch is
+            stratified into equal segments of the total priority.
+
+        Returns:
+            The arrays of `Memory.sample`, followed by
+            weights (numpy.array): the importance-sampling weights
+            indices (numpy.array): the indices of the transitions, for `update_priorities`
+        '''
+        total = self.sum_tree.root()
+        segment = total / self.batch_size
+        values = (np.arange(self.batch_size) + np.random.random_sample(self.batch_size)) * segment
+        indices = self.sum_tree.find_prefix_sum(values)
+        indices = np.minimum(indices, self.size - 1)
+
+        # (N * P(i)) ** -beta / max_j (N * P(j)) ** -beta = (p_i / p_min) ** -beta
+        beta = self.beta
+        weights = (self.sum_tree[indices] / self.min_tree.root()) ** -beta
+        self.num_samples += 1
+        return self.gather(indices) + (weights.astype(np.float32), indices)
+
+    def update_priorities(self, indices, td_errors):
+        ''' Update the priorities of the sampled transitions
+
+        Args:
+            indices (numpy.array): the indices returned by `sample`
+            td_errors (numpy.array): the TD errors of the transitions
+        '''
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities ** self.alpha)
+
+    def checkpoint_attributes(self):
+        ''' Returns the attributes that need to be checkpointed
+        '''
+        attributes = super().checkpoint_attributes()
+        attributes.update({
+            'alpha': self.alpha,
+            'beta': self.beta_start,
+            'beta_steps': self.beta_steps,
+            'eps': self.eps,
+            'num_samples': self.num_samples,
+            'max_priority': self.max_priority,
+            'priorities': self.sum_tree[np.arange(self.size)],
+        })
+        return attributes
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, num_actions=None):
+        ''' Restores the attributes from the checkpoint, see `Memory.from_checkpoint`.
+            The transitions of a checkpoint without priorities get the maximal priority.
+        '''
+        instance = super().from_checkpoint(checkpoint, num_actions=num_actions)
+        instance.alpha = checkpoint.get('alpha', instance.alpha)
+        instance.beta_start = checkpoint.get('beta', instance.beta_start)
+        instance.beta_steps = checkpoint.get('beta_steps', instance.beta_steps)
+        instance.eps = checkpoint.get('eps', instance.eps)
+        instance.num_samples = checkpoint.get('num_samples', 0)
+        instance.max_priority = checkpoint.get('max_priority', instance.max_priority)
+        if instance.size > 0:
+            if 'priorities' in checkpoint:
+                priorities = checkpoint['priorities']
+            else:
+                priorities = np.full(instance.size, instance.max_priority ** instance.alpha)
+            instance._set_priorities(np.arange(instance.size), priorities)
         return instance
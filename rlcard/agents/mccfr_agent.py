@@ -0,0 +1,187 @@
+import numpy as np
+
+from rlcard.utils.utils import *
+from rlcard.agents.cfr_agent import CFRAgent
+
+class MCCFRAgent(CFRAgent):
+    ''' Implement Monte Carlo CFR with external sampling or outcome sampling
+
+    The chance events are sampled by the environment when it is reset, and the
+    actions are sampled with the random generator of the environment. With
+    external sampling, all the actions of the traverser are explored and one
+    action is sampled at the other nodes, which needs an environment that
+    allows step back. With outcome sampling, a single trajectory is sampled,
+    so the cost of an iteration is proportional to the depth of the game tree.
+    Outcome sampling is recommended for games with long episodes, such as Uno.
+    '''
+
+    SAMPLINGS = ['external', 'outcome']
+
+    def __init__(self,
+                 env,
+                 model_path='./mccfr_model',
+                 sampling='external',
+                 epsilon=0.6,
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 abstraction=None):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class
+            model_path (str): The directory to save the model
+            sampling (str): 'external' or 'outcome'
+            epsilon (float): The exploration of the traverser in outcome sampling
+            memmap_dir (str): If not None, the tables are memory-mapped files in this directory
+            dtype (numpy.dtype): The data type of the tables
+            abstraction (object): If not None, the abstraction giving the keys of the info sets
+        '''
+        if sampling not in self.SAMPLINGS:
+            raise ValueError('Unknown sampling {}, it should be one of {}'.format(sampling, self.SAMPLINGS))
+        super().__init__(env, model_path=model_path, memmap_dir=memmap_dir, dtype=dtype, abstraction=abstraction)
+        self.sampling = sampling
+        self.epsilon = epsilon
+
+    def train(self):
+        ''' Do one iteration of MCCFR, which samples one episode for each player
+        '''
+        self.iteration += 1
+        for player_id in range(self.env.num_players):
+            self.env.reset()
+            if self.sampling == 'external':
+                self.traverse_external(player_id)
+            else:
+                self.traverse_outcome(player_id)
+
+    def traverse_external(self, player_id):
+        ''' Traverse the game tree with external sampling, update the regrets
+            of the traverser and the average policy of the other players
+
+        Args:
+            player_id (int): The traverser
+
+        Returns:
+            (float): The sampled utility of the traverser
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        current_player = self.env.get_player_id()
+        infoset_id, legal_actions, action_probs = self.current_policy(current_player)
+
+        if current_player != player_id:
+            self.table.strategy_sum[infoset_id, legal_actions] += action_probs[legal_actions]
+            action = self.sample_action(action_probs)
+            self.env.step(action)
+            utility = self.traverse_external(player_id)
+            self.env.step_back()
+            return utility
+
+        action_utilities = np.zeros(self.env.num_actions)
+        for action in legal_actions:
+            self.env.step(action)
+            action_utilities[action] = self.traverse_external(player_id)
+            self.env.step_back()
+
+        state_utility = np.dot(action_probs[legal_actions], action_utilities[legal_actions])
+        self.table.regrets[infoset_id, legal_actions] += action_utilities[legal_actions] - state_utility
+        return state_utility
+
+    def traverse_outcome(self, player_id):
+        ''' Sample one trajectory with outcome sampling, update the regrets of
+            the traverser and the average policy of the other players. The
+            trajectory is sampled iteratively, so long games such as Uno do not
+            hit the recursion limit.
+
+        Args:
+            player_id (int): The traverser
+
+        Returns:
+            (float): The utility of the traverser
+        '''
+        # The other players and chance sample their actions on policy, so
+        # their reach and sample probabilities cancel out in the weights of
+        # the traverser. The average policy of another player is weighted by
+        # its own reach divided by the sample probability, which leaves the
+        # sample probability of the traverser and the reach of the other
+        # opponents, so the reach of every player is tracked
+        path = []
+        sample_prob = 1.0
+        reach = np.ones(self.env.num_players)
+        while not self.env.is_over():
+            current_player = self.env.get_player_id()
+            infoset_id, legal_actions, action_probs = self.current_policy(current_player)
+
+            if current_player == player_id:
+                # Explore uniformly with probability epsilon
+                sample_probs = np.zeros(self.env.num_actions)
+                sample_probs[legal_actions] = self.epsilon / len(legal_actions)
+                sample_probs += (1 - self.epsilon) * action_probs
+            else:
+                sample_probs = action_probs
+            action = self.sample_action(sample_probs)
+
+            if current_player == player_id:
+                sample_reach = sample_prob
+            else:
+                others = [i for i in range(len(reach)) if i != player_id and i != current_player]
+                sample_reach = sample_prob * np.prod(reach[others])
+            path.append((current_player, infoset_id, legal_actions, action_probs, sample_probs, action, sample_reach))
+            if current_player == player_id:
+                sample_prob *= sample_probs[action]
+            else:
+                reach[current_player] *= action_probs[action]
+            self.env.step(action)
+
+        utility = self.env.get_payoffs()[player_id]
+
+        # Update the visited info sets from the terminal to the root. tail_ratio is the
+        # reach probability of the terminal from the current history divided by its
+        # sample probability. In very long episodes the importance weights may
+        # overflow, and these updates are skipped
+        tail_ratio = 1.0
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            for current_player, infoset_id, legal_actions, action_probs, sample_probs, action, sample_reach in reversed(path):
+                if current_player == player_id:
+                    action_ratio = action_probs[action] / sample_probs[action]
+                    weighted_utility = utility / sample_reach
+                    regrets = -weighted_utility * tail_ratio * action_ratio * np.ones(len(legal_actions))
+                    regrets[legal_actions.index(action)] += weighted_utility * tail_ratio / sample_probs[action]
+                    if np.isfinite(regrets).all():
+                        self.table.regrets[infoset_id, legal_actions] += regrets
+                    tail_ratio *= action_ratio
+                else:
+                    strategy = action_probs[legal_actions] / sample_reach
+                    if np.isfinite(strategy).all():
+                        self.table.strategy_sum[infoset_id, legal_actions] += strategy
+
+        return utility
+
+    def current_policy(self, player_id):
+        ''' Get the policy of the player in the current state by regret matching
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (tuple) that contains:
+                infoset_id (int): The id of the info set in the table
+                legal_actions (list): Indices of legal actions
+                action_probs (numpy.array): The action probabilities
+        '''
+        obs, legal_actions = self.get_state(player_id)
+        infoset_id = self.table.index(obs)
+        policy = self.table.regret_matching(self.table.regrets[infoset_id:infoset_id+1])[0]
+        self.table.policy[infoset_id] = policy
+        return infoset_id, legal_actions, remove_illegal(policy, legal_actions)
+
+    def sample_action(self, action_probs):
+        ''' Sample an action with the random generator of the environment
+
+        Args:
+            action_probs (numpy.array): The action probabilities
+
+        Returns:
+            (int): The sampled action
+        '''
+        return self.env.np_random.choice(len(action_probs), p=action_probs)
@@ -266,18 +266,16 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        info_states, action_probs = self._reservoir_buffer.sample(self._batch_size)
 
         self.policy_network_optimizer.zero_grad()
         self.policy_network.train()
 
         # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
+        info_states = torch.from_numpy(info_states).to(self.device).float()
 
         # (batch, num_actions)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
+        eval_action_probs = torch.from_numpy(action_probs).to(self.device)
 
         # (batch, num_actions)
         log_forecast_action_probs = self.policy_network(info_states)
@@ -361,7 +359,7 @@ class NFSPAgent(object):
         agent.policy_network.eval()
         agent.policy_network_optimizer = torch.optim.Adam(agent.policy_network.parameters(), lr=agent._sl_learning_rate)
         agent.policy_network_optimizer.load_state_dict(checkpoint['policy_network_optimizer'])
-        agent._rl_agent.from_checkpoint(checkpoint['rl_agent'])
+        agent._rl_agent = DQNAgent.from_checkpoint(checkpoint['rl_agent'])
         agent._rl_agent.set_device(agent.device)
         return agent
         
@@ -454,31 +452,51 @@ class AveragePolicyNetwork(nn.Module):
 class ReservoirBuffer(object):
     ''' Allows uniform sampling over a stream of data.
 
-    This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
+    The info states and the action probabilities of the transitions are
+    stored in preallocated arrays, which are allocated when the first
+    transition is added. The info states keep their dtype unless `dtype` is
+    given.
 
     See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
     '''
 
-    def __init__(self, reservoir_buffer_capacity):
+    def __init__(self, reservoir_buffer_capacity, dtype=None):
         ''' Initialize the buffer.
+
+        Args:
+            reservoir_buffer_capacity (int): The maximal number of transitions
+            dtype (numpy.dtype): The dtype of the stored info states
         '''
         self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
+        self._dtype = None if dtype is None else np.dtype(dtype)
+        self._info_states = None
+        self._action_probs = None
+        self._size = 0
         self._add_calls = 0
 
+    def _allocate(self, info_state_shape, action_probs_shape, dtype):
+        if self._dtype is None:
+            self._dtype = np.dtype(dtype)
+        self._info_states = np.zeros((self._reservoir_buffer_capacity,) + tuple(info_state_shape), dtype=self._dtype)
+        self._action_probs = np.zeros((self._reservoir_buffer_capacity,) + tuple(action_probs_shape), dtype=np.float32)
+
     def add(self, element):
         ''' Potentially adds `element` to the reservoir buffer.
 
         Args:
-            element (object): data to be added to the reservoir buffer.
+            element (Transition): data to be added to the reservoir buffer.
         '''
-        if len(self._data) < self._reservoir_buffer_capacity:
-            self._data.append(element)
+        if self._size < self._reservoir_buffer_capacity:
+            idx = self._size
+            self._size += 1
         else:
             idx = np.random.randint(0, self._add_calls + 1)
-            if idx < self._reservoir_buffer_capacity:
-                self._data[idx] = element
+        if idx < self._reservoir_buffer_capacity:
+            if self._info_states is None:
+                info_state = np.asarray(element.info_state)
+                self._allocate(info_state.shape, np.shape(element.action_probs), info_state.dtype)
+            self._info_states[idx] = element.info_state
+            self._action_probs[idx] = element.action_probs
         self._add_calls += 1
 
     def sample(self, num_samples):
@@ -488,39 +506,55 @@ class ReservoirBuffer(object):
             num_samples (int): The number of samples to draw.
 
         Returns:
-            An iterable over `num_samples` random elements of the buffer.
+            info_states (numpy.array): The sampled info states, (num_samples, *state_shape)
+            action_probs (numpy.array): The sampled action probabilities, (num_samples, num_actions)
 
         Raises:
             ValueError: If there are less than `num_samples` elements in the buffer
         '''
-        if len(self._data) < num_samples:
+        if self._size < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
-                    num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
+                    num_samples, self._size))
+        indices = np.array(random.sample(range(self._size), num_samples), dtype=np.int64)
+        return self._info_states[indices], self._action_probs[indices]
 
     def clear(self):
         ''' Clear the buffer
         '''
-        self._data = []
+        self._size = 0
         self._add_calls = 0
         
     def checkpoint_attributes(self):
-        return {
-            'data': self._data,
+        attributes = {
             'add_calls': self._add_calls,
             'reservoir_buffer_capacity': self._reservoir_buffer_capacity,
+            'dtype': None if self._dtype is None else self._dtype.str,
         }
+        if self._info_states is not None:
+            attributes['info_states'] = self._info_states[:self._size]
+            attributes['action_probs'] = self._action_probs[:self._size]
+        return attributes
         
     @classmethod
     def from_checkpoint(cls, checkpoint):
-        reservoir_buffer = cls(checkpoint['reservoir_buffer_capacity'])
-        reservoir_buffer._data = checkpoint['data']
+        reservoir_buffer = cls(checkpoint['reservoir_buffer_capacity'], dtype=checkpoint.get('dtype'))
+        if 'data' in checkpoint:
+            # The transitions of older versions are a list of Transition
+            for element in checkpoint['data']:
+                reservoir_buffer.add(element)
+        elif 'info_states' in checkpoint:
+            info_states, action_probs = checkpoint['info_states'], checkpoint['action_probs']
+            # The shapes of the rows are kept by the checkpoints of empty buffers
+            reservoir_buffer._allocate(info_states.shape[1:], action_probs.shape[1:], info_states.dtype)
+            reservoir_buffer._info_states[:len(info_states)] = info_states
+            reservoir_buffer._action_probs[:len(action_probs)] = action_probs
+            reservoir_buffer._size = len(info_states)
         reservoir_buffer._add_calls = checkpoint['add_calls']
         return reservoir_buffer
 
     def __len__(self):
-        return len(self._data)
+        return self._size
 
     def __iter__(self):
-        return iter(self._data)
-
+        for i in range(self._size):
+            yield Transition(info_state=self._info_states[i], action_probs=self._action_probs[i])
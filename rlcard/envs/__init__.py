@@ -1,7 +1,7 @@
 ''' Register new environments
 '''
-from rlcard.envs.env import Env
-from rlcard.envs.registration import register, make
+from rlcard.envs.env import Env, LazyState
+from rlcard.envs.registration import register, make, make_vec
 
 register(
     env_id='blackjack',
@@ -79,7 +79,7 @@ class BridgeEnv(Env):
         Returns:
             (numpy.array): The extracted state
         '''
-        return self.bridgeStateExtractor.extract_state(game=self.game)
+        return self.bridgeStateExtractor.extract_state(game=self.game, state_fields=self.state_fields)
 
     def _decode_action(self, action_id):
         ''' Decode Action id to the action in the game.
@@ -148,11 +148,12 @@ class BridgeStateExtractor(object):  # interface
     def get_state_shape_size(self) -> int:
         raise NotImplementedError
 
-    def extract_state(self, game: BridgeGame):
+    def extract_state(self, game: BridgeGame, state_fields=None):
         ''' Extract useful information from state for RL. Must be implemented in the child class.
 
         Args:
             game (BridgeGame): The game
+            state_fields (set): The fields to extract, or None for all of them
 
         Returns:
             (numpy.array): The extracted state
@@ -193,18 +194,42 @@ class DefaultBridgeStateExtractor(BridgeStateExtractor):
         state_shape_size += 5  # trump_suit_rep_size
         return state_shape_size
 
-    def extract_state(self, game: BridgeGame):
+    def extract_state(self, game: BridgeGame, state_fields=None):
         ''' Extract useful information from state for RL.
 
         Args:
             game (BridgeGame): The game
+            state_fields (set): The fields to extract, or None for all of them
 
         Returns:
             (numpy.array): The extracted state
         '''
         extracted_state = {}
         legal_actions: OrderedDict = self.get_legal_actions(game=game)
-        raw_legal_actions = list(legal_actions.keys())
+        fields = {'obs', 'legal_actions', 'raw_legal_actions', 'raw_obs'}
+        if state_fields is not None:
+            fields &= set(state_fields)
+        # The observation is both obs and raw_obs, and it is the costly field
+        obs = self.encode_obs(game) if fields & {'obs', 'raw_obs'} else None
+        if 'obs' in fields:
+            extracted_state['obs'] = obs
+        if 'legal_actions' in fields:
+            extracted_state['legal_actions'] = legal_actions
+        if 'raw_legal_actions' in fields:
+            extracted_state['raw_legal_actions'] = list(legal_actions.keys())
+        if 'raw_obs' in fields:
+            extracted_state['raw_obs'] = obs
+        return extracted_state
+
+    def encode_obs(self, game: BridgeGame):
+        ''' Encode the observation of the current player
+
+        Args:
+            game (BridgeGame): The game
+
+        Returns:
+            (numpy.array): The observation
+        '''
         current_player = game.round.get_current_player()
         current_player_id = current_player.player_id
 
@@ -303,8 +328,4 @@ class DefaultBridgeStateExtractor(BridgeStateExtractor):
         rep.append(trump_suit_rep)
 
         obs = np.concatenate(rep)
-        extracted_state['obs'] = obs
-        extracted_state['legal_actions'] = legal_actions
-        extracted_state['raw_legal_actions'] = raw_legal_actions
-        extracted_state['raw_obs'] = obs
-        return extracted_state
+        return obs
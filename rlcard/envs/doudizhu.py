@@ -1,7 +1,6 @@
-from collections import Counter, OrderedDict
 import numpy as np
 
-from rlcard.envs import Env
+from rlcard.envs import Env, LazyState
 
 
 class DoudizhuEnv(Env):
@@ -24,71 +23,70 @@ class DoudizhuEnv(Env):
         self.action_shape = [[54] for _ in range(self.num_players)]
 
     def _extract_state(self, state):
-        ''' Encode state
+        ''' Encode state. The raw state holds copies of the game state, so
+            the observation is encoded when it is first read
 
         Args:
             state (dict): dict of original state
         '''
-        current_hand = _cards2array(state['current_hand'])
-        others_hand = _cards2array(state['others_hand'])
+        extracted_state = LazyState()
+        self._set_state_field(extracted_state, 'obs', lambda: self._encode_obs(state))
+        self._set_state_field(extracted_state, 'legal_actions', self._get_legal_actions, lazy=False)
+        self._set_state_field(extracted_state, 'raw_obs', lambda: state)
+        self._set_state_field(extracted_state, 'raw_legal_actions', lambda: [a for a in state['actions']])
+        action_recorder = self.action_recorder
+        self._set_state_field(extracted_state, 'action_record', lambda: action_recorder)
+        return extracted_state
+
+    def _encode_obs(self, state):
+        ''' Encode the observation of a state
+
+        Args:
+            state (dict): dict of original state
 
+        Returns:
+            (numpy.array): The observation
+        '''
         last_action = ''
         if len(state['trace']) != 0:
             if state['trace'][-1][1] == 'pass':
                 last_action = state['trace'][-2][1]
             else:
                 last_action = state['trace'][-1][1]
-        last_action = _cards2array(last_action)
 
-        last_9_actions = _action_seq2array(_process_action_seq(state['trace']))
+        # The features are written into one buffer one after another
+        obs = np.zeros(self.state_shape[0 if state['self'] == 0 else 1][0], dtype=np.int8)
+        offset = _fill_cards(obs, 0, state['current_hand'])
+        offset = _fill_cards(obs, offset, state['others_hand'])
+        offset = _fill_cards(obs, offset, last_action)
+        for action in _process_action_seq(state['trace']):
+            offset = _fill_cards(obs, offset, action)
 
         if state['self'] == 0: # landlord
-            landlord_up_played_cards = _cards2array(state['played_cards'][2])
-            landlord_down_played_cards = _cards2array(state['played_cards'][1])
-            landlord_up_num_cards_left = _get_one_hot_array(state['num_cards_left'][2], 17) 
-            landlord_down_num_cards_left = _get_one_hot_array(state['num_cards_left'][1], 17)
-            obs = np.concatenate((current_hand,
-                                  others_hand,
-                                  last_action,
-                                  last_9_actions,
-                                  landlord_up_played_cards,
-                                  landlord_down_played_cards,
-                                  landlord_up_num_cards_left,
-                                  landlord_down_num_cards_left))
+            offset = _fill_cards(obs, offset, state['played_cards'][2])
+            offset = _fill_cards(obs, offset, state['played_cards'][1])
+            offset = _fill_one_hot(obs, offset, state['num_cards_left'][2], 17)
+            offset = _fill_one_hot(obs, offset, state['num_cards_left'][1], 17)
         else:
-            landlord_played_cards = _cards2array(state['played_cards'][0])
             for i, action in reversed(state['trace']):
                 if i == 0:
                     last_landlord_action = action
                     break
-            last_landlord_action = _cards2array(last_landlord_action)
-            landlord_num_cards_left = _get_one_hot_array(state['num_cards_left'][0], 20)
 
             teammate_id = 3 - state['self']
-            teammate_played_cards = _cards2array(state['played_cards'][teammate_id])
             last_teammate_action = 'pass'
             for i, action in reversed(state['trace']):
                 if i == teammate_id:
                     last_teammate_action = action
                     break
-            last_teammate_action = _cards2array(last_teammate_action)
-            teammate_num_cards_left = _get_one_hot_array(state['num_cards_left'][teammate_id], 17)
-            obs = np.concatenate((current_hand,
-                                  others_hand,
-                                  last_action,
-                                  last_9_actions,
-                                  landlord_played_cards,
-                                  teammate_played_cards,
-                                  last_landlord_action,
-                                  last_teammate_action,
-                                  landlord_num_cards_left,
-                                  teammate_num_cards_left))
-
-        extracted_state = OrderedDict({'obs': obs, 'legal_actions': self._get_legal_actions()})
-        extracted_state['raw_obs'] = state
-        extracted_state['raw_legal_actions'] = [a for a in state['actions']]
-        extracted_state['action_record'] = self.action_recorder
-        return extracted_state
+            offset = _fill_cards(obs, offset, state['played_cards'][0])
+            offset = _fill_cards(obs, offset, state['played_cards'][teammate_id])
+            offset = _fill_cards(obs, offset, last_landlord_action)
+            offset = _fill_cards(obs, offset, last_teammate_action)
+            offset = _fill_one_hot(obs, offset, state['num_cards_left'][0], 20)
+            offset = _fill_one_hot(obs, offset, state['num_cards_left'][teammate_id], 17)
+
+        return obs
             
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
@@ -115,8 +113,11 @@ class DoudizhuEnv(Env):
         Returns:
             legal_actions (list): a list of legal actions' id
         '''
-        legal_actions = self.game.state['actions']
-        legal_actions = {self._ACTION_2_ID[action]: _cards2array(action) for action in legal_actions}
+        encodings = _action_encodings()
+        legal_actions = {}
+        for action in self.game.state['actions']:
+            action_id = self._ACTION_2_ID[action]
+            legal_actions[action_id] = encodings[action_id]
         return legal_actions
 
     def get_perfect_information(self):
@@ -139,7 +140,7 @@ class DoudizhuEnv(Env):
         Returns:
             (numpy.array): The action features
         '''
-        return _cards2array(self._decode_action(action))
+        return _action_encodings()[action]
 
 Card2Column = {'3': 0, '4': 1, '5': 2, '6': 3, '7': 4, '8': 5, '9': 6, 'T': 7,
                'J': 8, 'Q': 9, 'K': 10, 'A': 11, '2': 12}
@@ -150,34 +151,71 @@ NumOnes2Array = {0: np.array([0, 0, 0, 0]),
                  3: np.array([1, 1, 1, 0]),
                  4: np.array([1, 1, 1, 1])}
 
+# The rows of a rank of each number of cards
+_COUNT_ROWS = np.array([NumOnes2Array[num_times] for num_times in range(5)], dtype=np.int8)
+
+# The read-only encodings of all the actions, indexed by action id, and the
+# tables of the game they are computed from. They are loaded the first time
+_ACTION_ENCODINGS = None
+_ACTION_2_ID = None
+_RANK_INDEX = None
+
+def _counts2array(counts):
+    ''' Encode the numbers of cards of the 15 ranks, the last axis of counts.
+    A rank with n cards has its first n rows set and a joker has one entry.
+    '''
+    counts = np.asarray(counts)
+    matrix = np.arange(4) < counts[..., :13, np.newaxis]
+    jokers = counts[..., 13:] > 0
+    return np.concatenate((matrix.reshape(counts.shape[:-1] + (52,)), jokers), axis=-1).astype(np.int8)
+
+def _action_encodings():
+    ''' Get the encodings of all the actions, computed the first time
+    '''
+    global _ACTION_ENCODINGS, _ACTION_2_ID, _RANK_INDEX
+    if _ACTION_ENCODINGS is None:
+        from rlcard.games.doudizhu.utils import ACTION_PACKED, ACTION_2_ID, CARD_RANK_STR_INDEX
+        _ACTION_2_ID, _RANK_INDEX = ACTION_2_ID, CARD_RANK_STR_INDEX
+        counts = (ACTION_PACKED[:, np.newaxis] >> (4 * np.arange(15))) & 7
+        _ACTION_ENCODINGS = _counts2array(counts)
+        _ACTION_ENCODINGS.setflags(write=False)
+    return _ACTION_ENCODINGS
+
 def _cards2array(cards):
     if cards == 'pass':
         return np.zeros(54, dtype=np.int8)
+    out = np.zeros(54, dtype=np.int8)
+    _fill_cards(out, 0, cards)
+    return out
 
-    matrix = np.zeros([4, 13], dtype=np.int8)
-    jokers = np.zeros(2, dtype=np.int8)
-    counter = Counter(cards)
-    for card, num_times in counter.items():
-        if card == 'B':
-            jokers[0] = 1
-        elif card == 'R':
-            jokers[1] = 1
-        else:
-            matrix[:, Card2Column[card]] = NumOnes2Array[num_times]
-    return np.concatenate((matrix.flatten('F'), jokers))
-
-def _get_one_hot_array(num_left_cards, max_num_cards):
-    one_hot = np.zeros(max_num_cards, dtype=np.int8)
-    one_hot[num_left_cards - 1] = 1
-
-    return one_hot
+def _fill_cards(out, offset, cards):
+    ''' Write the encoding of cards in out at offset, which should be zeros
 
-def _action_seq2array(action_seq_list):
-    action_seq_array = np.zeros((len(action_seq_list), 54), np.int8)
-    for row, cards in enumerate(action_seq_list):
-        action_seq_array[row, :] = _cards2array(cards)
-    action_seq_array = action_seq_array.flatten()
-    return action_seq_array
+    Returns:
+        (int): the offset after the encoding
+    '''
+    if cards and cards != 'pass':
+        encodings = _action_encodings()
+        action_id = _ACTION_2_ID.get(cards)
+        if action_id is not None:
+            out[offset:offset+54] = encodings[action_id]
+        else:
+            counts = [0] * 15
+            for card in cards:
+                counts[_RANK_INDEX[card]] += 1
+            out[offset:offset+52] = _COUNT_ROWS[counts[:13]].reshape(52)
+            out[offset+52] = counts[13] > 0
+            out[offset+53] = counts[14] > 0
+    return offset + 54
+
+def _fill_one_hot(out, offset, num_left_cards, max_num_cards):
+    ''' Write the one-hot encoding of a number of cards in out at offset
+
+    Returns:
+        (int): the offset after the encoding
+    '''
+    out[offset:offset+max_num_cards][num_left_cards - 1] = 1
+    return offset + max_num_cards
 
 def _process_action_seq(sequence, length=9):
     sequence = [action[1] for action in sequence[-length:]]
@@ -1,5 +1,117 @@
+from collections import OrderedDict
+
 from rlcard.utils import *
 
+class LazyState(OrderedDict):
+    ''' A state dictionary whose fields can be computed on first access
+
+    A lazy field is computed by its function when it is read for the first
+    time. Iterating, comparing, copying or pickling the state computes all
+    of its fields first, so it behaves like a plain dictionary.
+    '''
+    def __init__(self, *args, **kwargs):
+        self._lazy_fields = {}
+        self._order = []
+        super().__init__(*args, **kwargs)
+
+    def set_lazy(self, key, compute):
+        ''' Set a field that is computed on first access
+
+        Args:
+            key (str): The name of the field
+            compute (callable): The function computing the value
+        '''
+        if OrderedDict.__contains__(self, key):
+            OrderedDict.__delitem__(self, key)
+            self._order.remove(key)
+        if key not in self._lazy_fields:
+            self._order.append(key)
+        self._lazy_fields[key] = compute
+
+    def materialize(self):
+        ''' Compute all the lazy fields
+
+        Returns:
+            (LazyState): The state itself
+        '''
+        if self._lazy_fields:
+            for key in list(self._lazy_fields):
+                self[key]
+            # Keep the fields in the order they were set
+            for key in self._order:
+                self.move_to_end(key)
+        return self
+
+    def __missing__(self, key):
+        if key not in self._lazy_fields:
+            raise KeyError(key)
+        value = self._lazy_fields.pop(key)()
+        OrderedDict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._order.append(key)
+        self._lazy_fields.pop(key, None)
+        OrderedDict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if self._lazy_fields.pop(key, None) is None:
+            OrderedDict.__delitem__(self, key)
+        self._order.remove(key)
+
+    def __contains__(self, key):
+        return key in self._lazy_fields or OrderedDict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __len__(self):
+        return OrderedDict.__len__(self) + len(self._lazy_fields)
+
+    def __iter__(self):
+        return OrderedDict.__iter__(self.materialize())
+
+    def keys(self):
+        return OrderedDict.keys(self.materialize())
+
+    def values(self):
+        return OrderedDict.values(self.materialize())
+
+    def items(self):
+        return OrderedDict.items(self.materialize())
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return OrderedDict.pop(self, key, *default)
+
+    def clear(self):
+        self._lazy_fields.clear()
+        self._order.clear()
+        OrderedDict.clear(self)
+
+    def copy(self):
+        return LazyState(self.materialize())
+
+    def __eq__(self, other):
+        # OrderedDict reads the items of the other state without __missing__
+        if isinstance(other, LazyState):
+            other.materialize()
+        return OrderedDict.__eq__(self.materialize(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return OrderedDict.__repr__(self.materialize())
+
+    def __reduce__(self):
+        # The functions of the lazy fields may not be picklable
+        return (OrderedDict, (list(self.items()),))
+
 class Env(object):
     '''
     The base Env class. For all the environments in RLCard,
@@ -15,6 +127,11 @@ class Env(object):
                 'seed' (int) - A environment local random seed.
                 'allow_step_back' (boolean) - True if allowing
                  step_back.
+                'state_fields' (list) - The fields of the states needed by
+                 the agents, e.g., ['obs', 'legal_actions']. The other fields
+                 are not extracted. If None, all the fields are extracted.
+                 This is the only way to prune the states: the agents do not
+                 declare the fields they read.
                 There can be some game specific configurations, e.g., the
                 number of players in the game. These fields should start with
                 'game_', e.g., 'game_num_players' which specify the number of
@@ -26,6 +143,7 @@ class Env(object):
         '''
         self.allow_step_back = self.game.allow_step_back = config['allow_step_back']
         self.action_recorder = []
+        self.state_fields = config.get('state_fields')
 
         # Game specific configurations
         # Currently only support blackjack、limit-holdem、no-limit-holdem
@@ -60,7 +178,7 @@ class Env(object):
         '''
         state, player_id = self.game.init_game()
         self.action_recorder = []
-        return self._extract_state(state), player_id
+        return self._get_extracted_state(state), player_id
 
     def step(self, action, raw_action=False):
         ''' Step forward
@@ -83,7 +201,7 @@ class Env(object):
         self.action_recorder.append((self.get_player_id(), action))
         next_state, player_id = self.game.step(action)
 
-        return self._extract_state(next_state), player_id
+        return self._get_extracted_state(next_state), player_id
 
     def step_back(self):
         ''' Take one step backward.
@@ -194,7 +312,42 @@ class Env(object):
         Returns:
             (numpy.array): The observed state of the player
         '''
-        return self._extract_state(self.game.get_state(player_id))
+        return self._get_extracted_state(self.game.get_state(player_id))
+
+    def _get_extracted_state(self, state):
+        ''' Extract the state and drop the fields that are not in `state_fields`.
+            The lazy states already skip these fields in `_set_state_field`,
+            and iterating them would compute their lazy fields.
+
+        Args:
+            state (dict): Original state from the game
+
+        Returns:
+            (dict): The extracted state
+        '''
+        extracted_state = self._extract_state(state)
+        if self.state_fields is not None and not isinstance(extracted_state, LazyState):
+            for key in [key for key in extracted_state if key not in self.state_fields]:
+                del extracted_state[key]
+        return extracted_state
+
+    def _set_state_field(self, extracted_state, key, compute, lazy=True):
+        ''' Set a field of an extracted state if it is in `state_fields`
+
+        Args:
+            extracted_state (LazyState): The extracted state
+            key (str): The name of the field
+            compute (callable): The function computing the value
+            lazy (boolean): True if the value can be computed on first access.
+                It must be False if the value is read from the live game
+                rather than from the raw state
+        '''
+        if self.state_fields is not None and key not in self.state_fields:
+            return
+        if lazy:
+            extracted_state.set_lazy(key, compute)
+        else:
+            extracted_state[key] = compute()
 
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
@@ -5,10 +5,13 @@ from collections import OrderedDict
 
 import rlcard
 from rlcard.envs import Env
+from rlcard.games.limitholdem.equity import EquityCalculator, NUM_FEATURES
+from rlcard.games.limitholdem.evaluator import cards2ids
 from rlcard.games.limitholdem import Game
 
 DEFAULT_GAME_CONFIG = {
         'game_num_players': 2,
+        'game_equity_samples': 0,
         }
 
 class LimitholdemEnv(Env):
@@ -23,7 +26,12 @@ class LimitholdemEnv(Env):
         self.game = Game()
         super().__init__(config)
         self.actions = ['call', 'raise', 'fold', 'check']
-        self.state_shape = [[72] for _ in range(self.num_players)]
+        # Monte Carlo equity and hand strength features are appended to the
+        # observation if 'game_equity_samples' is positive
+        equity_samples = config.get('game_equity_samples', DEFAULT_GAME_CONFIG['game_equity_samples'])
+        self.equity_calculator = EquityCalculator(num_samples=equity_samples) if equity_samples else None
+        obs_size = 72 + (NUM_FEATURES if self.equity_calculator else 0)
+        self.state_shape = [[obs_size] for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
 
         with open(os.path.join(rlcard.__path__[0], 'games/limitholdem/card2index.json'), 'r') as file:
@@ -58,10 +66,12 @@ class LimitholdemEnv(Env):
         raise_nums = state['raise_nums']
         cards = public_cards + hand
         idx = [self.card2index[card] for card in cards]
-        obs = np.zeros(72)
+        obs = np.zeros(self.state_shape[0][0])
         obs[idx] = 1
         for i, num in enumerate(raise_nums):
             obs[52 + i * 5 + num] = 1
+        if self.equity_calculator:
+            obs[-NUM_FEATURES:] = self.equity_calculator.features(cards2ids(hand), cards2ids(public_cards))
         extracted_state['obs'] = obs
 
         extracted_state['raw_obs'] = state
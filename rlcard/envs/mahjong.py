@@ -1,7 +1,7 @@
 import numpy as np
 from collections import OrderedDict
 
-from rlcard.envs import Env
+from rlcard.envs import Env, LazyState
 from rlcard.games.mahjong import Game
 from rlcard.games.mahjong import Card
 from rlcard.games.mahjong.utils import card_encoding_dict, encode_cards, pile2list
@@ -20,7 +20,26 @@ class MahjongEnv(Env):
         self.action_shape = [None for _ in range(self.num_players)]
 
     def _extract_state(self, state):
-        ''' Encode state
+        ''' Encode state. The raw state refers to the hands and piles of the
+            live game, so the fields are extracted at once, but only those
+            needed by the agents
+
+        Args:
+            state (dict): dict of original state
+
+        Returns:
+            (LazyState): The extracted state
+        '''
+        extracted_state = LazyState()
+        self._set_state_field(extracted_state, 'obs', lambda: self._encode_obs(state), lazy=False)
+        self._set_state_field(extracted_state, 'legal_actions', self._get_legal_actions, lazy=False)
+        self._set_state_field(extracted_state, 'raw_obs', lambda: state, lazy=False)
+        self._set_state_field(extracted_state, 'raw_legal_actions', lambda: [a for a in state['action_cards']], lazy=False)
+        self._set_state_field(extracted_state, 'action_record', lambda: self.action_recorder, lazy=False)
+        return extracted_state
+
+    def _encode_obs(self, state):
+        ''' Encode the observation of a state
 
         Args:
             state (dict): dict of original state
@@ -42,13 +61,7 @@ class MahjongEnv(Env):
         rep = [hand_rep, table_rep]
         rep.extend(piles_rep)
         obs = np.array(rep)
-
-        extracted_state = {'obs': obs, 'legal_actions': self._get_legal_actions()}
-        extracted_state['raw_obs'] = state
-        extracted_state['raw_legal_actions'] = [a for a in state['action_cards']]
-        extracted_state['action_record'] = self.action_recorder
-
-        return extracted_state
+        return obs
 
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
@@ -5,11 +5,16 @@ from collections import OrderedDict
 
 import rlcard
 from rlcard.envs import Env
+from rlcard.games.limitholdem.equity import EquityCalculator, NUM_FEATURES
+from rlcard.games.limitholdem.evaluator import cards2ids
 from rlcard.games.nolimitholdem import Game
 from rlcard.games.nolimitholdem.round import Action
+from rlcard.games.nolimitholdem.abstraction import ACTIONS
 
 DEFAULT_GAME_CONFIG = {
         'game_num_players': 2,
+        'game_equity_samples': 0,
+        'game_bet_sizes': None,
         'chips_for_each': 100,
         'dealer_id': None,
         }
@@ -25,8 +30,15 @@ class NolimitholdemEnv(Env):
         self.default_game_config = DEFAULT_GAME_CONFIG
         self.game = Game()
         super().__init__(config)
-        self.actions = Action
-        self.state_shape = [[54] for _ in range(self.num_players)]
+        # The actions are indexed by their ids, which do not depend on the
+        # raise sizes of 'game_bet_sizes'. See `games/nolimitholdem/abstraction.py`
+        self.actions = ACTIONS
+        # Monte Carlo equity and hand strength features are appended to the
+        # observation if 'game_equity_samples' is positive
+        equity_samples = config.get('game_equity_samples', DEFAULT_GAME_CONFIG['game_equity_samples'])
+        self.equity_calculator = EquityCalculator(num_samples=equity_samples) if equity_samples else None
+        obs_size = 54 + (NUM_FEATURES if self.equity_calculator else 0)
+        self.state_shape = [[obs_size] for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
         # for raise_amount in range(1, self.game.init_chips+1):
         #     self.actions.append(raise_amount)
@@ -64,10 +76,12 @@ class NolimitholdemEnv(Env):
         all_chips = state['all_chips']
         cards = public_cards + hand
         idx = [self.card2index[card] for card in cards]
-        obs = np.zeros(54)
+        obs = np.zeros(self.state_shape[0][0])
         obs[idx] = 1
         obs[52] = float(my_chips)
         obs[53] = float(max(all_chips))
+        if self.equity_calculator:
+            obs[-NUM_FEATURES:] = self.equity_calculator.features(cards2ids(hand), cards2ids(public_cards))
         extracted_state['obs'] = obs
 
         extracted_state['raw_obs'] = state
@@ -92,15 +106,19 @@ class NolimitholdemEnv(Env):
 
         Returns:
             action (str): action for the game
+
+        Note: An illegal raise is translated to a legal one of the nearest size, and the
+            other illegal actions, or the raises without a legal one, to check or call
         '''
+        if not 0 <= action_id < self.num_actions:
+            raise ValueError('Action id {} is out of range, there are {} actions'.format(action_id, self.num_actions))
         legal_actions = self.game.get_legal_actions()
-        if self.actions(action_id) not in legal_actions:
-            if Action.CHECK in legal_actions:
-                return Action.CHECK
-            else:
-                print("Tried non legal action", action_id, self.actions(action_id), legal_actions)
-                return Action.FOLD
-        return self.actions(action_id)
+        action = self.actions[action_id]
+        if action in legal_actions:
+            return action
+        if action != Action.FOLD and action != Action.CHECK_CALL:
+            return self.game.translate_bet(self.game.round.get_raise_amount(self.game.players, action))
+        return Action.CHECK_CALL
 
     def get_perfect_information(self):
         ''' Get the perfect information of the current state
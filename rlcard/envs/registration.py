@@ -4,6 +4,7 @@ import importlib
 DEFAULT_CONFIG = {
         'allow_step_back': False,
         'seed': None,
+        'state_fields': None,
         }
 
 class EnvSpec(object):
@@ -87,3 +88,22 @@ def make(env_id, config={}):
         _config[key] = config[key]
 
     return registry.make(env_id, _config)
+
+def make_vec(env_id, num_envs=1, config={}):
+    ''' Create a vectorized environment that steps several games together
+
+    Args:
+        env_id (string): The name of the environment
+        num_envs (int): The number of environments
+        config (dict): A dictionary of the environment settings. If a seed is
+            given, the i-th environment is seeded with seed + i.
+    '''
+    from rlcard.envs.vec_env import VectorEnv
+
+    envs = []
+    for i in range(num_envs):
+        _config = dict(config)
+        if _config.get('seed') is not None:
+            _config['seed'] = _config['seed'] + i
+        envs.append(make(env_id, _config))
+    return VectorEnv(envs)
@@ -1,7 +1,7 @@
 import numpy as np
 from collections import OrderedDict
 
-from rlcard.envs import Env
+from rlcard.envs import Env, LazyState
 from rlcard.games.uno import Game
 from rlcard.games.uno.utils import encode_hand, encode_target
 from rlcard.games.uno.utils import ACTION_SPACE, ACTION_LIST
@@ -22,15 +22,22 @@ class UnoEnv(Env):
         self.action_shape = [None for _ in range(self.num_players)]
 
     def _extract_state(self, state):
+        # The raw state is a copy, so the observation can be encoded later
+        extracted_state = LazyState()
+        self._set_state_field(extracted_state, 'obs', lambda: self._encode_obs(state))
+        self._set_state_field(extracted_state, 'legal_actions', self._get_legal_actions, lazy=False)
+        self._set_state_field(extracted_state, 'raw_obs', lambda: state)
+        self._set_state_field(extracted_state, 'raw_legal_actions', lambda: [a for a in state['legal_actions']])
+        action_recorder = self.action_recorder
+        self._set_state_field(extracted_state, 'action_record', lambda: action_recorder)
+        return extracted_state
+
+    @staticmethod
+    def _encode_obs(state):
         obs = np.zeros((4, 4, 15), dtype=int)
         encode_hand(obs[:3], state['hand'])
         encode_target(obs[3], state['target'])
-        legal_action_id = self._get_legal_actions()
-        extracted_state = {'obs': obs, 'legal_actions': legal_action_id}
-        extracted_state['raw_obs'] = state
-        extracted_state['raw_legal_actions'] = [a for a in state['legal_actions']]
-        extracted_state['action_record'] = self.action_recorder
-        return extracted_state
+        return obs
 
     def get_payoffs(self):
 
@@ -0,0 +1,219 @@
+''' Vectorized environment that steps several independent games together
+'''
+import numpy as np
+
+class VectorEnv(object):
+    '''
+    The VectorEnv class holds `num_envs` independent copies of an environment
+    and steps them together. Observations are stacked into one array and the
+    legal actions are returned as a padded boolean mask so that agents can
+    evaluate the whole batch with a single forward pass.
+    '''
+    def __init__(self, envs):
+        ''' Initialize the vectorized environment
+
+        Args:
+            envs (list): A list of Env instances of the same game. They are
+                usually created by `rlcard.make_vec`.
+        '''
+        if len(envs) == 0:
+            raise ValueError('VectorEnv needs at least one environment')
+        self.envs = envs
+        self.num_envs = len(envs)
+        self.name = envs[0].name
+        self.num_players = envs[0].num_players
+        self.num_actions = envs[0].num_actions
+        self.state_shape = getattr(envs[0], 'state_shape', None)
+        self.action_shape = getattr(envs[0], 'action_shape', None)
+        self._obs_shape = self._get_obs_shape()
+
+        self.player_ids = np.zeros(self.num_envs, dtype=np.int64)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+        self.payoffs = np.zeros((self.num_envs, self.num_players), dtype=np.float32)
+        self.states = [None for _ in range(self.num_envs)]
+
+    def _get_obs_shape(self):
+        ''' Get the shape of a single stacked observation. If the players of
+            the game observe states of different shapes (e.g., Dou Dizhu),
+            the observations are flattened and zero-padded to the largest one.
+
+        Returns:
+            (tuple): The shape of one row of the stacked observations
+        '''
+        if self.state_shape is None:
+            return None
+        shapes = [tuple(shape) for shape in self.state_shape]
+        if all(shape == shapes[0] for shape in shapes):
+            return shapes[0]
+        return (max(int(np.prod(shape)) for shape in shapes),)
+
+    def reset(self):
+        ''' Start a new game in every environment
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The batched states, see `_batch_states`
+                (numpy.array): The current player of each environment
+        '''
+        for i, env in enumerate(self.envs):
+            self.states[i], self.player_ids[i] = env.reset()
+        self.dones[:] = False
+        self.payoffs[:] = 0
+        return self._batch_states(), self.player_ids.copy()
+
+    def step(self, actions, raw_action=False):
+        ''' Step forward all the environments that are not over. The actions
+            of finished environments are ignored; call `reset` to start new games.
+
+        Args:
+            actions (list): The action taken in each environment
+            raw_action (boolean or list): True if the actions are raw actions. A list
+                gives the flag for each environment separately.
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The batched next states
+                (numpy.array): The ID of the next player of each environment
+                (numpy.array): Boolean array, True if the game is over
+                (numpy.array): The payoffs of the finished games, (num_envs, num_players)
+        '''
+        if isinstance(raw_action, bool):
+            raw_action = [raw_action] * self.num_envs
+        for i, env in enumerate(self.envs):
+            if self.dones[i]:
+                continue
+            self.states[i], self.player_ids[i] = env.step(actions[i], raw_action[i])
+            if env.is_over():
+                self.dones[i] = True
+                self.payoffs[i] = env.get_payoffs()
+        return self._batch_states(), self.player_ids.copy(), self.dones.copy(), self.payoffs.copy()
+
+    def _batch_states(self):
+        ''' Stack the current states of all the environments
+
+        Returns:
+            (dict): A dictionary containing:
+                'obs' (numpy.array): The stacked observations, (num_envs, *obs_shape).
+                    Rows of finished environments are zeros.
+                'legal_actions_mask' (numpy.array): Boolean mask of the legal
+                    actions, (num_envs, num_actions)
+                'states' (list): The original state dictionaries, which are
+                    needed by the agents that use action features or raw states
+        '''
+        if self._obs_shape is None:
+            self._obs_shape = np.asarray(self.states[0]['obs']).shape
+        obs = np.zeros((self.num_envs,) + self._obs_shape, dtype=np.float32)
+        mask = np.zeros((self.num_envs, self.num_actions), dtype=bool)
+        for i, state in enumerate(self.states):
+            if self.dones[i]:
+                continue
+            _obs = np.asarray(state['obs'])
+            if _obs.shape == self._obs_shape:
+                obs[i] = _obs
+            else:
+                _obs = _obs.flatten()
+                obs[i, :_obs.size] = _obs
+            mask[i, list(state['legal_actions'].keys())] = True
+        return {'obs': obs, 'legal_actions_mask': mask, 'states': list(self.states)}
+
+    def set_agents(self, agents):
+        '''
+        Set the agents that will interact with the environments.
+        This function must be called before `run`.
+
+        Args:
+            agents (list): List of Agent classes
+        '''
+        self.agents = agents
+        for env in self.envs:
+            env.set_agents(agents)
+
+    def run(self, is_training=False):
+        '''
+        Run a complete game in every environment. At each step, the decisions
+        of the same agent are gathered across environments and made with one
+        call to `step_batch`/`eval_step_batch` if the agent provides them.
+
+        Args:
+            is_training (boolean): True if for training purpose.
+
+        Returns:
+            (tuple) Tuple containing:
+
+                (list): A list of trajectories, one for each environment. See `Env.run`.
+                (list): A list of payoffs, one for each environment.
+        '''
+        trajectories = [[[] for _ in range(self.num_players)] for _ in range(self.num_envs)]
+        self.reset()
+        for i in range(self.num_envs):
+            trajectories[i][self.player_ids[i]].append(self.states[i])
+
+        actions = [None for _ in range(self.num_envs)]
+        while not self.dones.all():
+            for player_id in range(self.num_players):
+                indices = [i for i in range(self.num_envs) if not self.dones[i] and self.player_ids[i] == player_id]
+                if not indices:
+                    continue
+                for i, action in zip(indices, self._agent_actions(self.agents[player_id], [self.states[i] for i in indices], is_training)):
+                    actions[i] = action
+
+            active = ~self.dones
+            current_players = self.player_ids.copy()
+            self.step(actions, [self.agents[player_id].use_raw for player_id in current_players])
+            for i in np.flatnonzero(active):
+                trajectories[i][current_players[i]].append(actions[i])
+                if not self.envs[i].game.is_over():
+                    trajectories[i][self.player_ids[i]].append(self.states[i])
+
+        for i, env in enumerate(self.envs):
+            for player_id in range(self.num_players):
+                trajectories[i][player_id].append(env.get_state(player_id))
+
+        return trajectories, [env.get_payoffs() for env in self.envs]
+
+    @staticmethod
+    def _agent_actions(agent, states, is_training):
+        ''' Get the actions of one agent for a list of states
+
+        Args:
+            agent (object): The agent
+            states (list): A list of state dictionaries
+            is_training (boolean): True if for training purpose
+
+        Returns:
+            (list): The actions
+        '''
+        if is_training:
+            if hasattr(agent, 'step_batch'):
+                return list(agent.step_batch(states))
+            return [agent.step(state) for state in states]
+        if hasattr(agent, 'eval_step_batch'):
+            return list(agent.eval_step_batch(states)[0])
+        return [agent.eval_step(state)[0] for state in states]
+
+    def is_over(self):
+        ''' Check whether all the games are over
+
+        Returns:
+            (boolean): True if all the games are over
+        '''
+        return bool(self.dones.all())
+
+    def get_payoffs(self):
+        ''' Get the payoffs of all the environments
+
+        Returns:
+            (numpy.array): The payoffs, (num_envs, num_players)
+        '''
+        return np.array([env.get_payoffs() for env in self.envs])
+
+    def seed(self, seed=None):
+        ''' Seed the environments with consecutive seeds starting from `seed`
+
+        Args:
+            seed (int): The base seed
+        '''
+        for i, env in enumerate(self.envs):
+            env.seed(None if seed is None else seed + i)
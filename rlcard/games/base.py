@@ -50,3 +50,94 @@ class Card:
             string: the combination of suit and rank of a card. Eg: 1S, 2H, AD, BJ, RJ...
         '''
         return self.suit+self.rank
+
+class UndoLog:
+    '''
+    UndoLog records how to revert the changes made to a game, so that the game
+    can step back without keeping a deep copy of the whole game for every step.
+
+    Before a step, the game calls `checkpoint` and records the fields that the
+    step may change with `save`, `save_items` or `call`. `undo` reverts all the
+    records made since the last checkpoint, in reverse order. Only references
+    are saved, so the cost of a step is proportional to the number of recorded
+    fields instead of the size of the game.
+
+    Note:
+        Objects held in the recorded fields are not copied. A step that changes
+        an object in place must record the changed fields of that object too.
+    '''
+
+    def __init__(self):
+        self._records = []
+        self._checkpoints = []
+
+    def __len__(self):
+        ''' Get the number of steps that can be undone
+        '''
+        return len(self._checkpoints)
+
+    def clear(self):
+        ''' Remove all the records
+        '''
+        self._records = []
+        self._checkpoints = []
+
+    def checkpoint(self):
+        ''' Start recording a new step
+        '''
+        self._checkpoints.append(len(self._records))
+
+    def save(self, obj, *names):
+        ''' Record the current value of some attributes of an object. If an
+            attribute is a list, its items are recorded as well, so changes made
+            to the list in place are also reverted.
+
+        Args:
+            obj (object): The object
+            names (str): The names of the attributes
+        '''
+        for name in names:
+            value = getattr(obj, name)
+            items = list(value) if isinstance(value, list) else None
+            self._records.append((self._restore_attr, (obj, name, value, items)))
+
+    def save_items(self, items):
+        ''' Record the items of a list, which are restored in place
+
+        Args:
+            items (list): The list
+        '''
+        self._records.append((self._restore_items, (items, list(items))))
+
+    def call(self, func, *args):
+        ''' Record a function that reverts a change
+
+        Args:
+            func (callable): The function, which is called with args on undo
+            args: The arguments of the function
+        '''
+        self._records.append((func, args))
+
+    def undo(self):
+        ''' Revert the changes recorded since the last checkpoint
+
+        Returns:
+            (bool): True if there was a step to undo
+        '''
+        if not self._checkpoints:
+            return False
+        start = self._checkpoints.pop()
+        while len(self._records) > start:
+            func, args = self._records.pop()
+            func(*args)
+        return True
+
+    @staticmethod
+    def _restore_attr(obj, name, value, items):
+        if items is not None:
+            value[:] = items
+        setattr(obj, name, value)
+
+    @staticmethod
+    def _restore_items(items, saved):
+        items[:] = saved
@@ -3,3 +3,4 @@ from rlcard.games.blackjack.judger import BlackjackJudger as Judger
 from rlcard.games.blackjack.player import BlackjackPlayer as Player
 from rlcard.games.blackjack.game import BlackjackGame as Game
 
+from rlcard.games.blackjack.evaluator import BlackjackEvaluator as Evaluator
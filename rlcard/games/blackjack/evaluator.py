@@ -0,0 +1,217 @@
+''' Exact expected payoffs of blackjack policies
+
+Instead of sampling games, the chance nodes of the game are enumerated with
+the composition of the shoe: the number of cards of each rank left. The
+ranks are the ace, 2 to 9, and the ten-valued cards, and an infinite shoe
+(`game_num_decks` = 0) keeps the composition of one deck.
+
+The hole card of the dealer is drawn before the player acts, but the player
+never sees it, so it can be drawn from the shoe left after the player's
+turn without changing the probabilities. The outcomes of the dealer then
+only depend on the up card and on the shoe, and their distributions are
+memoized across hands and policies.
+
+The evaluation follows the rules of `BlackjackGame` with one player: the
+dealer draws to 17, aces count 11 unless the hand would bust, and the
+payoffs are 1, 0 and -1 as in `BlackjackEnv.get_payoffs`.
+'''
+import numbers
+
+RANK_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+RANKS = {'A': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6, '8': 7, '9': 8, 'T': 9, 'J': 9, 'Q': 9, 'K': 9}
+ACTIONS = ('hit', 'stand')
+
+# The outcomes of the dealer: the final scores 17 to 21, then bust
+DEALER_OUTCOMES = (17, 18, 19, 20, 21, 'bust')
+
+def _add(hand, rank):
+    ''' Add a card to a hand given by its hard total and whether it has an ace
+    '''
+    hard, ace = hand
+    return hard + (1 if rank == 0 else RANK_VALUES[rank]), ace or rank == 0
+
+def _score(hand):
+    hard, ace = hand
+    return hard + 10 if ace and hard + 10 <= 21 else hard
+
+class BlackjackEvaluator:
+    ''' Compute the exact expected payoffs of policy tables of blackjack
+    '''
+    def __init__(self, num_decks=1):
+        ''' Initialize the evaluator
+
+        Args:
+            num_decks (int): The number of decks of the shoe, 0 for an infinite shoe
+        '''
+        if num_decks < 0:
+            raise ValueError('The number of decks should not be negative')
+        self.num_decks = num_decks
+        self.shoe = tuple([4 * max(num_decks, 1)] * 9 + [16 * max(num_decks, 1)])
+        self._weights = [1]
+        for count in self.shoe[:-1]:
+            self._weights.append(self._weights[-1] * (count + 1))
+        self._dealer_cache = {}
+
+    def _draws(self, shoe):
+        ''' Enumerate the next card of a shoe
+
+        Args:
+            shoe (tuple): The number of cards of each rank
+
+        Returns:
+            (list): The rank, probability and shoe left of each card
+        '''
+        total = sum(shoe)
+        draws = []
+        for rank, count in enumerate(shoe):
+            if count:
+                left = shoe if self.num_decks == 0 else shoe[:rank] + (count - 1,) + shoe[rank + 1:]
+                draws.append((rank, count / total, left))
+        return draws
+
+    def remove_cards(self, cards, shoe=None):
+        ''' Remove dealt cards from a shoe
+
+        Args:
+            cards (list): The cards, e.g. ['SA', 'HT']
+            shoe (tuple): The shoe, the full shoe if None
+
+        Returns:
+            (tuple): The shoe left
+        '''
+        shoe = list(self.shoe if shoe is None else shoe)
+        if self.num_decks != 0:
+            for card in cards:
+                shoe[RANKS[card[1]]] -= 1
+                if shoe[RANKS[card[1]]] < 0:
+                    raise ValueError('The card {} is not in the shoe'.format(card))
+        return tuple(shoe)
+
+    def _code(self, shoe):
+        ''' Pack a shoe into an integer, in the mixed radix of the full shoe
+        '''
+        return sum(count * weight for count, weight in zip(shoe, self._weights))
+
+    def dealer_distribution(self, upcard, shoe):
+        ''' Get the distribution of the outcomes of the dealer
+
+        Args:
+            upcard (int): The rank of the up card, 0 for the ace to 9 for the ten-valued cards
+            shoe (tuple): The shoe left, from which the hole card and the next cards are drawn
+
+        Returns:
+            (list): The probabilities of the outcomes, in the order of `DEALER_OUTCOMES`
+        '''
+        hard, ace = _add((0, False), upcard)
+        return self._dealer(hard, ace, shoe, self._code(shoe))
+
+    def _dealer(self, hard, ace, shoe, code):
+        # The hard total is at most 26, so it fits in 5 bits
+        key = code << 6 | hard << 1 | ace
+        distribution = self._dealer_cache.get(key)
+        if distribution is not None:
+            return distribution
+        distribution = [0.0] * len(DEALER_OUTCOMES)
+        total = sum(shoe)
+        for rank, count in enumerate(shoe):
+            if not count:
+                continue
+            p = count / total
+            next_hard = hard + (1 if rank == 0 else RANK_VALUES[rank])
+            next_ace = ace or rank == 0
+            score = next_hard + 10 if next_ace and next_hard + 10 <= 21 else next_hard
+            # Resolve the final hands here rather than in a call
+            if score > 21:
+                distribution[-1] += p
+            elif score >= 17:
+                distribution[score - 17] += p
+            else:
+                if self.num_decks == 0:
+                    left, left_code = shoe, code
+                else:
+                    left, left_code = shoe[:rank] + (count - 1,) + shoe[rank + 1:], code - self._weights[rank]
+                for i, q in enumerate(self._dealer(next_hard, next_ace, left, left_code)):
+                    distribution[i] += p * q
+        self._dealer_cache[key] = distribution
+        return distribution
+
+    def _stand(self, score, upcard, shoe):
+        ''' Get the expected payoff of standing on a score
+        '''
+        distribution = self.dealer_distribution(upcard, shoe)
+        value = distribution[-1]
+        for outcome, p in zip(DEALER_OUTCOMES[:-1], distribution):
+            if score > outcome:
+                value += p
+            elif score < outcome:
+                value -= p
+        return value
+
+    @staticmethod
+    def _action(policy, score, upcard):
+        key = (score, RANK_VALUES[upcard])
+        if key not in policy:
+            raise ValueError('The policy has no action for the observation {}'.format(key))
+        action = policy[key]
+        # The ids can be numpy integers, e.g. from np.argmax
+        if isinstance(action, numbers.Integral) and 0 <= action < len(ACTIONS):
+            return ACTIONS[int(action)]
+        if action not in ACTIONS:
+            raise ValueError('Unknown action {!r} for the observation {}, the actions are {}'.format(action, key, ACTIONS))
+        return action
+
+    def _player(self, hand, upcard, shoe, policy, cache):
+        key = (hand, shoe)
+        if key in cache:
+            return cache[key]
+        score = _score(hand)
+        if self._action(policy, score, upcard) == 'stand':
+            value = self._stand(score, upcard, shoe)
+        else:
+            value = 0.0
+            for rank, p, left in self._draws(shoe):
+                next_hand = _add(hand, rank)
+                value += p * (-1.0 if _score(next_hand) > 21 else self._player(next_hand, upcard, left, policy, cache))
+        cache[key] = value
+        return value
+
+    def evaluate_hand(self, hand, upcard, policy, shoe=None):
+        ''' Get the expected payoff of a policy from a dealt hand
+
+        Args:
+            hand (list): The cards of the player, e.g. ['SA', 'H7']
+            upcard (str): The up card of the dealer, e.g. 'DT'
+            policy (dict): The action, 'hit' or 'stand' or their ids in `BlackjackEnv`, of each
+                observation of `BlackjackEnv`: the score of the player and the score of the up card
+            shoe (tuple): The shoe before the hand is dealt, the full shoe if None
+
+        Returns:
+            (float): The expected payoff
+        '''
+        shoe = self.remove_cards(list(hand) + [upcard], shoe)
+        player_hand = (0, False)
+        for card in hand:
+            player_hand = _add(player_hand, RANKS[card[1]])
+        if _score(player_hand) > 21:
+            return -1.0
+        return self._player(player_hand, RANKS[upcard[1]], shoe, policy, {})
+
+    def evaluate(self, policy):
+        ''' Get the expected payoff of a policy over all the deals
+
+        Args:
+            policy (dict): The action, 'hit' or 'stand' or their ids in `BlackjackEnv`, of each
+                observation of `BlackjackEnv`: the score of the player and the score of the up card
+
+        Returns:
+            (float): The expected payoff
+        '''
+        cache = {}
+        value = 0.0
+        # The two cards of the player, then the up card, as the order does not matter
+        for first, p1, shoe1 in self._draws(self.shoe):
+            for second, p2, shoe2 in self._draws(shoe1):
+                hand = _add(_add((0, False), first), second)
+                for upcard, p3, shoe3 in self._draws(shoe2):
+                    value += p1 * p2 * p3 * self._player(hand, upcard, shoe3, policy, cache.setdefault(upcard, {}))
+        return value
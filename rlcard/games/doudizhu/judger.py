@@ -3,11 +3,32 @@
 '''
 import numpy as np
 import collections
+from functools import lru_cache
 from itertools import combinations
 from bisect import bisect_left
 
 from rlcard.games.doudizhu.utils import CARD_RANK_STR, CARD_RANK_STR_INDEX
-from rlcard.games.doudizhu.utils import cards2str, contains_cards
+from rlcard.games.doudizhu.utils import cards2str, cards2packed
+from rlcard.games.doudizhu.utils import ID_2_ACTION, ACTION_PACKED, _GUARD_BITS
+
+# The cards of all the actions but 'pass'
+_ACTIONS = np.array(ID_2_ACTION[:-1])
+_ACTIONS_PACKED = ACTION_PACKED[:-1]
+
+# The actions which need at least c cards of the rank r are _ACTIONS_NEEDING[r][c]
+_ACTIONS_NEEDING = []
+for _rank in range(15):
+    _counts = (_ACTIONS_PACKED >> (4 * _rank)) & 7
+    _ACTIONS_NEEDING.append([frozenset(_ACTIONS[_counts >= _count].tolist()) for _count in range(5)])
+
+@lru_cache(maxsize=4096)
+def _playable_cards(packed_hand):
+    ''' Get the actions a packed hand contains. The action space holds exactly
+    the legal combinations, so the playable cards are the actions the hand contains.
+    '''
+    guarded = packed_hand | _GUARD_BITS
+    contained = ((guarded - _ACTIONS_PACKED) & _GUARD_BITS) == _GUARD_BITS
+    return frozenset(_ACTIONS[contained].tolist())
 
 
 
@@ -122,7 +143,18 @@ class DoudizhuJudger:
         
     @staticmethod
     def playable_cards_from_hand(current_hand):
-        ''' Get playable cards from hand
+        ''' Get playable cards from hand. The results are cached per hand and
+        shared by all the games of the process.
+
+        Returns:
+            set: set of string of playable cards
+        '''
+        return set(_playable_cards(cards2packed(current_hand)))
+
+    @staticmethod
+    def enumerate_playable_cards(current_hand):
+        ''' Get playable cards from hand by enumerating the combinations of
+        every type. It is the reference of playable_cards_from_hand.
 
         Returns:
             set: set of string of playable cards
@@ -262,14 +294,19 @@ class DoudizhuJudger:
         '''
         self.playable_cards = [set() for _ in range(3)]
         self._recorded_removed_playable_cards = [[] for _ in range(3)]
+        # The packed hands the playable cards were computed for
+        self._packed_hands = [0 for _ in range(3)]
+        self._recorded_packed_hands = [[] for _ in range(3)]
         for player in players:
             player_id = player.player_id
             current_hand = cards2str(player.current_hand)
             self.playable_cards[player_id] = self.playable_cards_from_hand(current_hand)
+            self._packed_hands[player_id] = cards2packed(current_hand)
 
     def calc_playable_cards(self, player):
         ''' Recalculate all legal cards the player can play according to his
-        current hand.
+        current hand. Only the cards needing more cards of a rank than the
+        hand has left are removed.
 
         Args:
             player (DoudizhuPlayer object): object of DoudizhuPlayer
@@ -279,33 +316,22 @@ class DoudizhuJudger:
         Returns:
             list: list of string of playable cards
         '''
-        removed_playable_cards = []
-
         player_id = player.player_id
-        current_hand = cards2str(player.current_hand)
-        missed = None
-        for single in player.singles:
-            if single not in current_hand:
-                missed = single
-                break
-
-        playable_cards = self.playable_cards[player_id].copy()
-
-        if missed is not None:
-            position = player.singles.find(missed)
-            player.singles = player.singles[position+1:]
-            for cards in playable_cards:
-                if missed in cards or (not contains_cards(current_hand, cards)):
-                    removed_playable_cards.append(cards)
-                    self.playable_cards[player_id].remove(cards)
-        else:
-            for cards in playable_cards:
-                if not contains_cards(current_hand, cards):
-                    #del self.playable_cards[player_id][cards]
-                    removed_playable_cards.append(cards)
-                    self.playable_cards[player_id].remove(cards)
+        playable_cards = self.playable_cards[player_id]
+        old_hand = self._packed_hands[player_id]
+        new_hand = cards2packed(cards2str(player.current_hand))
+
+        removed_playable_cards = set()
+        for rank in range(15):
+            count = (new_hand >> (4 * rank)) & 7
+            if count < (old_hand >> (4 * rank)) & 7:
+                removed_playable_cards |= playable_cards & _ACTIONS_NEEDING[rank][count + 1]
+        playable_cards -= removed_playable_cards
+
+        self._packed_hands[player_id] = new_hand
+        self._recorded_packed_hands[player_id].append(old_hand)
         self._recorded_removed_playable_cards[player_id].append(removed_playable_cards)
-        return self.playable_cards[player_id]
+        return playable_cards
 
     def restore_playable_cards(self, player_id):
         ''' restore playable_cards for judger for game.step_back().
@@ -315,6 +341,7 @@ class DoudizhuJudger:
         '''
         removed_playable_cards = self._recorded_removed_playable_cards[player_id].pop()
         self.playable_cards[player_id].update(removed_playable_cards)
+        self._packed_hands[player_id] = self._recorded_packed_hands[player_id].pop()
 
     def get_playable_cards(self, player):
         ''' Provide all legal cards the player can play according to his
@@ -5,6 +5,9 @@ import json
 from collections import OrderedDict
 import threading
 import collections
+from functools import lru_cache
+
+import numpy as np
 
 import rlcard
 
@@ -53,6 +56,41 @@ INDEX = {'3': 0, '4': 1, '5': 2, '6': 3, '7': 4,
 INDEX = OrderedDict(sorted(INDEX.items(), key=lambda t: t[1]))
 
 
+# Cards are packed into an integer with the number of cards of each rank in
+# a field of 4 bits. The counts are at most 4, so the high bit of every field
+# is free. It is set in the hand before subtracting some cards, and the hand
+# contains the cards if no field borrows it.
+_RANK_UNIT = {card: 1 << (4 * index) for card, index in CARD_RANK_STR_INDEX.items()}
+_GUARD_BITS = sum(8 << (4 * index) for index in range(15))
+
+def cards2packed(cards):
+    ''' Pack the number of cards of each rank into an integer
+
+    Args:
+        cards (str): string of cards. Eg: '56888TTQKKKAA222R'
+
+    Returns:
+        int: the number of cards of the rank i in the bits 4i to 4i+2
+    '''
+    packed = 0
+    for card in cards:
+        packed += _RANK_UNIT[card]
+    return packed
+
+# The packed cards of every action, 'pass' has no card
+ACTION_PACKED = np.array([cards2packed(action) if action != 'pass' else 0 for action in ID_2_ACTION], dtype=np.int64)
+
+# The weights (ascending) and the action ids of the cards of each type
+TYPE_ACTIONS = {}
+for _card_type, _candidate in TYPE_CARD.items():
+    _weights, _ids = [], []
+    for _weight, _cards_list in _candidate.items():
+        for _cards in _cards_list:
+            _weights.append(int(_weight))
+            _ids.append(ACTION_2_ID[_cards])
+    TYPE_ACTIONS[_card_type] = (np.array(_weights), np.array(_ids, dtype=np.int64))
+
+
 def doudizhu_sort_str(card_1, card_2):
     ''' Compare the rank of two cards of str representation
 
@@ -236,27 +274,41 @@ def get_gt_cards(player, greater_player):
     Note:
         1. return value contains 'pass'
     '''
+    current_hand = _GUARD_BITS
+    for card in player.current_hand:
+        current_hand += _RANK_UNIT[card.rank or card.suit[0]]
     # add 'pass' to legal actions
     gt_cards = ['pass']
-    current_hand = cards2str(player.current_hand)
-    target_cards = greater_player.played_cards
-    target_types = CARD_TYPE[0][target_cards]
+    gt_cards.extend([cards for cards, packed in _gt_candidates(greater_player.played_cards)
+                     if (current_hand - packed) & _GUARD_BITS == _GUARD_BITS])
+    return gt_cards
+
+
+@lru_cache(maxsize=4096)
+def _gt_candidates(target_cards):
+    ''' Get the actions which are greater than some cards, whatever the hand
+
+    Args:
+        target_cards (str): the cards to beat
+
+    Returns:
+        tuple: the cards and packed cards of the actions in the order of
+    TYPE_CARD without duplicates
+    '''
     type_dict = {}
-    for card_type, weight in target_types:
+    for card_type, weight in CARD_TYPE[0][target_cards]:
         if card_type not in type_dict:
             type_dict[card_type] = weight
-    if 'rocket' in type_dict:
-        return gt_cards
-    type_dict['rocket'] = -1
-    if 'bomb' not in type_dict:
-        type_dict['bomb'] = -1
-    for card_type, weight in type_dict.items():
-        candidate = TYPE_CARD[card_type]
-        for can_weight, cards_list in candidate.items():
-            if int(can_weight) > int(weight):
-                for cards in cards_list:
-                    # TODO: improve efficiency
-                    if cards not in gt_cards and contains_cards(current_hand, cards):
-                        # if self.contains_cards(current_hand, cards):
-                        gt_cards.append(cards)
-    return gt_cards
+    ids = []
+    if 'rocket' not in type_dict:
+        type_dict['rocket'] = -1
+        if 'bomb' not in type_dict:
+            type_dict['bomb'] = -1
+        for card_type, weight in type_dict.items():
+            weights, type_ids = TYPE_ACTIONS[card_type]
+            ids.append(type_ids[np.searchsorted(weights, int(weight), side='right'):])
+    ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    # The same cards may belong to several types
+    _, first = np.unique(ids, return_index=True)
+    ids = ids[np.sort(first)]
+    return tuple((ID_2_ACTION[i], int(ACTION_PACKED[i])) for i in ids)
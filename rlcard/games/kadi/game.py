@@ -2,9 +2,9 @@
 Main game module for Kadi game
 """
 
-from copy import deepcopy
 import numpy as np
 
+from rlcard.games.base import UndoLog
 from rlcard.games.kadi.card import KadiCard
 from rlcard.games.kadi.player import KadiPlayer
 from rlcard.games.kadi.dealer import KadiDealer
@@ -28,7 +28,7 @@ class KadiGame:
         self.np_random = np.random.RandomState()
         self.num_players = max(2, min(5, num_players))  # Limit to 2-5 players
         self.payoffs = [0] * self.num_players
-        self.history = []
+        self.history = UndoLog()
     
     def configure(self, game_config):
         """
@@ -88,7 +88,7 @@ class KadiGame:
             player.kadi_announced = False
             player.can_win_next_round = False
         
-        self.history = []
+        self.history = UndoLog()
         
         return self.get_state(self.current_player), self.current_player
     
@@ -125,20 +125,14 @@ class KadiGame:
         return self.get_state(self.current_player), self.current_player
     
     def _save_history(self):
-        """Save current game state for step_back"""
-        state = {
-            'dealer': deepcopy(self.dealer),
-            'players': deepcopy(self.players),
-            'current_player': self.current_player,
-            'direction': self.direction,
-            'declared_suit': self.declared_suit,
-            'current_penalty': self.current_penalty,
-            'penalty_suit': self.penalty_suit,
-            'last_played_card': self.last_played_card,
-            'game_is_over': self.game_is_over,
-            'winner': self.winner,
-        }
-        self.history.append(state)
+        """Record the fields that the next step may change for step_back"""
+        self.history.checkpoint()
+        self.history.save(self, 'current_player', 'direction', 'declared_suit', 'current_penalty',
+                          'penalty_suit', 'last_played_card', 'game_is_over', 'winner',
+                          'previous_player', 'waiting_for_suit_call')
+        self.history.save(self.dealer, 'deck', 'discard_pile')
+        for player in self.players:
+            self.history.save(player, 'hand', 'status', 'kadi_announced', 'can_win_next_round')
     
     def _handle_draw(self):
         """Handle player drawing a card"""
@@ -385,22 +379,7 @@ class KadiGame:
         Returns:
             (bool): True if successful
         """
-        if not self.history:
-            return False
-        
-        state = self.history.pop()
-        self.dealer = state['dealer']
-        self.players = state['players']
-        self.current_player = state['current_player']
-        self.direction = state['direction']
-        self.declared_suit = state['declared_suit']
-        self.current_penalty = state['current_penalty']
-        self.penalty_suit = state['penalty_suit']
-        self.last_played_card = state['last_played_card']
-        self.game_is_over = state['game_is_over']
-        self.winner = state['winner']
-        
-        return True
+        return self.history.undo()
     
     def is_game_over(self):
         """Check if game is over"""
@@ -0,0 +1,245 @@
+''' Card abstraction of hold'em for the info sets of CFR
+
+Without bucket tables, the cards of an info set are canonicalized under
+suit isomorphism, which is lossless: the suit permutations of a hand share
+one info set. With bucket tables, the cards are replaced by a bucket of
+hands with similar equity distributions, which is lossy but shrinks the
+number of info sets by orders of magnitude.
+
+The hands of each street are clustered by k-means on their equity
+histograms, the distributions of their equity against a random opponent
+over the rollouts of the next public cards. The distance between two
+histograms is the earth mover's distance, which is the L1 distance between
+their cumulative distributions in one dimension. The preflop table covers
+all the 169 canonical hands, the tables of the later streets cover sampled
+hands and the other hands are assigned to the nearest centroid.
+
+The tables are built once by `CardAbstraction.build` and memory-mapped
+when they are loaded.
+'''
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from rlcard.games.limitholdem.equity import canonicalize
+from rlcard.games.limitholdem.evaluator import cards2ids, evaluate_hands
+
+STREETS = {0: 0, 3: 1, 4: 2, 5: 3}
+
+def _pack(hole, board):
+    ''' Pack canonical cards of a street into an integer key
+    '''
+    key = hole[0] * 52 + hole[1]
+    for k in range(5):
+        key = key * 53 + (board[k] + 1 if k < len(board) else 0)
+    return key
+
+def equity_histogram(hole, board, num_bins=10, num_runouts=32, num_samples=64, np_random=None):
+    ''' Estimate the distribution of the equity of a hand over the rollouts
+        of the missing public cards
+
+    Args:
+        hole (list): The ids of the two hole cards
+        board (list): The ids of the public cards
+        num_bins (int): The number of bins of the histogram
+        num_runouts (int): The number of rollouts of the public cards
+        num_samples (int): The number of hands of the opponent for each rollout
+        np_random (numpy.random.RandomState): The random generator
+
+    Returns:
+        (numpy.array): The histogram, which sums to one
+    '''
+    if np_random is None:
+        np_random = np.random.RandomState()
+    hole = np.array(hole, dtype=np.int64)
+    board = np.array(board, dtype=np.int64)
+    deck = np.setdiff1d(np.arange(52), np.concatenate([hole, board]))
+    num_missing = 5 - len(board)
+    if num_missing == 0:
+        num_runouts = 1
+
+    # Each rollout is a permutation of the deck, which starts with the
+    # missing public cards. Two distinct cards of the rest go to the opponent
+    perms = deck[np_random.random_sample((num_runouts, len(deck))).argsort(axis=1)]
+    final_board = np.concatenate([np.broadcast_to(board, (num_runouts, len(board))), perms[:, :num_missing]], axis=1)
+    rest = perms[:, num_missing:]
+    first = np_random.randint(0, rest.shape[1], (num_runouts, num_samples))
+    second = np_random.randint(0, rest.shape[1] - 1, (num_runouts, num_samples))
+    second += second >= first
+    opponent = np.stack([np.take_along_axis(rest, first, axis=1), np.take_along_axis(rest, second, axis=1)], axis=-1)
+
+    mine = evaluate_hands(np.concatenate([np.broadcast_to(hole, (num_runouts, 2)), final_board], axis=1))
+    theirs = evaluate_hands(np.concatenate([opponent, np.broadcast_to(final_board[:, None], (num_runouts, num_samples, 5))], axis=-1))
+    equities = (np.sign(mine[:, None] - theirs) + 1).mean(axis=1) / 2
+    histogram = np.bincount(np.minimum((equities * num_bins).astype(np.int64), num_bins - 1), minlength=num_bins)
+    return histogram / num_runouts
+
+def emd_kmeans(histograms, num_clusters, num_iterations=50, np_random=None):
+    ''' Cluster histograms by k-means with the earth mover's distance
+
+    The centroids are the means of the cumulative distributions of their
+    clusters, and the histograms are assigned to the nearest centroid in
+    earth mover's distance.
+
+    Args:
+        histograms (numpy.array): The histograms, (num_hands, num_bins)
+        num_clusters (int): The number of clusters
+        num_iterations (int): The maximal number of iterations
+        np_random (numpy.random.RandomState): The random generator of the initial centroids
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (numpy.array): The cumulative distributions of the centroids, (num_clusters, num_bins),
+                from the weakest to the strongest
+            (numpy.array): The cluster of each histogram
+    '''
+    if np_random is None:
+        np_random = np.random.RandomState()
+    cdfs = np.cumsum(histograms, axis=1)
+    unique = np.unique(cdfs, axis=0)
+    num_clusters = min(num_clusters, len(unique))
+    centroids = unique[np_random.choice(len(unique), num_clusters, replace=False)]
+    labels = None
+    for _ in range(num_iterations):
+        new_labels = emd_assign(cdfs, centroids)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for k in range(num_clusters):
+            members = cdfs[labels == k]
+            if len(members):
+                centroids[k] = members.mean(axis=0)
+    # Order the clusters by the mean equity, from the weakest to the strongest
+    order = np.argsort(-centroids.sum(axis=1), kind='stable')
+    return centroids[order], np.argsort(order)[labels]
+
+def emd_assign(cdfs, centroids):
+    ''' Assign cumulative distributions to the nearest centroids in earth
+        mover's distance
+
+    Args:
+        cdfs (numpy.array): The cumulative distributions, (num_hands, num_bins)
+        centroids (numpy.array): The cumulative distributions of the centroids
+
+    Returns:
+        (numpy.array): The index of the nearest centroid of each distribution
+    '''
+    distances = np.abs(cdfs[:, None, :] - centroids[None, :, :]).sum(axis=-1)
+    return distances.argmin(axis=1)
+
+class CardAbstraction:
+    ''' Map the cards of a hold'em state to an abstract key
+    '''
+    def __init__(self, path=None, cache_size=100000):
+        ''' Initialize the abstraction
+
+        Args:
+            path (str): The directory of the bucket tables built by `build`.
+                If None, the cards are only canonicalized under suit isomorphism
+            cache_size (int): The maximal number of cached buckets of the hands
+                missing from the tables
+        '''
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.tables = None
+        if path is not None:
+            config = np.load(os.path.join(path, 'config.npy'))
+            self.num_bins, self.num_runouts, self.num_samples, self.seed = config.tolist()
+            self.tables = []
+            for street in range(4):
+                self.tables.append(tuple(np.load(os.path.join(path, 'street_{}_{}.npy'.format(street, name)), mmap_mode='r')
+                                         for name in ('keys', 'buckets', 'centroids')))
+
+    def card_key(self, hole, board):
+        ''' Get the abstract key of the cards
+
+        Args:
+            hole (list): The ids of the hole cards
+            board (list): The ids of the public cards
+
+        Returns:
+            (tuple): The canonical cards, or the street and the bucket of the hand
+        '''
+        hole, board = canonicalize(hole, board)
+        if self.tables is None:
+            return hole, board
+        return STREETS[len(board)], self.bucket(hole, board)
+
+    def bucket(self, hole, board):
+        ''' Get the bucket of canonical cards
+
+        Args:
+            hole (tuple): The canonical ids of the hole cards
+            board (tuple): The canonical ids of the public cards
+
+        Returns:
+            (int): The bucket
+        '''
+        street = STREETS[len(board)]
+        keys, buckets, centroids = self.tables[street]
+        key = _pack(hole, board)
+        i = np.searchsorted(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return int(buckets[i])
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        np_random = np.random.RandomState([self.seed, *hole, 52, *board])
+        histogram = equity_histogram(hole, board, self.num_bins, self.num_runouts, self.num_samples, np_random)
+        bucket = int(emd_assign(np.cumsum(histogram)[None], np.asarray(centroids))[0])
+        self._cache[key] = bucket
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return bucket
+
+    def infoset_key(self, state):
+        ''' Get the info set key of a state of the limit or no-limit hold'em env.
+            The cards are abstracted and the rest of the observation is kept.
+
+        Args:
+            state (dict): The extracted state, with 'obs' and 'raw_obs'
+
+        Returns:
+            (tuple): The key
+        '''
+        raw_obs = state['raw_obs']
+        return self.card_key(cards2ids(raw_obs['hand']), cards2ids(raw_obs['public_cards'])), state['obs'][52:].tobytes()
+
+    @staticmethod
+    def build(path, num_buckets=(16, 64, 64, 64), num_hands=2000, num_bins=10, num_runouts=32, num_samples=64, seed=0):
+        ''' Build the bucket tables and save them to a directory
+
+        Args:
+            path (str): The directory
+            num_buckets (tuple): The number of buckets of each street
+            num_hands (int): The number of sampled hands of the flop, the turn and the river
+            num_bins (int): The number of bins of the equity histograms
+            num_runouts (int): The number of rollouts of the public cards of each histogram
+            num_samples (int): The number of hands of the opponent of each rollout
+            seed (int): The random seed
+        '''
+        if len(num_buckets) != 4:
+            raise ValueError('There should be a number of buckets for each of the 4 streets')
+        if not os.path.exists(path):
+            os.makedirs(path)
+        np_random = np.random.RandomState(seed)
+        for street, num_board in enumerate((0, 3, 4, 5)):
+            if num_board == 0:
+                hands = {canonicalize([a, b], []) for a in range(52) for b in range(a + 1, 52)}
+            else:
+                hands = set()
+                for _ in range(num_hands):
+                    cards = np_random.choice(52, 2 + num_board, replace=False).tolist()
+                    hands.add(canonicalize(cards[:2], cards[2:]))
+            hands = sorted(hands, key=lambda hand: _pack(*hand))
+            histograms = np.array([equity_histogram(hole, board, num_bins, num_runouts, num_samples,
+                                                    np.random.RandomState([seed, *hole, 52, *board]))
+                                   for hole, board in hands])
+            centroids, labels = emd_kmeans(histograms, num_buckets[street], np_random=np_random)
+            np.save(os.path.join(path, 'street_{}_keys.npy'.format(street)), np.array([_pack(*hand) for hand in hands], dtype=np.int64))
+            np.save(os.path.join(path, 'street_{}_buckets.npy'.format(street)), labels.astype(np.int32))
+            np.save(os.path.join(path, 'street_{}_centroids.npy'.format(street)), centroids)
+        np.save(os.path.join(path, 'config.npy'), np.array([num_bins, num_runouts, num_samples, seed], dtype=np.int64))
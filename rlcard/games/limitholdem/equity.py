@@ -0,0 +1,127 @@
+''' Monte Carlo equity and hand strength features of hold'em hands
+
+The features are estimated against one opponent holding random cards, by
+rolling out the missing public cards and the hole cards of the opponent
+in numpy batches evaluated by `evaluator.evaluate_hands`. The cards are
+card ids as in `card2index.json`.
+
+The equity of a hand does not change if the suits are relabeled, so the
+features are cached by the cards canonicalized under suit isomorphism.
+'''
+from collections import OrderedDict
+
+import numpy as np
+
+from rlcard.games.limitholdem.evaluator import evaluate_hands
+
+NUM_FEATURES = 4
+
+def canonicalize(hole, board):
+    ''' Relabel the suits of the cards into a canonical form. Two sets of
+        cards have the same canonical form if and only if one is obtained
+        from the other by relabeling the suits.
+
+    Args:
+        hole (list): The ids of the hole cards
+        board (list): The ids of the public cards
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (tuple): The sorted ids of the relabeled hole cards
+            (tuple): The sorted ids of the relabeled public cards
+    '''
+    signatures = [(sorted(c % 13 for c in hole if c // 13 == suit),
+                   sorted(c % 13 for c in board if c // 13 == suit)) for suit in range(4)]
+    # Suits with the same signature are interchangeable, so ties do not matter
+    order = sorted(range(4), key=lambda suit: signatures[suit], reverse=True)
+    relabel = {suit: new_suit for new_suit, suit in enumerate(order)}
+    hole = tuple(sorted(relabel[c // 13] * 13 + c % 13 for c in hole))
+    board = tuple(sorted(relabel[c // 13] * 13 + c % 13 for c in board))
+    return hole, board
+
+class EquityCalculator:
+    ''' Estimate the features of hold'em hands by vectorized rollouts
+
+    The features are, in order:
+        equity: The probability of winning at the showdown, counting ties as half
+        hand strength: The probability of being ahead with the current public cards
+        positive potential: The probability of getting ahead when behind
+        negative potential: The probability of falling behind when ahead
+
+    Before the flop the hand strength is the equity, and the potentials are
+    zero before the flop and on the river.
+    '''
+    def __init__(self, num_samples=1000, cache_size=100000, seed=0):
+        ''' Initialize the calculator
+
+        Args:
+            num_samples (int): The number of rollouts of each estimate
+            cache_size (int): The maximal number of cached hands
+            seed (int): The seed of the rollouts. The rollouts of a hand only
+                depend on the seed and on its canonical cards, so the features
+                do not depend on the cache
+        '''
+        if num_samples < 1:
+            raise ValueError('The number of samples should be positive')
+        self.num_samples = num_samples
+        self.cache_size = cache_size
+        self.seed = seed
+        self._cache = OrderedDict()
+
+    def features(self, hole, board):
+        ''' Get the features of a hand
+
+        Args:
+            hole (list): The ids of the two hole cards
+            board (list): The ids of the zero to five public cards
+
+        Returns:
+            (numpy.array): The features
+        '''
+        key = canonicalize(hole, board)
+        features = self._cache.get(key)
+        if features is not None:
+            self._cache.move_to_end(key)
+            return features
+        features = self._estimate(*key)
+        features.flags.writeable = False
+        self._cache[key] = features
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return features
+
+    def _estimate(self, hole, board):
+        np_random = np.random.RandomState([self.seed, *hole, 52, *board])
+        hole = np.array(hole, dtype=np.int64)
+        board = np.array(board, dtype=np.int64)
+        deck = np.setdiff1d(np.arange(52), np.concatenate([hole, board]))
+        num_draws = 2 + 5 - len(board)
+
+        # Draw the hole cards of the opponent and the missing public cards
+        draws = deck[np_random.random_sample((self.num_samples, len(deck))).argsort(axis=1)[:, :num_draws]]
+        opponent = draws[:, :2]
+        final_board = np.concatenate([np.broadcast_to(board, (self.num_samples, len(board))), draws[:, 2:]], axis=1)
+        mine = evaluate_hands(np.concatenate([np.broadcast_to(hole, (self.num_samples, 2)), final_board], axis=1))
+        theirs = evaluate_hands(np.concatenate([opponent, final_board], axis=1))
+        final = np.sign(mine - theirs)
+        equity = np.mean(final + 1) / 2
+
+        if len(board) < 3:
+            return np.array([equity, equity, 0, 0], dtype=np.float64)
+
+        # Ahead (1), tied (0) or behind (-1) with the current public cards
+        now = np.sign(evaluate_hands(np.concatenate([hole, board])) - evaluate_hands(
+            np.concatenate([opponent, np.broadcast_to(board, (self.num_samples, len(board)))], axis=1)))
+        strength = np.mean(now + 1) / 2
+        if len(board) == 5:
+            return np.array([equity, strength, 0, 0], dtype=np.float64)
+
+        ahead, tied, behind = now == 1, now == 0, now == -1
+        positive = np.sum(behind & (final == 1)) + (np.sum(behind & (final == 0)) + np.sum(tied & (final == 1))) / 2
+        negative = np.sum(ahead & (final == -1)) + (np.sum(tied & (final == -1)) + np.sum(ahead & (final == 0))) / 2
+        positive_total = np.sum(behind) + np.sum(tied) / 2
+        negative_total = np.sum(ahead) + np.sum(tied) / 2
+        return np.array([equity, strength,
+                         positive / positive_total if positive_total else 0,
+                         negative / negative_total if negative_total else 0], dtype=np.float64)
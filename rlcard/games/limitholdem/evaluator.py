@@ -0,0 +1,197 @@
+''' A table driven evaluator of hold'em hands
+
+The value of a hand is a single integer, greater for better hands. The
+category of the hand (1: high card, ..., 9: straight flush, as in
+`Hand.category`) is in the high bits and the ranks breaking the ties in
+the low bits.
+
+Cards are either strings such as 'SA', or integer ids as in
+`card2index.json`: `13 * suit + rank` with suits in the order S, H, D, C
+and ranks in the order A, 2, ..., K.
+
+The ranks of a hand are hashed to the sum of `5 ** rank` over its cards,
+which is unique since there are at most four cards of a rank. The value
+of the hand without flushes is looked up in a table sorted by this key.
+The value of a flush is looked up in a table indexed by the bits of the
+ranks of the suit.
+'''
+import itertools
+from functools import lru_cache
+
+import numpy as np
+
+RANKS = '23456789TJQKA'
+SUITS = 'SHDC'
+CATEGORY_SHIFT = 20
+
+# Ranks of the card ids, from 0 for the 2 to 12 for the ace
+_ID_RANK = (np.arange(52) - 1) % 13
+_ID_SUIT = np.arange(52) // 13
+_RANK_KEY = 5 ** np.arange(13, dtype=np.int64)
+_RANK_POWERS = _RANK_KEY.tolist()
+_ID_KEY = _RANK_KEY[_ID_RANK]
+_ID_BIT = 1 << _ID_RANK
+
+def _straight_high(mask):
+    ''' Get the highest rank of the best straight in a set of ranks
+
+    Args:
+        mask (int): The bits of the ranks
+
+    Returns:
+        (int): The highest rank of the straight, or -1 if there is none
+    '''
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high
+    # The ace is low in the wheel A2345
+    if mask & 0b1000000001111 == 0b1000000001111:
+        return 3
+    return -1
+
+def _encode(category, ranks):
+    value = category
+    for k in range(5):
+        value = (value << 4) | (ranks[k] if k < len(ranks) else 0)
+    return value
+
+def _rank_value(ranks):
+    ''' Get the value of the best five cards without flushes
+
+    Args:
+        ranks (tuple): The ranks of the cards, in descending order
+
+    Returns:
+        (int): The value of the hand
+    '''
+    groups = sorted(((len(list(group)), r) for r, group in itertools.groupby(ranks)), reverse=True)
+    mask = 0
+    for r in ranks:
+        mask |= 1 << r
+    count, rank = groups[0]
+
+    if count == 4:
+        return _encode(8, [rank, max(r for r in ranks if r != rank)])
+    if count == 3:
+        pairs = [r for c, r in groups[1:] if c >= 2]
+        if pairs:
+            return _encode(7, [rank, max(pairs)])
+    straight = _straight_high(mask)
+    if straight >= 0:
+        return _encode(5, [straight])
+    if count == 3:
+        return _encode(4, [rank] + [r for r in ranks if r != rank][:2])
+    if count == 2 and groups[1][0] == 2:
+        high, low = groups[0][1], groups[1][1]
+        return _encode(3, [high, low, max(r for r in ranks if r not in (high, low))])
+    if count == 2:
+        return _encode(2, [rank] + [r for r in ranks if r != rank][:3])
+    return _encode(1, ranks[:5])
+
+def _flush_value(mask):
+    ''' Get the value of the best flush of a suit
+
+    Args:
+        mask (int): The bits of the ranks of the suit
+
+    Returns:
+        (int): The value of the flush, or 0 if there are less than five cards
+    '''
+    ranks = [r for r in range(12, -1, -1) if mask >> r & 1]
+    if len(ranks) < 5:
+        return 0
+    straight = _straight_high(mask)
+    if straight >= 0:
+        return _encode(9, [straight])
+    return _encode(6, ranks[:5])
+
+@lru_cache(maxsize=None)
+def _tables():
+    ''' Build the lookup tables. The ranks of the hands of five to seven
+        cards are enumerated once, in about a second.
+
+    Returns:
+        (tuple): The sorted rank keys, their values, a dict of them, and the
+            flush values indexed by rank bits
+    '''
+    rank_table = {}
+    for num_cards in (5, 6, 7):
+        for ranks in itertools.combinations_with_replacement(range(12, -1, -1), num_cards):
+            if all(ranks[i] != ranks[i + 4] for i in range(num_cards - 4)):
+                rank_table[sum(_RANK_POWERS[r] for r in ranks)] = _rank_value(ranks)
+    keys = np.array(sorted(rank_table), dtype=np.int64)
+    values = np.array([rank_table[k] for k in keys.tolist()], dtype=np.int64)
+    flush_values = np.array([_flush_value(mask) for mask in range(1 << 13)], dtype=np.int64)
+    return keys, values, rank_table, flush_values
+
+def evaluate_cards(cards):
+    ''' Evaluate a hand of five to seven string cards
+
+    Args:
+        cards (list): The cards, e.g. ['SA', 'HK', 'D2', 'C7', 'ST', 'S9', 'H3']
+
+    Returns:
+        (int): The value of the best five cards
+    '''
+    _, _, rank_table, flush_values = _tables()
+    key = 0
+    suit_counts = {}
+    suit_masks = {}
+    for card in cards:
+        rank = RANKS.index(card[1])
+        key += _RANK_POWERS[rank]
+        suit_counts[card[0]] = suit_counts.get(card[0], 0) + 1
+        suit_masks[card[0]] = suit_masks.get(card[0], 0) | 1 << rank
+    value = rank_table[key]
+    for suit, count in suit_counts.items():
+        if count >= 5:
+            value = max(value, int(flush_values[suit_masks[suit]]))
+    return value
+
+def evaluate_hands(card_ids):
+    ''' Evaluate a batch of hands given by card ids
+
+    Args:
+        card_ids (numpy.array): The card ids, of shape (..., num_cards) with
+            five to seven cards per hand
+
+    Returns:
+        (numpy.array): The values of the hands, of shape (...)
+    '''
+    keys, values, _, flush_values = _tables()
+    card_ids = np.asarray(card_ids)
+    if not 5 <= card_ids.shape[-1] <= 7:
+        raise ValueError('A hand should have five to seven cards, got {}'.format(card_ids.shape[-1]))
+    result = values[np.searchsorted(keys, _ID_KEY[card_ids].sum(axis=-1))]
+    suits = _ID_SUIT[card_ids]
+    bits = _ID_BIT[card_ids]
+    for suit in range(4):
+        in_suit = suits == suit
+        flush = in_suit.sum(axis=-1) >= 5
+        if flush.any():
+            masks = np.where(in_suit, bits, 0).sum(axis=-1)
+            result = np.where(flush, np.maximum(result, flush_values[masks]), result)
+    return result
+
+def cards2ids(cards):
+    ''' Get the ids of string cards
+
+    Args:
+        cards (list): The cards, e.g. ['SA', 'HK']
+
+    Returns:
+        (list): The ids of the cards
+    '''
+    return [SUITS.index(card[0]) * 13 + (RANKS.index(card[1]) + 1) % 13 for card in cards]
+
+def hand_category(value):
+    ''' Get the category of a hand value
+
+    Args:
+        value (int): The value of a hand
+
+    Returns:
+        (int): The category, from 1 for a high card to 9 for a straight flush
+    '''
+    return value >> CATEGORY_SHIFT
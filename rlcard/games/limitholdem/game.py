@@ -1,6 +1,6 @@
-from copy import deepcopy, copy
 import numpy as np
 
+from rlcard.games.base import UndoLog
 from rlcard.games.limitholdem import Dealer
 from rlcard.games.limitholdem import Player, PlayerStatus
 from rlcard.games.limitholdem import Judger
@@ -37,7 +37,6 @@ class LimitHoldemGame:
         self.round = None
         self.round_counter = None
         self.history = None
-        self.history_raises_nums = None
 
     def configure(self, game_config):
         """Specify some game specific parameters, such as number of players"""
@@ -93,7 +92,7 @@ class LimitHoldemGame:
         self.round_counter = 0
 
         # Save the history for stepping back to the last state.
-        self.history = []
+        self.history = UndoLog()
 
         state = self.get_state(self.game_pointer)
 
@@ -116,15 +115,12 @@ class LimitHoldemGame:
                 (int): next player id
         """
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            rn = copy(self.history_raise_nums)
-            self.history.append((r, b, r_c, d, p, ps, rn))
+            # First record the fields that this step may change
+            self.history.checkpoint()
+            self.history.save(self, 'game_pointer', 'round_counter', 'history_raise_nums')
+            self.history.save(self.round, 'game_pointer', 'raise_amount', 'have_raised', 'not_raise_num', 'raised', 'player_folded')
+            self.history.save(self.players[self.game_pointer], 'status', 'in_chips')
+            self.history.call(self._return_public_cards, len(self.public_cards))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -162,11 +158,17 @@ class LimitHoldemGame:
         Returns:
             (bool): True if the game steps back successfully
         """
-        if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, \
-                self.players, self.history_raises_nums = self.history.pop()
-            return True
-        return False
+        return self.history.undo()
+
+    def _return_public_cards(self, num):
+        """
+        Put the public cards dealt after the first num cards back to the deck
+
+        Args:
+            num (int): The number of public cards to keep
+        """
+        while len(self.public_cards) > num:
+            self.dealer.deck.append(self.public_cards.pop())
 
     def get_num_players(self):
         """
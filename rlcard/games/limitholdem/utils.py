@@ -1,5 +1,7 @@
 import numpy as np
 
+from rlcard.games.limitholdem.evaluator import evaluate_cards
+
 class Hand:
     def __init__(self, all_cards):
         self.all_cards = all_cards # two hand cards + five public cards
@@ -540,31 +542,14 @@ def compare_hands(hands):
     elif hands[1] == None:
         return [1, 0]
     '''
-    hand_category = [] #such as high_card, straight_flush, etc
     all_players = [0]*len(hands) #all the players in this round, 0 for losing and 1 for winning or draw
     if None in hands:
         fold_players = [i for i, j in enumerate(hands) if j is None]
         if len(fold_players) == len(all_players) - 1:
-            for _ in enumerate(hands):
-                if _[0] in fold_players:
-                    all_players[_[0]] = 0
-                else:
-                    all_players[_[0]] = 1
+            for i, hand in enumerate(hands):
+                all_players[i] = 0 if i in fold_players else 1
             return all_players
-        else:
-            for _ in enumerate(hands):
-                if hands[_[0]] is not None:
-                    hand = Hand(hands[_[0]])
-                    hand.evaluateHand()
-                    hand_category.append(hand.category)
-                elif hands[_[0]] is None:
-                    hand_category.append(0)
-    else:
-            for i in enumerate(hands):
-                hand = Hand(hands[i[0]])
-                hand.evaluateHand()
-                hand_category.append(hand.category)
-    potential_winner_index = [i for i, j in enumerate(hand_category) if j == max(hand_category)]# potential winner are those with same max card_catagory
+    potential_winner_index = [i for i, hand in enumerate(hands) if hand is not None]
 
     return final_compare(hands, potential_winner_index, all_players)
 
@@ -574,7 +559,7 @@ def final_compare(hands, potential_winner_index, all_players):
     Args:
         hands(list): cards of those players with same highest hand_catagory.
         e.g. hands = [['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CJ', 'SJ', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7']]
-        potential_winner_index(list): index of those with same max card_catagory in all_players
+        potential_winner_index(list): index of the players who may win in all_players
         all_players(list): a list of all the player's win/lose situation, 0 for lose and 1 for win
     Returns:
         [0, 1, 0]: player1 wins
@@ -587,28 +572,10 @@ def final_compare(hands, potential_winner_index, all_players):
     elif hands[1] == None:
         return [1, 0]
     '''
-    if len(potential_winner_index) == 1:
-        all_players[potential_winner_index[0]] = 1
-        return all_players
-    elif len(potential_winner_index) > 1:
-        # compare when having equal max categories
-        equal_hands = []
-        for _ in potential_winner_index:
-            hand = Hand(hands[_])
-            hand.evaluateHand()
-            equal_hands.append(hand)
-        hand = equal_hands[0]
-        if hand.category == 8:
-            return determine_winner_four_of_a_kind(equal_hands, all_players, potential_winner_index)
-        if hand.category == 7:
-            return determine_winner([2, 0], equal_hands, all_players, potential_winner_index)
-        if hand.category == 4:
-            return determine_winner([2, 1, 0], equal_hands, all_players, potential_winner_index)
-        if hand.category == 3:
-            return determine_winner([4, 2, 0], equal_hands, all_players, potential_winner_index)
-        if hand.category == 2:
-            return determine_winner([4, 2, 1, 0], equal_hands, all_players, potential_winner_index)
-        if hand.category == 1 or hand.category == 6:
-            return determine_winner([4, 3, 2, 1, 0], equal_hands, all_players, potential_winner_index)
-        if hand.category in [5, 9]:
-            return determine_winner_straight(equal_hands, all_players, potential_winner_index)
+    # The hand values of the evaluator are compared at once, including the kickers
+    values = [evaluate_cards(hands[i]) for i in potential_winner_index]
+    best_value = max(values, default=None)
+    for i, value in zip(potential_winner_index, values):
+        if value == best_value:
+            all_players[i] = 1
+    return all_players
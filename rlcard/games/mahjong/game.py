@@ -1,6 +1,6 @@
 import numpy as np
-from copy import deepcopy
 
+from rlcard.games.base import UndoLog
 from rlcard.games.mahjong import Dealer
 from rlcard.games.mahjong import Player
 from rlcard.games.mahjong import Round
@@ -40,7 +40,7 @@ class MahjongGame:
             self.dealer.deal_cards(player, 13)
 
         # Save the hisory for stepping back to the last state.
-        self.history = []
+        self.history = UndoLog()
 
         self.dealer.deal_cards(self.players[self.round.current_player], 1)
         state = self.get_state(self.round.current_player)
@@ -59,12 +59,15 @@ class MahjongGame:
                 (dict): next player's state
                 (int): next plater's id
         '''
-        # First snapshot the current state
+        # First record the fields that this step may change
         if self.allow_step_back:
-            hist_dealer = deepcopy(self.dealer)
-            hist_round = deepcopy(self.round)
-            hist_players = deepcopy(self.players)
-            self.history.append((hist_dealer, hist_players, hist_round))
+            self.history.checkpoint()
+            self.history.save(self, 'cur_state')
+            self.history.save(self.round, 'target', 'current_player', 'last_player', 'direction', 'played_cards',
+                              'is_over', 'player_before_act', 'prev_status', 'valid_act', 'last_cards')
+            self.history.save(self.dealer, 'deck', 'table')
+            for player in self.players:
+                self.history.save(player, 'hand', 'pile')
         self.round.proceed_round(self.players, action)
         state = self.get_state(self.round.current_player)
         self.cur_state = state
@@ -76,10 +79,7 @@ class MahjongGame:
         Returns:
             (bool): True if the game steps back successfully
         '''
-        if not self.history:
-            return False
-        self.dealer, self.players, self.round = self.history.pop()
-        return True
+        return self.history.undo()
 
     def get_state(self, player_id):
         ''' Return player's state
@@ -5,3 +5,4 @@ from rlcard.games.nolimitholdem.round import Action
 from rlcard.games.nolimitholdem.round import NolimitholdemRound as Round
 from rlcard.games.nolimitholdem.game import NolimitholdemGame as Game
 
+from rlcard.games.nolimitholdem.abstraction import ActionAbstraction
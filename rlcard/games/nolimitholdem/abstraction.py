@@ -0,0 +1,157 @@
+''' Action abstraction of no-limit hold'em
+
+The raises are sizes of a grid of pot fractions, which can differ from one
+street to another. A raise of a fraction of the pot puts that fraction of
+the pot in chips, as `Action.RAISE_POT` and `Action.RAISE_HALF_POT` do. The
+geometric size is the fraction of the pot which, bet and called on each of
+the remaining streets, puts the effective stack in by the river.
+
+Every size has a fixed action id, whatever the grid, so that the policies
+trained with one grid can be played with another: the ids 0 to 4 are the
+ones of `Action`, the other sizes follow. The number of actions of a grid
+is its largest id plus one, and the ids missing from the grid are never
+legal.
+
+The bets off the grid, e.g. of a human player or of a finer grid, are
+translated to the neighbouring sizes of the grid by the pseudo-harmonic
+mapping of Ganzfried and Sandholm.
+'''
+from collections import namedtuple
+
+from rlcard.games.nolimitholdem.round import Action
+
+GEOMETRIC = 'geometric'
+
+class Raise(namedtuple('Raise', ['value', 'fraction'])):
+    ''' A raise of the grid beyond the ones of `Action`. The value is the
+        action id and the fraction is the fraction of the pot, or None for
+        the geometric size.
+    '''
+    __slots__ = ()
+
+    @property
+    def name(self):
+        if self.fraction is None:
+            return 'RAISE_GEOMETRIC'
+        return 'RAISE_{:.2f}_POT'.format(self.fraction)
+
+    def __str__(self):
+        return 'Raise.' + self.name
+
+# All the actions, indexed by their ids
+ACTIONS = list(Action) + [Raise(5 + i, fraction) for i, fraction in
+                          enumerate((0.25, 1 / 3, 2 / 3, 0.75, 1.25, 1.5, 2.0, 3.0, None))]
+
+# The fractions of the pot of the raises, and the raises of the fractions
+FRACTIONS = {Action.RAISE_HALF_POT: 0.5, Action.RAISE_POT: 1.0}
+FRACTIONS.update((action, action.fraction) for action in ACTIONS[5:])
+SIZES = {GEOMETRIC if fraction is None else round(fraction, 2): action for action, fraction in FRACTIONS.items()}
+
+DEFAULT_BET_SIZES = (0.5, 1.0)
+
+def pseudo_harmonic(x, a, b):
+    ''' Get the probability of translating a bet to the smaller of its two
+        neighbouring sizes, by the pseudo-harmonic mapping
+
+    Args:
+        x (float): The bet, as a fraction of the pot
+        a (float): The smaller size, as a fraction of the pot
+        b (float): The larger size, as a fraction of the pot
+
+    Returns:
+        (float): The probability of translating to a
+    '''
+    return (b - x) * (1 + a) / ((b - a) * (1 + x))
+
+def translate(fraction, sizes, np_random=None):
+    ''' Translate a bet off the grid to one of the sizes of the grid
+
+    Args:
+        fraction (float): The bet, as a fraction of the pot
+        sizes (dict): The fraction of the pot of each action of the grid
+        np_random (numpy.random.RandomState): If given, the bet is randomly
+            translated to one of its neighbours, otherwise to the most likely
+
+    Returns:
+        (object): The action
+    '''
+    if not sizes:
+        raise ValueError('There should be at least one size to translate to')
+    ordered = sorted(sizes.items(), key=lambda item: item[1])
+    if fraction <= ordered[0][1]:
+        return ordered[0][0]
+    for (lower, a), (upper, b) in zip(ordered, ordered[1:]):
+        if fraction <= b:
+            if fraction == b:
+                return upper
+            p = pseudo_harmonic(fraction, a, b)
+            if np_random is not None:
+                return lower if np_random.rand() < p else upper
+            return lower if p >= 0.5 else upper
+    return ordered[-1][0]
+
+class ActionAbstraction:
+    ''' The grids of raise sizes of the streets
+    '''
+    def __init__(self, bet_sizes=None):
+        ''' Initialize the abstraction
+
+        Args:
+            bet_sizes (list/dict): The sizes of the raises, as fractions of the
+                pot or 'geometric'. A list gives the same grid to all the
+                streets, a dict maps streets (0 for the preflop to 3 for the
+                river) to grids and the other streets keep the default grid.
+                If None, the raises are half pot and pot
+        '''
+        if bet_sizes is None:
+            bet_sizes = DEFAULT_BET_SIZES
+        if isinstance(bet_sizes, dict):
+            if any(street not in range(4) for street in bet_sizes):
+                raise ValueError('The streets should be 0 to 3, got {}'.format(list(bet_sizes)))
+            grids = [bet_sizes.get(street, DEFAULT_BET_SIZES) for street in range(4)]
+        else:
+            grids = [bet_sizes] * 4
+        self.grids = [self._parse(grid) for grid in grids]
+        self.num_actions = max([Action.ALL_IN.value] + [action.value for grid in self.grids for action in grid]) + 1
+
+    @staticmethod
+    def _parse(grid):
+        actions = set()
+        for size in grid:
+            key = size if size == GEOMETRIC else round(float(size), 2)
+            if key not in SIZES:
+                raise ValueError('Unsupported bet size {}, the sizes are {}'.format(size, list(SIZES)))
+            actions.add(SIZES[key])
+        return sorted(actions, key=lambda action: action.value)
+
+    def get_raise_actions(self, street):
+        ''' Get the raises of the grid of a street
+
+        Args:
+            street (int): The street, 0 for the preflop to 3 for the river
+
+        Returns:
+            (list): The raises, ordered by id
+        '''
+        return self.grids[min(street, 3)]
+
+    @staticmethod
+    def get_raise_amount(action, pot, stack, street):
+        ''' Get the chips put in by a raise of the grid
+
+        Args:
+            action (object): The raise
+            pot (int): The chips in the pot
+            stack (int): The effective stack, i.e. the chips the player can
+                lose, which sets the geometric size
+            street (int): The street, 0 for the preflop to 3 for the river
+
+        Returns:
+            (int): The chips
+        '''
+        fraction = FRACTIONS[action]
+        if fraction is None:
+            num_streets = 4 - min(street, 3)
+            fraction = ((1 + 2 * stack / pot) ** (1 / num_streets) - 1) / 2
+        # Guard against rounding, e.g. 9 * (1 / 3) should be 3
+        return int(pot * fraction + 1e-9)
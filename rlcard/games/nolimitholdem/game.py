@@ -1,7 +1,7 @@
 from enum import Enum
 
 import numpy as np
-from copy import deepcopy
+from rlcard.games.base import UndoLog
 from rlcard.games.limitholdem import Game
 from rlcard.games.limitholdem import PlayerStatus
 
@@ -9,6 +9,7 @@ from rlcard.games.nolimitholdem import Dealer
 from rlcard.games.nolimitholdem import Player
 from rlcard.games.nolimitholdem import Judger
 from rlcard.games.nolimitholdem import Round, Action
+from rlcard.games.nolimitholdem.abstraction import ActionAbstraction, FRACTIONS, translate
 
 
 class Stage(Enum):
@@ -37,15 +38,19 @@ class NolimitholdemGame(Game):
         # If None, the dealer will be randomly chosen
         self.dealer_id = None
 
+        # The grids of raise sizes, half pot and pot by default
+        self.abstraction = ActionAbstraction()
+
     def configure(self, game_config):
         """
-        Specify some game specific parameters, such as number of players, initial chips, and dealer id.
-        If dealer_id is None, he will be randomly chosen
+        Specify some game specific parameters, such as number of players, initial chips, dealer id,
+        and the raise sizes. If dealer_id is None, he will be randomly chosen
         """
         self.num_players = game_config['game_num_players']
         # must have num_players length
         self.init_chips = [game_config['chips_for_each']] * game_config["game_num_players"]
         self.dealer_id = game_config['dealer_id']
+        self.abstraction = ActionAbstraction(game_config.get('game_bet_sizes'))
 
     def init_game(self):
         """
@@ -90,7 +95,8 @@ class NolimitholdemGame(Game):
 
         # Initialize a bidding round, in the first round, the big blind and the small blind needs to
         # be passed to the round for processing.
-        self.round = Round(self.num_players, self.big_blind, dealer=self.dealer, np_random=self.np_random)
+        self.round = Round(self.num_players, self.big_blind, dealer=self.dealer, np_random=self.np_random,
+                           abstraction=self.abstraction)
 
         self.round.start_new_round(game_pointer=self.game_pointer, raised=[p.in_chips for p in self.players])
 
@@ -98,7 +104,7 @@ class NolimitholdemGame(Game):
         self.round_counter = 0
 
         # Save the history for stepping back to the last state.
-        self.history = []
+        self.history = UndoLog()
 
         state = self.get_state(self.game_pointer)
 
@@ -113,6 +119,26 @@ class NolimitholdemGame(Game):
         """
         return self.round.get_nolimit_legal_actions(players=self.players)
 
+    def translate_bet(self, chips, np_random=None):
+        """
+        Translate a bet off the grid of raise sizes to a legal action
+
+        Args:
+            chips (int): The chips put in by the bet, including the call
+            np_random (numpy.random.RandomState): If given, the bet is randomly translated to one
+                of its neighbouring sizes by the pseudo-harmonic mapping, otherwise to the most likely
+
+        Returns:
+            (object): The legal action
+        """
+        legal_actions = self.get_legal_actions()
+        diff = max(self.round.raised) - self.round.raised[self.game_pointer]
+        raises = {action: self.round.get_raise_amount(self.players, action) / self.dealer.pot
+                  for action in legal_actions if action in FRACTIONS or action == Action.ALL_IN}
+        if chips <= diff or not raises:
+            return Action.CHECK_CALL
+        return translate(chips / self.dealer.pot, raises, np_random)
+
     def step(self, action):
         """
         Get the next state
@@ -133,14 +159,13 @@ class NolimitholdemGame(Game):
             raise Exception('Action not allowed')
 
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            self.history.append((r, b, r_c, d, p, ps))
+            # First record the fields that this step may change
+            self.history.checkpoint()
+            self.history.save(self, 'game_pointer', 'round_counter', 'stage')
+            self.history.save(self.round, 'game_pointer', 'not_raise_num', 'not_playing_num', 'raised', 'street')
+            self.history.save(self.dealer, 'pot')
+            self.history.save(self.players[self.game_pointer], 'status', 'in_chips', 'remained_chips')
+            self.history.call(self._return_public_cards, len(self.public_cards))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -181,7 +206,7 @@ class NolimitholdemGame(Game):
                     self.round_counter += 1
 
             self.round_counter += 1
-            self.round.start_new_round(self.game_pointer)
+            self.round.start_new_round(self.game_pointer, street=self.round_counter)
 
         state = self.get_state(self.game_pointer)
 
@@ -215,11 +240,7 @@ class NolimitholdemGame(Game):
         Returns:
             (bool): True if the game steps back successfully
         """
-        if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players = self.history.pop()
-            self.stage = Stage(self.round_counter)
-            return True
-        return False
+        return self.history.undo()
 
     def get_num_players(self):
         """
@@ -241,12 +262,12 @@ class NolimitholdemGame(Game):
         chips_payoffs = self.judger.judge_game(self.players, hands)
         return chips_payoffs
 
-    @staticmethod
-    def get_num_actions():
+    def get_num_actions(self):
         """
         Return the number of applicable actions
 
         Returns:
-            (int): The number of actions. There are 6 actions (call, raise_half_pot, raise_pot, all_in, check and fold)
+            (int): The number of actions. There are 5 actions by default (fold, check/call, raise_half_pot,
+                raise_pot and all_in), and the largest id of the raise sizes plus one otherwise
         """
-        return len(Action)
+        return self.abstraction.num_actions
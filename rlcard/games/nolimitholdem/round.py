@@ -21,14 +21,19 @@ class Action(Enum):
 class NolimitholdemRound:
     """Round can call functions from other classes to keep the game running"""
 
-    def __init__(self, num_players, init_raise_amount, dealer, np_random):
+    def __init__(self, num_players, init_raise_amount, dealer, np_random, abstraction=None):
         """
         Initialize the round class
 
         Args:
             num_players (int): The number of players
             init_raise_amount (int): The min raise amount when every round starts
+            abstraction (ActionAbstraction): The grids of raise sizes. If None, the raises are half pot and pot
         """
+        if abstraction is None:
+            from rlcard.games.nolimitholdem.abstraction import ActionAbstraction
+            abstraction = ActionAbstraction()
+        self.abstraction = abstraction
         self.np_random = np_random
         self.game_pointer = None
         self.num_players = num_players
@@ -46,17 +51,22 @@ class NolimitholdemRound:
         # Raised amount for each player
         self.raised = [0 for _ in range(self.num_players)]
 
-    def start_new_round(self, game_pointer, raised=None):
+        # The street, 0 for the preflop to 3 for the river
+        self.street = 0
+
+    def start_new_round(self, game_pointer, raised=None, street=0):
         """
         Start a new bidding round
 
         Args:
             game_pointer (int): The game_pointer that indicates the next player
             raised (list): Initialize the chips for each player
+            street (int): The street, which selects the grid of raise sizes
 
         Note: For the first round of the game, we need to setup the big/small blind
         """
         self.game_pointer = game_pointer
+        self.street = street
         self.not_raise_num = 0
         if raised:
             self.raised = raised
@@ -89,20 +99,16 @@ class NolimitholdemRound:
 
             self.not_raise_num = 1
 
-        elif action == Action.RAISE_POT:
-            self.raised[self.game_pointer] += self.dealer.pot
-            player.bet(chips=self.dealer.pot)
-            self.not_raise_num = 1
+        elif action == Action.FOLD:
+            player.status = PlayerStatus.FOLDED
 
-        elif action == Action.RAISE_HALF_POT:
-            quantity = int(self.dealer.pot / 2)
+        else:
+            # A raise of the grid, e.g. RAISE_POT or RAISE_HALF_POT
+            quantity = self.get_raise_amount(players, action)
             self.raised[self.game_pointer] += quantity
             player.bet(chips=quantity)
             self.not_raise_num = 1
 
-        elif action == Action.FOLD:
-            player.status = PlayerStatus.FOLDED
-
         if player.remained_chips < 0:
             raise Exception("Player in negative stake")
 
@@ -131,35 +137,49 @@ class NolimitholdemRound:
             players (list): The players in the game
 
         Returns:
-           (list):  A list of legal actions
+           (list):  A list of legal actions, ordered by id
         """
 
-        full_actions = list(Action)
-
         # The player can always check or call
+        full_actions = [Action.FOLD, Action.CHECK_CALL]
         player = players[self.game_pointer]
 
         diff = max(self.raised) - self.raised[self.game_pointer]
         # If the current player has no more chips after call, we cannot raise
         if diff > 0 and diff >= player.remained_chips:
-            full_actions.remove(Action.RAISE_HALF_POT)
-            full_actions.remove(Action.RAISE_POT)
-            full_actions.remove(Action.ALL_IN)
-        # Even if we can raise, we have to check remained chips
-        else:
-            if self.dealer.pot > player.remained_chips:
-                full_actions.remove(Action.RAISE_POT)
+            return full_actions
+
+        # Even if we can raise, we have to check remained chips, and we can't raise
+        # if the total raise amount is leq than the max raise amount of this round
+        for action in self.abstraction.get_raise_actions(self.street):
+            quantity = self.get_raise_amount(players, action)
+            if quantity <= player.remained_chips and quantity + self.raised[self.game_pointer] > max(self.raised):
+                full_actions.append(action)
+        full_actions.append(Action.ALL_IN)
 
-            if int(self.dealer.pot / 2) > player.remained_chips:
-                full_actions.remove(Action.RAISE_HALF_POT)
+        return sorted(full_actions, key=lambda action: action.value)
 
-            # Can't raise if the total raise amount is leq than the max raise amount of this round
-            # If raise by pot, there is no such concern
-            if Action.RAISE_HALF_POT in full_actions and \
-                int(self.dealer.pot / 2) + self.raised[self.game_pointer] <= max(self.raised):
-                full_actions.remove(Action.RAISE_HALF_POT)
+    def get_raise_amount(self, players, action):
+        """
+        Get the chips the current player puts in with a raise
 
-        return full_actions
+        Args:
+            players (list): The players in the game
+            action (object): A raise of the grid, or ALL_IN
+
+        Returns:
+            (int): The chips
+        """
+        player = players[self.game_pointer]
+        if action == Action.ALL_IN:
+            return player.remained_chips
+        # The effective stack is the most the player can lose to the others still betting
+        others = [p.remained_chips + p.in_chips for p in players
+                  if p is not player and p.status == PlayerStatus.ALIVE]
+        stack = player.remained_chips
+        if others:
+            stack = min(stack, max(others) - player.in_chips)
+        return self.abstraction.get_raise_amount(action, self.dealer.pot, max(stack, 0), self.street)
 
     def is_over(self):
         """
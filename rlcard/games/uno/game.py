@@ -1,6 +1,6 @@
-from copy import deepcopy
 import numpy as np
 
+from rlcard.games.base import UndoLog
 from rlcard.games.uno import Dealer
 from rlcard.games.uno import Player
 from rlcard.games.uno import Round
@@ -49,7 +49,12 @@ class UnoGame:
         self.round.perform_top_card(self.players, top_card)
 
         # Save the hisory for stepping back to the last state.
-        self.history = []
+        self.history = UndoLog()
+
+        # The colors of wild cards are changed when they are played or drawn
+        self.wild_cards = [card for card in self.dealer.deck + self.round.played_cards if card.type == 'wild']
+        for player in self.players:
+            self.wild_cards.extend([card for card in player.hand if card.type == 'wild'])
 
         player_id = self.round.current_player
         state = self.get_state(player_id)
@@ -69,11 +74,14 @@ class UnoGame:
         '''
 
         if self.allow_step_back:
-            # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
+            # First record the fields that this step may change
+            self.history.checkpoint()
+            self.history.save(self.round, 'target', 'current_player', 'direction', 'played_cards', 'is_over', 'winner')
+            self.history.save(self.dealer, 'deck')
+            for player in self.players:
+                self.history.save(player, 'hand')
+            for card in self.wild_cards:
+                self.history.save(card, 'color')
 
         self.round.proceed_round(self.players, action)
         player_id = self.round.current_player
@@ -86,10 +94,7 @@ class UnoGame:
         Returns:
             (bool): True if the game steps back successfully
         '''
-        if not self.history:
-            return False
-        self.dealer, self.players, self.round = self.history.pop()
-        return True
+        return self.history.undo()
 
     def get_state(self, player_id):
         ''' Return player's state
@@ -0,0 +1,333 @@
+''' Exact best response and exploitability for small hold'em games
+'''
+import itertools
+from functools import cmp_to_key
+from math import factorial
+
+import numpy as np
+
+from rlcard.utils.utils import rank2int, init_standard_deck
+from rlcard.games.base import Card
+
+def _comb(n, k):
+    ''' The number of ways to choose k items out of n. `math.comb` needs Python 3.8
+    '''
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+class _FixedRandomState(np.random.RandomState):
+    ''' A random generator that always chooses the given integer. It is used
+        to start a game with a chosen small blind.
+    '''
+    def __init__(self, value):
+        super().__init__(0)
+        self.value = value
+
+    def randint(self, low, high=None, size=None, dtype=int):
+        return self.value
+
+class PublicTreeBestResponse(object):
+    '''
+    Compute the exact best response against a fixed policy in two-player
+    Leduc Hold'em or Limit Texas Hold'em.
+
+    The public tree (the betting actions and the public cards) is walked once
+    for each best-responding player, and the reach probabilities of the
+    opponent are kept as a vector over all the private hands. The chance
+    probabilities of the private and public cards are applied at the terminals
+    with masks of the compatible hands.
+
+    Limit Texas Hold'em with the full deck is far too large. A small config
+    can be solved by giving a reduced deck of at least nine cards and by
+    lowering `env.game.allowed_raise_num`.
+    '''
+    def __init__(self, env, policy, deck=None):
+        ''' Initialize the evaluator
+
+        Args:
+            env (Env): A 'leduc-holdem' or 'limit-holdem' environment that allows step back
+            policy (callable): A function that takes a state of the environment and
+                returns the action probabilities, a numpy array of length num_actions
+            deck (list): The cards of the game, e.g. ['SA', 'HA', ...]. By default,
+                the deck of the game is used
+        '''
+        if env.name not in ('leduc-holdem', 'limit-holdem'):
+            raise ValueError('Best response is only supported in leduc-holdem and limit-holdem')
+        if env.num_players != 2:
+            raise ValueError('Best response is only supported in two-player games')
+        if not env.allow_step_back:
+            raise ValueError('The environment must allow step back')
+        self.env = env
+        self.game = env.game
+        self.policy = policy
+        self.is_leduc = env.name == 'leduc-holdem'
+
+        if deck is None:
+            if self.is_leduc:
+                deck = [s + r for r in 'JQK' for s in 'SH']
+            else:
+                deck = [card.get_index() for card in init_standard_deck()]
+        self.deck = [Card(card[0], card[1]) for card in deck]
+        self.cards_per_hand = 1 if self.is_leduc else 2
+        num_public_cards = 1 if self.is_leduc else 5
+        if len(self.deck) < 2 * self.cards_per_hand + num_public_cards:
+            raise ValueError('The deck is too small to deal the private and public cards')
+
+        # The private hands and the masks of the compatible hands
+        self.hands = list(itertools.combinations(range(len(self.deck)), self.cards_per_hand))
+        self.hand_masks = np.zeros((len(self.hands), len(self.deck)), dtype=bool)
+        for i, hand in enumerate(self.hands):
+            self.hand_masks[i, list(hand)] = True
+        self.compatible = ~(self.hand_masks.astype(np.int64) @ self.hand_masks.T.astype(np.int64)).astype(bool)
+        self.num_deals = int(self.compatible.sum())
+        # The masks of the terminals only depend on the public cards
+        self._showdown_cache = {}
+        self._candidates_cache = {}
+
+    def best_response_value(self, player_id):
+        ''' Compute the expected payoff of the best response of a player against the policy
+
+        Args:
+            player_id (int): The best-responding player
+
+        Returns:
+            (float): The value of the best response
+        '''
+        value = 0.0
+        for small_blind in range(self.env.num_players):
+            self._reset(small_blind)
+            values = self._walk(player_id, np.ones(len(self.hands)), [], 1.0)
+            value += values.sum()
+        return value / self.env.num_players / self.num_deals
+
+    def exploitability(self):
+        ''' Compute the exploitability of the policy, i.e., the average gain of the
+            best responses of the two players. It is zero for a Nash equilibrium.
+
+        Returns:
+            (float): The exploitability
+        '''
+        return sum(self.best_response_value(player_id) for player_id in range(self.env.num_players)) / self.env.num_players
+
+    def _reset(self, small_blind):
+        ''' Start a game with the given small blind
+        '''
+        np_random = self.game.np_random
+        self.game.np_random = _FixedRandomState(small_blind)
+        self.env.reset()
+        self.game.np_random = np_random
+
+    def _board(self):
+        if self.is_leduc:
+            return [self.game.public_card] if self.game.public_card is not None else []
+        return list(self.game.public_cards)
+
+    def _board_mask(self):
+        ''' Get the hands that do not conflict with the public cards
+        '''
+        board = set(card.get_index() for card in self._board())
+        board_ids = [i for i, card in enumerate(self.deck) if card.get_index() in board]
+        return ~self.hand_masks[:, board_ids].any(axis=1)
+
+    def _set_hand(self, player_id, hand):
+        cards = [self.deck[i] for i in hand]
+        self.game.players[player_id].hand = cards[0] if self.is_leduc else cards
+
+    def _walk(self, player_id, opponent_reach, path, chance_prob):
+        ''' Walk the public tree from the current state
+
+        Args:
+            player_id (int): The best-responding player
+            opponent_reach (numpy.array): The reach probabilities of the opponent for each hand
+            path (list): The actions from the root, which identify the public state
+            chance_prob (float): The probability of the public cards
+
+        Returns:
+            (numpy.array): The values of the best-responding player for each private hand,
+                weighted by the reach probabilities of the opponent and chance
+        '''
+        if self.env.is_over():
+            return self._terminal_values(player_id, opponent_reach) * chance_prob
+
+        current_player = self.env.get_player_id()
+        legal_actions = [self.env.actions.index(action) for action in self.game.get_legal_actions()]
+
+        if current_player == player_id:
+            values = None
+            for action in legal_actions:
+                action_values = self._step(player_id, action, opponent_reach, path, chance_prob)
+                values = action_values if values is None else np.maximum(values, action_values)
+            return values
+
+        action_probs = self._opponent_policy(current_player, legal_actions)
+        values = np.zeros(len(self.hands))
+        for i, action in enumerate(legal_actions):
+            reach = opponent_reach * action_probs[:, i]
+            if not reach.any():
+                continue
+            values += self._step(player_id, action, reach, path, chance_prob)
+        return values
+
+    def _step(self, player_id, action, opponent_reach, path, chance_prob):
+        ''' Take an action and walk the subtree. If the action deals public cards,
+            all the possible public cards are enumerated.
+        '''
+        board = self._board()
+        # The dealer deals from the end of the deck, so any card that is not
+        # public can be dealt. The dealt cards are replaced below
+        board_key = tuple(card.get_index() for card in board)
+        if board_key not in self._candidates_cache:
+            self._candidates_cache[board_key] = [card for card in self.deck if card.get_index() not in board_key]
+        candidates = self._candidates_cache[board_key]
+        self.game.dealer.deck = list(candidates)
+        self.env.step(action)
+        num_dealt = len(self._board()) - len(board)
+        if num_dealt == 0:
+            values = self._walk(player_id, opponent_reach, path + [action], chance_prob)
+            self.env.step_back()
+            return values
+
+        # The private cards of both players are not in the remaining deck
+        num_remaining = len(self.deck) - len(board) - 2 * self.cards_per_hand
+        prob = chance_prob / _comb(num_remaining, num_dealt)
+        values = np.zeros(len(self.hands))
+        for cards in itertools.combinations(candidates, num_dealt):
+            self._set_dealt_cards(cards)
+            values += self._walk(player_id, opponent_reach, path + [action] + list(cards), prob)
+        self.env.step_back()
+        return values
+
+    def _set_dealt_cards(self, cards):
+        ''' Replace the public cards dealt in the last step
+        '''
+        if self.is_leduc:
+            self.game.public_card = cards[0]
+        else:
+            self.game.public_cards[-len(cards):] = cards
+
+    def _opponent_policy(self, player_id, legal_actions):
+        ''' Query the policy for all the private hands of a player
+
+        Returns:
+            (numpy.array): The probabilities of the legal actions, (num_hands, num_legal_actions)
+        '''
+        board_mask = self._board_mask()
+        action_probs = np.zeros((len(self.hands), len(legal_actions)))
+        original_hand = self.game.players[player_id].hand
+        for i, hand in enumerate(self.hands):
+            if not board_mask[i]:
+                continue
+            self._set_hand(player_id, hand)
+            probs = np.asarray(self.policy(self.env.get_state(player_id)), dtype=np.float64)[legal_actions]
+            total = probs.sum()
+            action_probs[i] = probs / total if total > 0 else 1.0 / len(legal_actions)
+        self.game.players[player_id].hand = original_hand
+        return action_probs
+
+    def _terminal_values(self, player_id, opponent_reach):
+        ''' Compute the values of the best-responding player at a terminal
+
+        Returns:
+            (numpy.array): The values for each private hand
+        '''
+        compatible, win, lose, tie = self._showdown_masks()
+        players = self.game.players
+        big_blind = self.game.big_blind
+        win_chips = players[1 - player_id].in_chips / big_blind
+        lose_chips = players[player_id].in_chips / big_blind
+        if players[player_id].status == 'folded':
+            return -lose_chips * (compatible @ opponent_reach)
+        if players[1 - player_id].status == 'folded':
+            return win_chips * (compatible @ opponent_reach)
+
+        # Showdown
+        return (win_chips * (win @ opponent_reach)
+                - lose_chips * (lose @ opponent_reach)
+                + (win_chips - lose_chips) / 2 * (tie @ opponent_reach))
+
+    def _showdown_masks(self):
+        ''' Get the pairs of private hands that are compatible with the public
+            cards, and the pairs that win, lose and tie at the showdown
+
+        Returns:
+            (tuple): Four float matrices of shape (num_hands, num_hands)
+        '''
+        key = tuple(sorted(card.get_index() for card in self._board()))
+        if key not in self._showdown_cache:
+            board_mask = self._board_mask()
+            compatible = self.compatible & board_mask[:, None] & board_mask[None, :]
+            if len(key) == (1 if self.is_leduc else 5):
+                strength = self._hand_strength(board_mask)
+                difference = strength[:, None] - strength[None, :]
+            else:
+                difference = np.zeros(compatible.shape)
+            self._showdown_cache[key] = tuple((compatible & condition).astype(np.float64) for condition in
+                                              (True, difference > 0, difference < 0, difference == 0))
+        return self._showdown_cache[key]
+
+    def _hand_strength(self, board_mask):
+        ''' Rank the private hands at the showdown. A stronger hand has a larger value
+
+        Args:
+            board_mask (numpy.array): The hands that do not conflict with the public cards
+
+        Returns:
+            (numpy.array): The strength of each hand
+        '''
+        board = self._board()
+        strength = np.zeros(len(self.hands))
+        if self.is_leduc:
+            for i, hand in enumerate(self.hands):
+                card = self.deck[hand[0]]
+                strength[i] = rank2int(card.rank) + (100 if card.rank == board[0].rank else 0)
+            return strength
+
+        from rlcard.games.limitholdem.utils import compare_hands
+        board = [card.get_index() for card in board]
+        valid = [i for i in range(len(self.hands)) if board_mask[i]]
+        cards = {i: [self.deck[c].get_index() for c in self.hands[i]] + board for i in valid}
+        def compare(a, b):
+            winners = compare_hands([cards[a], cards[b]])
+            return winners[0] - winners[1]
+        ordered = sorted(valid, key=cmp_to_key(compare))
+        rank = 0
+        for k, i in enumerate(ordered):
+            if k > 0 and compare(ordered[k - 1], i) < 0:
+                rank += 1
+            strength[i] = rank
+        return strength
+
+def agent_policy(agent, num_actions):
+    ''' Convert an agent whose `eval_step` returns the action probabilities in
+        `info['probs']` (e.g., CFRAgent, NFSPAgent and RandomAgent) into a policy
+
+    Args:
+        agent (object): The agent
+        num_actions (int): The number of actions of the environment
+
+    Returns:
+        (callable): A function that takes a state and returns the action probabilities
+    '''
+    def policy(state):
+        _, info = agent.eval_step(state)
+        probs = np.zeros(num_actions)
+        for action, raw_action in zip(state['legal_actions'].keys(), state['raw_legal_actions']):
+            probs[action] = info['probs'][raw_action]
+        return probs
+    return policy
+
+def exploitability(env, policy, deck=None):
+    ''' Compute the exploitability of a policy in two-player Leduc Hold'em or
+        small Limit Texas Hold'em configs. See PublicTreeBestResponse.
+
+    Args:
+        env (Env): The environment, which must allow step back
+        policy (callable or object): A function that takes a state and returns the
+            action probabilities, or an agent supported by `agent_policy`
+        deck (list): The cards of the game. By default, the deck of the game is used
+
+    Returns:
+        (float): The exploitability
+    '''
+    if not callable(policy):
+        policy = agent_policy(policy, env.num_actions)
+    return PublicTreeBestResponse(env, policy, deck).exploitability()
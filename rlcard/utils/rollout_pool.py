@@ -0,0 +1,233 @@
+''' A pool of worker processes that generate episodes in parallel
+'''
+import sys
+import copy
+import random
+import traceback
+import multiprocessing as mp
+
+import numpy as np
+
+def _seed_episode(seed):
+    ''' Seed the global random generators used by the agents
+    '''
+    np.random.seed(seed % (2**32))
+    random.seed(seed)
+    # Only the agents that use torch have imported it
+    if 'torch' in sys.modules:
+        sys.modules['torch'].manual_seed(seed)
+
+# The attributes of the agents that hold the replay buffers. The buffers are
+# only used for training, so they are not sent to the workers
+_BUFFER_ATTRIBUTES = ('memory', '_reservoir_buffer')
+
+def _strip_buffers(agent):
+    ''' Get a shallow copy of an agent without its replay buffers, including
+        the ones of the agents it holds, e.g. the DQN agent of NFSP
+
+    Args:
+        agent (object): The agent
+
+    Returns:
+        (object): The copy, which shares the networks of the agent
+    '''
+    if not hasattr(agent, '__dict__'):
+        return agent
+    stripped = copy.copy(agent)
+    for name, value in vars(agent).items():
+        if name in _BUFFER_ATTRIBUTES:
+            setattr(stripped, name, None)
+        elif hasattr(value, 'use_raw') and hasattr(value, 'eval_step'):
+            setattr(stripped, name, _strip_buffers(value))
+    return stripped
+
+def _rollout_worker(env_id, config, seed, task_queue, result_queue):
+    ''' The loop of a worker process. The worker owns one environment and
+        handles the commands sent by the RolloutPool in order.
+
+    Args:
+        env_id (string): The name of the environment
+        config (dict): The config of the environment
+        seed (int): The base seed. Episode i is played with seed + i
+        task_queue (Queue): The commands of this worker
+        result_queue (Queue): The queue shared by all the workers for the results.
+            The results are tagged with the id of the run they belong to
+    '''
+    import rlcard
+    env = rlcard.make(env_id, config)
+    while True:
+        command, args = task_queue.get()
+        if command == 'close':
+            break
+        run_id = None
+        try:
+            if command == 'agents':
+                env.set_agents(args)
+            elif command == 'run':
+                run_id, indices, is_training = args
+                for index in indices:
+                    if seed is not None:
+                        env.seed(seed + index)
+                        _seed_episode(seed + index)
+                    trajectories, payoffs = env.run(is_training=is_training)
+                    result_queue.put((run_id, 'episode', index, (trajectories, payoffs)))
+        except Exception:
+            result_queue.put((run_id, 'error', None, traceback.format_exc()))
+
+class RolloutPool(object):
+    '''
+    RolloutPool spawns worker processes that each own a copy of an environment,
+    receive the agents by broadcast and stream the finished episodes back
+    through a queue. Episode i of the pool is always played with the seed
+    `seed + i`, so the results only depend on the seed and not on the number
+    of workers or on the scheduling of the processes.
+
+    Example:
+        with RolloutPool('leduc-holdem', num_workers=4, seed=0) as pool:
+            pool.set_agents(agents)
+            payoffs = pool.tournament(10000)
+    '''
+    def __init__(self, env_id, num_workers=None, config={}, seed=None, chunk_size=None):
+        ''' Initialize the pool and start the workers
+
+        Args:
+            env_id (string): The name of the environment
+            num_workers (int): The number of worker processes. Defaults to the number of cores
+            config (dict): The config of the environment
+            seed (int): The base seed of the episodes. If None, the episodes are not seeded
+            chunk_size (int): The number of episodes sent to a worker at a time. By default,
+                every run is split into about four chunks per worker
+        '''
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        if num_workers < 1:
+            raise ValueError('RolloutPool needs at least one worker')
+        self.env_id = env_id
+        self.num_workers = num_workers
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.num_episodes = 0
+        self.num_runs = 0
+
+        import rlcard
+        self.num_players = rlcard.make(env_id, config).num_players
+
+        ctx = mp.get_context('spawn')
+        self.result_queue = ctx.Queue()
+        self.task_queues = []
+        self.workers = []
+        for _ in range(num_workers):
+            task_queue = ctx.Queue()
+            worker = ctx.Process(
+                target=_rollout_worker,
+                args=(env_id, config, seed, task_queue, self.result_queue),
+                daemon=True)
+            worker.start()
+            self.task_queues.append(task_queue)
+            self.workers.append(worker)
+
+    def set_agents(self, agents):
+        ''' Broadcast the agents, including their current weights, to all the
+            workers. It should be called again whenever the weights change.
+            The replay buffers of the agents are not sent.
+
+        Args:
+            agents (list): List of Agent classes
+        '''
+        agents = [_strip_buffers(agent) for agent in agents]
+        for task_queue in self.task_queues:
+            task_queue.put(('agents', agents))
+
+    def imap(self, num, is_training=False):
+        ''' Generate episodes and yield them as soon as they are finished
+
+        Args:
+            num (int): The number of episodes
+            is_training (boolean): True if for training purpose
+
+        Yields:
+            (tuple): (index, trajectories, payoffs), where index is the index of the
+                episode within this call. The order depends on the scheduling
+
+        Note: The results left in the queue by an earlier call, which failed or
+            was not read to the end, are dropped.
+        '''
+        run_id = self.num_runs
+        self.num_runs += 1
+        start = self.num_episodes
+        self.num_episodes += num
+        chunk_size = self.chunk_size or max(1, -(-num // (4 * self.num_workers)))
+        for k, offset in enumerate(range(0, num, chunk_size)):
+            indices = list(range(start + offset, start + min(offset + chunk_size, num)))
+            self.task_queues[k % self.num_workers].put(('run', (run_id, indices, is_training)))
+
+        received = 0
+        while received < num:
+            result_run_id, kind, index, result = self.result_queue.get()
+            # The errors of the agents command are not tagged with a run
+            if result_run_id is not None and result_run_id != run_id:
+                continue
+            received += 1
+            if kind == 'error':
+                raise Exception('Rollout worker failed:\n' + result)
+            yield (index - start,) + tuple(result)
+
+    def run(self, num, is_training=False):
+        ''' Generate episodes in parallel
+
+        Args:
+            num (int): The number of episodes
+            is_training (boolean): True if for training purpose
+
+        Returns:
+            (tuple) Tuple containing:
+
+                (list): A list of trajectories, one for each episode. See `Env.run`.
+                (list): A list of payoffs, one for each episode.
+
+            Both lists are in the order of the episodes, so that the results
+            are deterministic for a given seed.
+        '''
+        trajectories = [None for _ in range(num)]
+        payoffs = [None for _ in range(num)]
+        for index, _trajectories, _payoffs in self.imap(num, is_training):
+            trajectories[index] = _trajectories
+            payoffs[index] = _payoffs
+        return trajectories, payoffs
+
+    def tournament(self, num):
+        ''' Evaluate the performance of the agents in parallel. See `rlcard.utils.tournament`.
+
+        Args:
+            num (int): The number of games to play.
+
+        Returns:
+            A list of average payoffs for each player
+        '''
+        # Sum in the order of the episodes so that the result is deterministic
+        results = [None for _ in range(num)]
+        for index, _, _payoffs in self.imap(num, is_training=False):
+            results[index] = _payoffs
+        payoffs = [0 for _ in range(self.num_players)]
+        for _payoffs in results:
+            for i, _ in enumerate(payoffs):
+                payoffs[i] += _payoffs[i]
+        for i, _ in enumerate(payoffs):
+            payoffs[i] /= num
+        return payoffs
+
+    def close(self):
+        ''' Stop the workers
+        '''
+        for task_queue in self.task_queues:
+            task_queue.put(('close', None))
+        for worker in self.workers:
+            worker.join()
+        self.task_queues = []
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
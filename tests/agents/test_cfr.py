@@ -1,3 +1,6 @@
+import os
+import pickle
+import tempfile
 import unittest
 import numpy as np
 
@@ -35,3 +38,37 @@ class TestNFSP(unittest.TestCase):
         self.assertEqual(len(agent.regrets), len(new_agent.regrets))
         self.assertEqual(agent.iteration, new_agent.iteration)
 
+    def test_load_legacy(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        keys = [b'a', b'b']
+        # The pickled dicts of the models saved before the tables
+        legacy = {'regrets.pkl': {b'a': np.array([1., -1., 0., 0.]), b'b': np.array([0., 2., 2., 0.])},
+                  'average_policy.pkl': {b'a': np.array([3., 1., 0., 0.]), b'b': np.zeros(4)},
+                  'policy.pkl': {b'a': np.array([1., 0., 0., 0.]), b'b': np.array([0., .5, .5, 0.])},
+                  'iteration.pkl': 7}
+        with tempfile.TemporaryDirectory() as path:
+            for filename, value in legacy.items():
+                with open(os.path.join(path, filename), 'wb') as f:
+                    pickle.dump(value, f)
+            agent = CFRAgent(env, model_path=path)
+            agent.load()
+        self.assertEqual(agent.iteration, 7)
+        self.assertEqual(agent.table.keys, keys)
+        self.assertEqual(agent.table.regrets.tolist(), [[1, -1, 0, 0], [0, 2, 2, 0]])
+        self.assertEqual(agent.table.strategy_sum.tolist(), [[3, 1, 0, 0], [0, 0, 0, 0]])
+        self.assertEqual(agent.table.policy.tolist(), [[1, 0, 0, 0], [0, .5, .5, 0]])
+
+
+    def test_update_rules(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        for update_rule in CFRAgent.UPDATE_RULES:
+            for alternating in [False, True]:
+                agent = CFRAgent(env, update_rule=update_rule, alternating=alternating)
+                for _ in range(5):
+                    agent.train()
+                self.assertTrue(np.allclose(agent.policy.sum(axis=1), 1))
+                if update_rule == 'cfr+':
+                    self.assertGreaterEqual(agent.regrets.min(), 0)
+
+        with self.assertRaises(ValueError):
+            CFRAgent(env, update_rule='unknown')
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from rlcard.agents.cfr_table import CFRTable
+
+class TestCFRTable(unittest.TestCase):
+
+    def test_index(self):
+        table = CFRTable(3, capacity=1)
+        self.assertEqual(table.index(b'a'), 0)
+        self.assertEqual(table.index(b'b'), 1)
+        self.assertEqual(table.index(b'a'), 0)
+        self.assertEqual(table.get(b'c'), None)
+        self.assertIn(b'b', table)
+        self.assertEqual(len(table), 2)
+        self.assertGreaterEqual(table.capacity, 2)
+        self.assertTrue(np.allclose(table.policy, 1.0 / 3))
+
+    def test_regret_matching(self):
+        table = CFRTable(3)
+        table.index(b'a')
+        table.index(b'b')
+        table.regrets[0] = [1.0, -1.0, 3.0]
+        table.regrets[1] = [-1.0, 0.0, -2.0]
+        table.update_policy()
+        self.assertTrue(np.allclose(table.policy[0], [0.25, 0.0, 0.75]))
+        self.assertTrue(np.allclose(table.policy[1], [1.0 / 3] * 3))
+
+    def test_memmap_and_save_and_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            table = CFRTable(2, capacity=1, memmap_dir=os.path.join(tmp_dir, 'memmap'))
+            for i in range(10):
+                infoset_id = table.index(i)
+                table.strategy_sum[infoset_id] = [i, 1]
+            self.assertIsInstance(table.strategy_sum, np.memmap)
+            self.assertEqual(table.strategy_sum[3, 0], 3)
+            table.save(os.path.join(tmp_dir, 'model'))
+
+            new_table = CFRTable(2)
+            self.assertTrue(CFRTable.exists(os.path.join(tmp_dir, 'model')))
+            new_table.load(os.path.join(tmp_dir, 'model'))
+            self.assertEqual(new_table.get(7), 7)
+            self.assertTrue(np.array_equal(new_table.strategy_sum, table.strategy_sum))
+            self.assertTrue(np.allclose(new_table.average_policy()[0], [0, 1]))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
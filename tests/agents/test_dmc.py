@@ -0,0 +1,335 @@
+import csv
+import gzip
+import logging
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+import numpy as np
+import torch
+
+from rlcard.agents.dmc_agent.model import DMCAgent, DMCModel
+from rlcard.agents.dmc_agent import utils
+from rlcard.agents.dmc_agent.checkpoint import CheckpointWriter
+from rlcard.agents.dmc_agent.file_writer import FileWriter, load_columns
+from rlcard.agents.dmc_agent.utils import ParameterServer, TrajectoryStager, plan_cpus
+
+
+class TestDMCModel(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.agent = DMCAgent(state_shape=[6], action_shape=[5], mlp_layers=[16, 16], device='cpu')
+        rng = np.random.RandomState(0)
+        self.states = []
+        for legal in [[0, 2], [1, 2, 3, 4], [4]]:
+            self.states.append({'obs': rng.rand(6),
+                                'legal_actions': OrderedDict((a, None) for a in legal),
+                                'raw_legal_actions': legal})
+
+    def test_forward_split(self):
+        net = self.agent.net
+        obs = torch.rand(3, 6)
+        actions = torch.rand(7, 5)
+        state_index = torch.tensor([0, 0, 1, 1, 1, 2, 2])
+        with torch.no_grad():
+            expected = net.forward(obs[state_index], actions)
+            values = net.forward_split(obs, actions, state_index)
+        self.assertEqual(values.shape, (7,))
+        self.assertTrue(torch.allclose(values, expected, atol=1e-6))
+
+    def test_predict_batch(self):
+        batch = self.agent.predict_batch(self.states)
+        self.assertEqual(len(batch), len(self.states))
+        for state, (keys, values) in zip(self.states, batch):
+            single_keys, single_values = self.agent.predict(state)
+            self.assertEqual(keys.tolist(), list(state['legal_actions']))
+            self.assertEqual(keys.tolist(), single_keys.tolist())
+            self.assertTrue(np.allclose(values, single_values, atol=1e-6))
+
+            # The actions are one-hot encoded and the observation repeated per action
+            obs = torch.tensor(np.tile(state['obs'], (len(keys), 1)), dtype=torch.float32)
+            with torch.no_grad():
+                expected = self.agent.forward(obs, torch.eye(5)[keys]).numpy()
+            self.assertTrue(np.allclose(values, expected, atol=1e-6))
+
+        actions, infos = self.agent.eval_step_batch(self.states)
+        for state, action, info in zip(self.states, actions, infos):
+            self.assertIn(action, state['legal_actions'])
+            self.assertEqual(len(info['values']), len(state['legal_actions']))
+
+class TestTrajectoryStager(unittest.TestCase):
+
+    def _episode(self, first, num_steps):
+        # The observations and the actions hold the index of the transition
+        states = np.arange(first, first + num_steps, dtype=np.int8).reshape(-1, 1).repeat(2, axis=1)
+        return states, states[:, :1].copy()
+
+    def _buffers(self, T, num_buffers=2):
+        return dict(
+            done=[torch.zeros(T, dtype=torch.bool) for _ in range(num_buffers)],
+            episode_return=[torch.zeros(T) for _ in range(num_buffers)],
+            target=[torch.zeros(T) for _ in range(num_buffers)],
+            state=[torch.zeros((T, 2), dtype=torch.int8) for _ in range(num_buffers)],
+            action=[torch.zeros((T, 1), dtype=torch.int8) for _ in range(num_buffers)],
+        )
+
+    def test_ring_wrap_around(self):
+        stager = TrajectoryStager(3, [2], [1], capacity=4)
+        buffers = self._buffers(3)
+        stager.add_episode(*self._episode(0, 2), payoff=1)
+        stager.add_episode(*self._episode(2, 2), payoff=-1)
+        self.assertEqual(len(stager), 4)
+        stager.flush(buffers, 0)
+        self.assertEqual(len(stager), 1)
+        self.assertEqual(buffers['state'][0][:, 0].tolist(), [0, 1, 2])
+        self.assertEqual(buffers['done'][0].tolist(), [False, True, False])
+        self.assertEqual(buffers['episode_return'][0].tolist(), [0, 1, 0])
+        self.assertEqual(buffers['target'][0].tolist(), [1, 1, -1])
+
+        # The next episode is written at the beginning of the arrays, so the
+        # next rollout is copied from the end and from the beginning
+        stager.add_episode(*self._episode(4, 3), payoff=2)
+        self.assertEqual(stager.capacity, 4)
+        self.assertEqual(stager.start, 3)
+        stager.flush(buffers, 1)
+        self.assertEqual(buffers['state'][1][:, 0].tolist(), [3, 4, 5])
+        self.assertEqual(buffers['action'][1][:, 0].tolist(), [3, 4, 5])
+        self.assertEqual(buffers['done'][1].tolist(), [True, False, False])
+        self.assertEqual(buffers['target'][1].tolist(), [-1, 2, 2])
+        self.assertEqual(len(stager), 1)
+
+    def test_grow(self):
+        stager = TrajectoryStager(3, [2], [1], capacity=4)
+        buffers = self._buffers(3)
+        stager.add_episode(*self._episode(0, 3), payoff=1)
+        stager.flush(buffers, 0)
+        # The ring wraps, then grows and keeps the order of the transitions
+        stager.add_episode(*self._episode(3, 2), payoff=1)
+        stager.add_episode(*self._episode(5, 4), payoff=-1)
+        self.assertEqual(len(stager), 6)
+        self.assertGreaterEqual(stager.capacity, 6)
+        stager.flush(buffers, 0)
+        stager.flush(buffers, 1)
+        self.assertEqual(buffers['state'][0][:, 0].tolist(), [3, 4, 5])
+        self.assertEqual(buffers['state'][1][:, 0].tolist(), [6, 7, 8])
+        self.assertEqual(len(stager), 0)
+
+class TestParameterServer(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.learner = DMCModel([[6], [4]], [[5], [5]], mlp_layers=[8], device='cpu')
+        self.server = ParameterServer(self.learner, num_players=2, num_workers=2, sync_interval=2)
+        self.actor = DMCModel([[6], [4]], [[5], [5]], mlp_layers=[8], device='cpu')
+
+    def _assert_equal_weights(self, model, other, position):
+        for param, other_param in zip(model.parameters(position), other.parameters(position)):
+            self.assertTrue(torch.equal(param, other_param))
+
+    def _perturb(self, position):
+        with torch.no_grad():
+            for param in self.learner.parameters(position):
+                param.add_(1)
+
+    def test_publish_and_pull(self):
+        self.assertEqual(self.server.versions.tolist(), [1, 1])
+        self.server.sync(self.actor, 0)
+        self.assertEqual(self.server.worker_versions[0].tolist(), [1, 1])
+        for position in range(2):
+            self._assert_equal_weights(self.actor, self.learner, position)
+        self.assertEqual(self.server.staleness(0), 0.5)
+
+        # Only every second update is published
+        self._perturb(0)
+        self.server.update(0, self.learner.parameters(0))
+        self.assertEqual(self.server.versions.tolist(), [1, 1])
+        self.server.update(0, self.learner.parameters(0))
+        self.assertEqual(self.server.versions.tolist(), [2, 1])
+        self.assertEqual(self.server.staleness(0), 1.5)
+
+        self.server.sync(self.actor, 0)
+        self.assertEqual(self.server.worker_versions[0].tolist(), [2, 1])
+        self._assert_equal_weights(self.actor, self.learner, 0)
+
+        # An up to date actor does not copy the weights
+        with torch.no_grad():
+            next(self.actor.parameters(0)).zero_()
+        self.assertEqual(self.server.pull(0, self.actor.parameters(0), 2), 2)
+        self.assertEqual(next(self.actor.parameters(0)).abs().sum().item(), 0)
+
+    def test_torn_version(self):
+        self.server.sync(self.actor, 0)
+        self._perturb(0)
+        self.server.publish(0, self.learner.parameters(0))
+
+        # The slot of the latest version is being written
+        self.server.slot_versions[0, 0] = -1
+        self.assertEqual(self.server.pull(0, self.actor.parameters(0), 1), 1)
+        self.server.sync(self.actor, 0)
+        self.assertEqual(self.server.worker_versions[0, 0].item(), 1)
+        self.assertFalse(torch.equal(next(self.actor.parameters(0)), next(self.learner.parameters(0))))
+
+        # The slot holds another version than the latest one
+        self.server.slot_versions[0, 0] = 4
+        self.assertEqual(self.server.pull(0, self.actor.parameters(0), 1), 1)
+
+        # The pull is retried once the write is done
+        self.server.slot_versions[0, 0] = 2
+        self.server.sync(self.actor, 0)
+        self.assertEqual(self.server.worker_versions[0, 0].item(), 2)
+        self._assert_equal_weights(self.actor, self.learner, 0)
+
+class TestPlanCPUs(unittest.TestCase):
+
+    def test_plan_cpus(self):
+        learner_cpus, actor_cpus = plan_cpus(cpus=[7, 0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(learner_cpus, [0, 1])
+        self.assertEqual(actor_cpus, [[2], [3], [4], [5], [6], [7]])
+
+        # More actors than cores share the cores of the actors
+        learner_cpus, actor_cpus = plan_cpus(num_actors=5, cpus=[0, 1, 2, 3], learner_fraction=0.5)
+        self.assertEqual(learner_cpus, [0, 1])
+        self.assertEqual(actor_cpus, [[2], [3], [2], [3], [2]])
+
+        # The learner keeps at least one core
+        learner_cpus, actor_cpus = plan_cpus(num_actors=2, cpus=[0, 1], learner_fraction=0.1)
+        self.assertEqual(learner_cpus, [0])
+        self.assertEqual(actor_cpus, [[1], [1]])
+
+        # A single core is shared by everyone
+        learner_cpus, actor_cpus = plan_cpus(num_actors=3, cpus=[4])
+        self.assertEqual(learner_cpus, [4])
+        self.assertEqual(actor_cpus, [[4], [4], [4]])
+
+    def test_no_affinity(self):
+        # The platforms without sched_getaffinity and sched_setaffinity, e.g. macOS
+        no_affinity = mock.Mock(spec=['cpu_count'])
+        no_affinity.cpu_count.return_value = 4
+        with mock.patch.object(utils, 'os', no_affinity):
+            self.assertEqual(utils.available_cpus(), [0, 1, 2, 3])
+            learner_cpus, actor_cpus = plan_cpus()
+            self.assertEqual(learner_cpus, [0])
+            self.assertEqual(actor_cpus, [[1], [2], [3]])
+
+            with mock.patch.object(utils.torch, 'set_num_threads') as set_num_threads:
+                utils.set_cpu_affinity([1, 2])
+            set_num_threads.assert_called_once_with(2)
+
+        affinity = mock.Mock(spec=['sched_getaffinity', 'sched_setaffinity'])
+        with mock.patch.object(utils, 'os', affinity), \
+                mock.patch.object(utils.torch, 'set_num_threads') as set_num_threads:
+            utils.set_cpu_affinity([1, 2])
+        affinity.sched_setaffinity.assert_called_once_with(0, [1, 2])
+        set_num_threads.assert_called_once_with(2)
+
+class TestCheckpointWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'model.tar')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _checkpoint(self, frames):
+        return {'frames': frames, 'weights': torch.full((3, 2), float(frames))}
+
+    def test_rotation(self):
+        writer = CheckpointWriter(self.path, keep=3)
+        self.assertIsNone(writer.load())
+        for frames in range(4):
+            writer.save(self._checkpoint(frames))
+        writer.wait()
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['model.tar', 'model.tar.1', 'model.tar.2'])
+        for k, frames in enumerate([3, 2, 1]):
+            path = self.path if k == 0 else '{}.{}'.format(self.path, k)
+            self.assertEqual(torch.load(path)['frames'], frames)
+
+        checkpoint = writer.load()
+        self.assertEqual(checkpoint['frames'], 3)
+        self.assertTrue(torch.equal(checkpoint['weights'], torch.full((3, 2), 3.0)))
+
+        # The rotated checkpoint is loaded if the latest one is missing
+        os.remove(self.path)
+        self.assertEqual(writer.load()['frames'], 2)
+
+    def test_snapshot(self):
+        writer = CheckpointWriter(self.path)
+        checkpoint = self._checkpoint(1)
+        writer.save(checkpoint, extra={os.path.join(self.tmp_dir.name, 'weights.pth'): checkpoint['weights']})
+        # The training can go on while the checkpoint is written
+        checkpoint['weights'].zero_()
+        writer.wait()
+        self.assertFalse(os.path.exists(self.path + '.1'))
+        self.assertTrue(torch.equal(writer.load()['weights'], torch.ones(3, 2)))
+        weights = torch.load(os.path.join(self.tmp_dir.name, 'weights.pth'))
+        self.assertTrue(torch.equal(weights, torch.ones(3, 2)))
+
+    def test_gzip(self):
+        writer = CheckpointWriter(self.path, compress=True, keep=2)
+        writer.save(self._checkpoint(1))
+        writer.save(self._checkpoint(2))
+        writer.wait()
+        with gzip.open(self.path, 'rb') as f:
+            f.read(1)
+        checkpoint = writer.load(map_location='cpu')
+        self.assertEqual(checkpoint['frames'], 2)
+        self.assertTrue(torch.equal(checkpoint['weights'], torch.full((3, 2), 2.0)))
+
+        # An uncompressed writer loads the compressed checkpoints as well
+        self.assertEqual(CheckpointWriter(self.path).load()['frames'], 2)
+
+class TestFileWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.logger = logging.getLogger('palaas/out')
+        self.handlers = list(self.logger.handlers)
+
+    def tearDown(self):
+        # Every writer adds its handlers to the shared logger
+        for handler in self.logger.handlers[len(self.handlers):]:
+            handler.close()
+        self.logger.handlers = self.handlers
+        self.tmp_dir.cleanup()
+
+    def _writer(self, **kwargs):
+        return FileWriter(xpid='test', rootdir=self.tmp_dir.name, flush_rows=100, flush_secs=60, **kwargs)
+
+    def test_flush_on_close(self):
+        writer = self._writer()
+        for i in range(3):
+            writer.log({'loss': i / 2})
+        # The rows are buffered until the writer is closed
+        self.assertFalse(os.path.exists(writer.paths['logs']))
+        writer.close()
+        with open(writer.paths['logs']) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], '# _tick,_time,loss')
+        rows = list(csv.DictReader(lines[1:], fieldnames=lines[0][2:].split(',')))
+        self.assertEqual([row['_tick'] for row in rows], ['0', '1', '2'])
+        self.assertEqual([float(row['loss']) for row in rows], [0, 0.5, 1])
+        with open(writer.paths['meta']) as f:
+            self.assertIn('"successful": true', f.read())
+
+    def test_load_columns(self):
+        writer = self._writer(columnar=True)
+        writer.log({'loss': 1.0})
+        writer.log({'loss': 2.0})
+        writer.flush()
+        # A field logged later is missing from the first chunk
+        writer.log({'loss': 3.0, 'return': -1.0})
+        writer.close()
+        self.assertEqual(len(os.listdir(os.path.join(writer.basepath, 'chunks'))), 2)
+        columns = load_columns(writer.basepath)
+        self.assertEqual(sorted(columns), ['_tick', '_time', 'loss', 'return'])
+        self.assertEqual(columns['_tick'].tolist(), [0, 1, 2])
+        self.assertEqual(columns['loss'].tolist(), [1.0, 2.0, 3.0])
+        self.assertTrue(np.isnan(columns['return'][:2]).all())
+        self.assertEqual(columns['return'][2], -1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.agents.dqn_agent import DQNAgent, Memory, Transition, PrioritizedMemory, SegmentTree
 
 class TestDQN(unittest.TestCase):
 
@@ -51,3 +51,87 @@ class TestDQN(unittest.TestCase):
         predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}})
         self.assertGreaterEqual(predicted_action, 0)
         self.assertLessEqual(predicted_action, 1)
+
+    def test_train_prioritized(self):
+        agent = DQNAgent(replay_memory_size=200,
+                         replay_memory_init_size=50,
+                         update_target_estimator_every=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'),
+                         prioritized_replay=True)
+
+        for _ in range(100):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), np.random.randint(2), {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, True]
+            agent.feed(ts)
+        self.assertGreater(agent.memory.max_priority, 0)
+        self.assertEqual(agent.memory.num_samples, 51)
+
+        restored = DQNAgent.from_checkpoint(agent.checkpoint_attributes())
+        self.assertIsInstance(restored.memory, PrioritizedMemory)
+        self.assertTrue(np.allclose(restored.memory.sum_tree[np.arange(100)], agent.memory.sum_tree[np.arange(100)]))
+
+class TestMemory(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        memory = Memory(memory_size=4, batch_size=3, num_actions=3)
+        for i in range(6):
+            memory.save(np.full(2, i, dtype=np.int8), i % 3, float(i), np.full(2, i + 1, dtype=np.int8), [0, i % 3], i == 5)
+        self.assertEqual(len(memory), 4)
+        self.assertEqual(memory.states.dtype, np.int8)
+        self.assertEqual(sorted(memory.states[:, 0].tolist()), [2, 3, 4, 5])
+
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = memory.sample()
+        self.assertEqual(state_batch.shape, (3, 2))
+        self.assertEqual(legal_actions_batch.shape, (3, 3))
+        self.assertEqual(legal_actions_batch.dtype, bool)
+        self.assertTrue(np.array_equal(next_state_batch[:, 0], state_batch[:, 0] + 1))
+        self.assertTrue(np.array_equal(reward_batch, state_batch[:, 0]))
+        self.assertTrue(np.array_equal(action_batch, state_batch[:, 0] % 3))
+        self.assertTrue(np.array_equal(done_batch, state_batch[:, 0] == 5))
+        self.assertTrue(legal_actions_batch[:, 0].all())
+        self.assertEqual(len(set(state_batch[:, 0].tolist())), 3)
+
+    def test_checkpoint(self):
+        memory = Memory(memory_size=4, batch_size=2, num_actions=2)
+        for i in range(5):
+            memory.save(np.full(2, i, dtype=np.float32), 1, 1.0, np.zeros(2), [1], False)
+        restored = Memory.from_checkpoint(memory.checkpoint_attributes())
+        self.assertEqual(len(restored), 4)
+        self.assertEqual(restored.position, memory.position)
+        self.assertTrue(np.array_equal(restored.states, memory.states))
+        self.assertTrue(np.array_equal(restored.legal_actions, memory.legal_actions))
+
+        # Checkpoints of the list-based memory
+        checkpoint = {'memory_size': 4, 'batch_size': 2, 'memory': [Transition(np.ones(2), 0, 1.0, np.ones(2), True, [0, 1])]}
+        restored = Memory.from_checkpoint(checkpoint, num_actions=2)
+        self.assertEqual(len(restored), 1)
+        self.assertTrue(restored.legal_actions[0].all())
+
+    def test_segment_tree(self):
+        tree = SegmentTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 0.0, 2.0, 3.0, 4.0])
+        self.assertEqual(tree.root(), 10.0)
+        self.assertEqual(tree.find_prefix_sum([0.5, 1.0, 2.9, 3.0, 9.9]).tolist(), [0, 2, 2, 3, 4])
+        tree.update([3], [0.0])
+        self.assertEqual(tree.root(), 7.0)
+
+        min_tree = SegmentTree(5, np.minimum, np.inf)
+        min_tree.update([0, 1, 2], [3.0, 2.0, 5.0])
+        self.assertEqual(min_tree.root(), 2.0)
+
+    def test_prioritized_sampling(self):
+        np.random.seed(0)
+        memory = PrioritizedMemory(memory_size=4, batch_size=2, num_actions=2, alpha=1.0, beta=0.5)
+        for i in range(4):
+            memory.save(np.full(2, i), 0, 0.0, np.zeros(2), [0], False)
+        memory.update_priorities(np.arange(4), np.array([1.0, 0.0, 0.0, 3.0]))
+        counts = np.zeros(4)
+        for _ in range(500):
+            state_batch, _, _, _, _, _, weights, indices = memory.sample()
+            self.assertTrue(np.array_equal(state_batch[:, 0], indices))
+            np.add.at(counts, indices, 1)
+        self.assertEqual(counts[1] + counts[2], 0)
+        self.assertTrue(0.2 < counts[0] / counts.sum() < 0.3)
+        # The weights are normalized by the weight of the lowest priority
+        self.assertTrue(np.all(weights <= 1.0))
@@ -0,0 +1,104 @@
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+
+import rlcard
+from rlcard.agents.mccfr_agent import MCCFRAgent
+
+class SequentialEnv(object):
+    ''' Each of three players acts once in turn, with two actions
+    '''
+    num_players = 3
+    num_actions = 2
+
+    def __init__(self):
+        self.np_random = np.random.RandomState(0)
+        self.actions = []
+
+    def reset(self):
+        self.actions = []
+
+    def is_over(self):
+        return len(self.actions) == self.num_players
+
+    def get_player_id(self):
+        return len(self.actions)
+
+    def get_state(self, player_id):
+        return {'obs': np.array([player_id], dtype=np.float64), 'legal_actions': OrderedDict({0: None, 1: None})}
+
+    def step(self, action):
+        self.actions.append(action)
+
+    def get_payoffs(self):
+        return np.array([1.0, 0.0, -1.0])
+
+class TestMCCFR(unittest.TestCase):
+
+    def test_train(self):
+        for sampling in MCCFRAgent.SAMPLINGS:
+            env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'seed': 0})
+            agent = MCCFRAgent(env, sampling=sampling)
+
+            for _ in range(100):
+                agent.train()
+            self.assertGreater(len(agent.table), 0)
+            self.assertTrue(np.isfinite(agent.regrets).all())
+
+            state = {'obs': np.array([1., 1., 0., 0., 0., 0.]), 'legal_actions': {0: None, 2: None}, 'raw_legal_actions': ['call', 'fold']}
+            action, _ = agent.eval_step(state)
+            self.assertIn(action, [0, 2])
+
+    def test_card_abstraction(self):
+        from rlcard.games.limitholdem.abstraction import CardAbstraction
+        env = rlcard.make('limit-holdem', config={'seed': 0})
+        agent = MCCFRAgent(env, sampling='outcome', abstraction=CardAbstraction())
+        for _ in range(10):
+            agent.train()
+        state, _ = env.reset()
+        ((hole, board), betting) = agent.table.keys[0]
+        self.assertEqual(len(hole), 2)
+        action, _ = agent.eval_step(state)
+        self.assertIn(action, state['legal_actions'])
+
+    def test_outcome_sampling_long_game(self):
+        env = rlcard.make('uno', config={'seed': 0})
+        agent = MCCFRAgent(env, sampling='outcome')
+        for _ in range(3):
+            agent.train()
+        self.assertGreater(len(agent.table), 0)
+
+    def test_outcome_sampling_average_policy(self):
+        env = SequentialEnv()
+        agent = MCCFRAgent(env, sampling='outcome', epsilon=0.0)
+        policies = [np.array([0.5, 0.5]), np.array([0.25, 0.75]), np.array([0.8, 0.2])]
+        for player_id, policy in enumerate(policies):
+            infoset_id = agent.table.index(env.get_state(player_id)['obs'].tobytes())
+            agent.table.regrets[infoset_id] = policy
+        agent.traverse_outcome(0)
+        actions = env.actions
+
+        # The average policy of an opponent is weighted by its reach divided
+        # by the sample probability, which includes the reach of the other opponent
+        strategy_sum = agent.table.strategy_sum
+        self.assertTrue(np.allclose(strategy_sum[1], policies[1] / policies[0][actions[0]]))
+        self.assertTrue(np.allclose(strategy_sum[2], policies[2] / (policies[0][actions[0]] * policies[1][actions[1]])))
+
+    def test_deterministic(self):
+        regrets = []
+        for _ in range(2):
+            env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'seed': 1})
+            agent = MCCFRAgent(env, sampling='external')
+            for _ in range(20):
+                agent.train()
+            regrets.append(agent.regrets.copy())
+        self.assertTrue(np.array_equal(regrets[0], regrets[1]))
+
+    def test_invalid_sampling(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        with self.assertRaises(ValueError):
+            MCCFRAgent(env, sampling='unknown')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.agents.nfsp_agent import NFSPAgent, ReservoirBuffer, Transition
 
 class TestNFSP(unittest.TestCase):
 
@@ -45,3 +45,41 @@ class TestNFSP(unittest.TestCase):
 
             ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['call', 'raise']}, True]
             agent.feed(ts)
+
+        restored = NFSPAgent.from_checkpoint(agent.checkpoint_attributes())
+        self.assertEqual(len(restored._reservoir_buffer), len(agent._reservoir_buffer))
+        self.assertEqual(len(restored._rl_agent.memory), len(agent._rl_agent.memory))
+
+    def test_reservoir_buffer(self):
+        buffer = ReservoirBuffer(10)
+        for i in range(100):
+            buffer.add(Transition(info_state=np.full(3, i, dtype=np.int8), action_probs=np.array([1.0, 0.0])))
+        self.assertEqual(len(buffer), 10)
+        self.assertEqual(buffer._add_calls, 100)
+
+        info_states, action_probs = buffer.sample(4)
+        self.assertEqual(info_states.shape, (4, 3))
+        self.assertEqual(info_states.dtype, np.int8)
+        self.assertEqual(action_probs.shape, (4, 2))
+        self.assertEqual(len(set(info_states[:, 0].tolist())), 4)
+        with self.assertRaises(ValueError):
+            buffer.sample(11)
+
+        restored = ReservoirBuffer.from_checkpoint(buffer.checkpoint_attributes())
+        self.assertEqual(len(restored), 10)
+        self.assertEqual([t.info_state[0] for t in restored], [t.info_state[0] for t in buffer])
+
+        # Checkpoints of the list-based buffer
+        checkpoint = {'data': [Transition(np.ones(3), np.ones(2) / 2)], 'add_calls': 1, 'reservoir_buffer_capacity': 10}
+        restored = ReservoirBuffer.from_checkpoint(checkpoint)
+        self.assertEqual(len(restored), 1)
+
+        # A cleared buffer is restored empty, with the shapes of its transitions
+        buffer.clear()
+        restored = ReservoirBuffer.from_checkpoint(buffer.checkpoint_attributes())
+        self.assertEqual(len(restored), 0)
+        restored.add(Transition(info_state=np.full(3, 7, dtype=np.int8), action_probs=np.array([0.0, 1.0])))
+        info_states, action_probs = restored.sample(1)
+        self.assertEqual(info_states.tolist(), [[7, 7, 7]])
+        self.assertEqual(info_states.dtype, np.int8)
+        self.assertEqual(action_probs.tolist(), [[0.0, 1.0]])
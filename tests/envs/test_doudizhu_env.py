@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
@@ -68,6 +69,17 @@ class TestDoudizhuEnv(unittest.TestCase):
         decoded = env._decode_action(29)
         self.assertEqual(decoded, '444')
 
+    def test_get_action_feature(self):
+        env = rlcard.make('doudizhu')
+        feature = env.get_action_feature(env._ACTION_2_ID['3334'])
+        self.assertEqual(feature.dtype, np.int8)
+        self.assertEqual(feature[:8].tolist(), [1, 1, 1, 0, 1, 0, 0, 0])
+        self.assertEqual(feature.sum(), 4)
+        feature = env.get_action_feature(env._ACTION_2_ID['BR'])
+        self.assertEqual(feature[52:].tolist(), [1, 1])
+        self.assertEqual(feature.sum(), 2)
+        self.assertEqual(env.get_action_feature(env._ACTION_2_ID['pass']).sum(), 0)
+
     def test_get_perfect_information(self):
         env = rlcard.make('doudizhu')
         _, player_id = env.reset()
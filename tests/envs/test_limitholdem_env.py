@@ -14,6 +14,16 @@ class TestLimitholdemEnv(unittest.TestCase):
         for action in state['legal_actions']:
             self.assertLess(action, env.num_actions)
 
+    def test_equity_features(self):
+        env = rlcard.make('limit-holdem', config={'game_equity_samples': 200})
+        state, _ = env.reset()
+        self.assertEqual(state['obs'].size, env.state_shape[0][0])
+        self.assertEqual(state['obs'].size, 76)
+        equity, strength, positive, negative = state['obs'][-4:]
+        self.assertTrue(0 <= equity <= 1)
+        self.assertEqual(strength, equity)
+        self.assertEqual((positive, negative), (0, 0))
+
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('limit-holdem'))
 
@@ -51,5 +51,15 @@ class TestMahjongEnv(unittest.TestCase):
         trajectories, payoffs = env.run(is_training=False)
         trajectories, payoffs = env.run(is_training=True)
 
+    def test_state_fields(self):
+        env = rlcard.make('mahjong')
+        env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
+        state, _ = env.reset()
+        self.assertEqual(list(state.keys()), ['obs', 'legal_actions', 'raw_obs', 'raw_legal_actions', 'action_record'])
+        env = rlcard.make('mahjong', config={'state_fields': ['obs', 'legal_actions']})
+        env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
+        state, _ = env.reset()
+        self.assertEqual(list(state.keys()), ['obs', 'legal_actions'])
+
 if __name__ == '__main__':
     unittest.main()
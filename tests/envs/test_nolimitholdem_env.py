@@ -33,10 +33,25 @@ class TestNolimitholdemEnv(unittest.TestCase):
         decoded = env._decode_action(Action.FOLD.value)
         self.assertEqual(decoded, Action.FOLD)
 
+        # Raising half pot is not legal before the flop, and would be a call
+        self.assertEqual(env._decode_action(Action.RAISE_HALF_POT.value), Action.CHECK_CALL)
+        # The ids beyond the raise sizes of the config are out of range
+        for action_id in [-1, env.num_actions, 99]:
+            with self.assertRaises(ValueError):
+                env._decode_action(action_id)
+
         env.step(0)
         decoded = env._decode_action(1)
         self.assertEqual(decoded, Action.CHECK_CALL)
 
+    def test_bet_sizes(self):
+        env = rlcard.make('no-limit-holdem', config={'game_bet_sizes': [0.25, 'geometric']})
+        self.assertEqual(env.num_actions, 14)
+        state, _ = env.reset()
+        self.assertListEqual([0, 1, 4, 13], list(state['legal_actions']))
+        # A pot raise is off the grid and is translated to the geometric size
+        self.assertEqual(env._decode_action(Action.RAISE_POT.value), env.actions[13])
+
     def test_step(self):
         env = rlcard.make('no-limit-holdem')
         state, player_id = env.reset()
@@ -1,6 +1,7 @@
 import unittest
 
 import rlcard
+from rlcard.agents import RandomAgent
 from rlcard.envs.registration import register, make
 from .determism_util import is_deterministic
 
@@ -23,5 +24,23 @@ class TestRegistration(unittest.TestCase):
     def test_make_modes(self):
         register(env_id='test_env', entry_point='rlcard.envs.blackjack:BlackjackEnv')
 
+    def test_run_with_full_states(self):
+        # Setting agents keeps all the fields of the states. The states of
+        # kadi are its raw states, so they have no 'raw_obs'
+        for env_id in ['blackjack', 'doudizhu', 'limit-holdem', 'no-limit-holdem', 'leduc-holdem',
+                       'uno', 'mahjong', 'gin-rummy', 'bridge', 'kadi']:
+            env = rlcard.make(env_id, config={'seed': 0})
+            env.set_agents([RandomAgent(num_actions=env.num_actions) for _ in range(env.num_players)])
+            trajectories, _ = env.run(is_training=False)
+            for state in trajectories[0][::2]:
+                if env_id != 'kadi':
+                    self.assertIn('raw_obs', state, env_id)
+                self.assertIsNotNone(state['obs'], env_id)
+
+    def test_state_fields(self):
+        env = rlcard.make('leduc-holdem', config={'state_fields': ['obs', 'legal_actions']})
+        state, _ = env.reset()
+        self.assertEqual(set(state), {'obs', 'legal_actions'})
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@ import numpy as np
 
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
+from rlcard.envs import LazyState
 from rlcard.games.uno.utils import ACTION_LIST
 from .determism_util import is_deterministic
 
@@ -70,6 +71,28 @@ class TestUnoEnv(unittest.TestCase):
             decoded = env._decode_action(legal_action)
             self.assertLessEqual(decoded, ACTION_LIST[legal_action])
 
+    def test_lazy_state(self):
+        env = rlcard.make('uno')
+        state, _ = env.reset()
+        obs = env._encode_obs(env.game.get_state(env.get_player_id()))
+        env.step(list(state['legal_actions'])[0])
+        # The observation is encoded from the raw state of its own step
+        self.assertTrue(np.array_equal(state['obs'], obs))
+        self.assertEqual(list(state.keys()), ['obs', 'legal_actions', 'raw_obs', 'raw_legal_actions', 'action_record'])
+
+    def test_lazy_state_equality(self):
+        a, b = LazyState(obs=1), LazyState(obs=1)
+        a.set_lazy('raw_obs', lambda: [2])
+        b.set_lazy('raw_obs', lambda: [2])
+        self.assertTrue(a == b)
+        self.assertTrue(b == a)
+        c = LazyState(obs=1)
+        c.set_lazy('raw_obs', lambda: [3])
+        self.assertTrue(a != c)
+        self.assertTrue(c != a)
+        self.assertEqual(c, {'obs': 1, 'raw_obs': [3]})
+        self.assertEqual({'obs': 1, 'raw_obs': [3]}, c)
+
     def test_get_perfect_information(self):
         env = rlcard.make('uno')
         _, player_id = env.reset()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.envs.vec_env import VectorEnv
+from rlcard.utils import tournament
+
+
+class TestVectorEnv(unittest.TestCase):
+
+    def test_make_vec(self):
+        env = rlcard.make_vec('leduc-holdem', num_envs=4, config={'seed': 0})
+        self.assertIsInstance(env, VectorEnv)
+        self.assertEqual(env.num_envs, 4)
+        with self.assertRaises(ValueError):
+            VectorEnv([])
+
+    def test_reset_and_step(self):
+        env = rlcard.make_vec('leduc-holdem', num_envs=3)
+        batch, player_ids = env.reset()
+        self.assertEqual(batch['obs'].shape, (3, 36))
+        self.assertEqual(batch['legal_actions_mask'].shape, (3, env.num_actions))
+        self.assertEqual(player_ids.shape, (3,))
+        for i, state in enumerate(batch['states']):
+            self.assertEqual(set(np.flatnonzero(batch['legal_actions_mask'][i])), set(state['legal_actions'].keys()))
+        while not env.is_over():
+            actions = [np.random.choice(np.flatnonzero(mask)) if mask.any() else 0 for mask in batch['legal_actions_mask']]
+            batch, player_ids, dones, payoffs = env.step(actions)
+        self.assertTrue(dones.all())
+        self.assertEqual(payoffs.shape, (3, env.num_players))
+        self.assertFalse(batch['legal_actions_mask'].any())
+
+    def test_padded_obs(self):
+        env = rlcard.make_vec('doudizhu', num_envs=2)
+        batch, _ = env.reset()
+        self.assertEqual(batch['obs'].shape, (2, max(int(np.prod(shape)) for shape in env.state_shape)))
+
+    def test_run(self):
+        env = rlcard.make_vec('leduc-holdem', num_envs=5, config={'seed': 1})
+        env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
+        trajectories, payoffs = env.run(is_training=False)
+        self.assertEqual(len(trajectories), 5)
+        self.assertEqual(len(payoffs), 5)
+        for trajectory in trajectories:
+            self.assertEqual(len(trajectory), env.num_players)
+        for _payoffs in payoffs:
+            self.assertAlmostEqual(sum(_payoffs), 0)
+
+    def test_tournament(self):
+        env = rlcard.make_vec('leduc-holdem', num_envs=4)
+        env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
+        payoffs = tournament(env, 8)
+        self.assertEqual(len(payoffs), env.num_players)
+
+    def test_dqn_predict_batch(self):
+        try:
+            from rlcard.agents.dqn_agent import DQNAgent
+        except ImportError:
+            self.skipTest('torch is not installed')
+        env = rlcard.make_vec('leduc-holdem', num_envs=3)
+        agent = DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[8], device='cpu')
+        batch, _ = env.reset()
+        q_values = agent.predict_batch(batch['states'])
+        for i, state in enumerate(batch['states']):
+            self.assertTrue(np.allclose(q_values[i], agent.predict(state)))
+        env.set_agents([agent, agent])
+        trajectories, _ = env.run(is_training=True)
+        self.assertEqual(len(trajectories), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 
 from rlcard.games.blackjack.game import BlackjackGame as Game
+from rlcard.games.blackjack.evaluator import BlackjackEvaluator as Evaluator
 from rlcard.envs.blackjack import DEFAULT_GAME_CONFIG
 
 class TestBlackjackGame(unittest.TestCase):
@@ -70,5 +71,41 @@ class TestBlackjackGame(unittest.TestCase):
         game.step('stand')
         self.assertGreater(len(game.get_state(0)['state'][1]), 1)
 
+    def test_evaluator(self):
+        policy = {(score, dealer): 'hit' if score < 17 else 'stand' for score in range(4, 22) for dealer in range(2, 12)}
+        evaluator = Evaluator(num_decks=0)
+        for upcard in range(10):
+            self.assertAlmostEqual(sum(evaluator.dealer_distribution(upcard, evaluator.shoe)), 1)
+        # Standing on 20 ties against 20 and loses against 21
+        distribution = evaluator.dealer_distribution(5, evaluator.shoe)
+        self.assertAlmostEqual(evaluator.evaluate_hand(['SK', 'HQ'], 'D6', policy), 1 - distribution[3] - 2 * distribution[4])
+        with self.assertRaises(ValueError):
+            evaluator.evaluate_hand(['SK', 'H2'], 'D6', {})
+
+        # The actions can be given by their ids, including numpy integers
+        ids = {key: np.int64(0 if action == 'hit' else 1) for key, action in policy.items()}
+        self.assertAlmostEqual(evaluator.evaluate(ids), evaluator.evaluate(policy))
+        stand = {key: 'stand' for key in policy}
+        self.assertAlmostEqual(evaluator.evaluate({key: np.int64(1) for key in policy}), evaluator.evaluate(stand))
+        self.assertNotAlmostEqual(evaluator.evaluate(stand), -1)
+        for action in ['Stand', 2, -1, None]:
+            unknown = dict(policy)
+            unknown[(12, 6)] = action
+            with self.assertRaises(ValueError):
+                evaluator.evaluate_hand(['SK', 'H2'], 'D6', unknown)
+
+        # The exact payoff is within the error of sampled games
+        game = Game()
+        game.configure({'game_num_players': 1, 'game_num_decks': 0})
+        game.np_random.seed(0)
+        num_games = 20000
+        total = 0
+        for _ in range(num_games):
+            game.init_game()
+            while not game.is_over():
+                game.step('hit' if game.judger.judge_score(game.players[0].hand) < 17 else 'stand')
+            total += {2: 1, 1: 0, -1: -1}[game.winner['player0']]
+        self.assertAlmostEqual(evaluator.evaluate(policy), total / num_games, delta=0.03)
+
 if __name__ == '__main__':
     unittest.main()
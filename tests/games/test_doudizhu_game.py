@@ -5,6 +5,7 @@ import functools
 from rlcard.games.doudizhu.game import DoudizhuGame as Game
 from rlcard.games.doudizhu.utils import get_landlord_score, encode_cards
 from rlcard.games.doudizhu.utils import doudizhu_sort_str
+from rlcard.games.doudizhu.utils import get_gt_cards, cards2packed, cards2str, contains_cards, CARD_TYPE, TYPE_CARD
 from rlcard.games.doudizhu.judger import DoudizhuJudger as Judger
 
 
@@ -137,6 +138,41 @@ class TestDoudizhuGame(unittest.TestCase):
         self.assertEqual(plane[1][13], 1)
         self.assertEqual(plane[1][14], 1)
 
+    def test_cards2packed(self):
+        self.assertEqual(cards2packed(''), 0)
+        self.assertEqual(cards2packed('33R'), 2 + (1 << 56))
+
+    def test_get_gt_cards(self):
+        game = Game()
+        game.init_game()
+        player, greater_player = game.players[0], game.players[1]
+        hand = cards2str(player.current_hand)
+        for played_cards in ['3', '66', '3334', '89TJQ', '5555', '2222', 'BR']:
+            greater_player.played_cards = played_cards
+            # All the cards of a type with a greater weight, or a bomb, or the rocket
+            expected = ['pass']
+            target_types = dict(reversed(CARD_TYPE[0][played_cards]))
+            if 'rocket' not in target_types:
+                target_types.setdefault('bomb', -1)
+                target_types['rocket'] = -1
+                for card_type, weight in target_types.items():
+                    for can_weight, cards_list in TYPE_CARD[card_type].items():
+                        if int(can_weight) > int(weight):
+                            expected.extend(cards for cards in cards_list if cards not in expected and contains_cards(hand, cards))
+            self.assertEqual(sorted(get_gt_cards(player, greater_player)), sorted(expected))
+
+    def test_playable_cards_from_hand(self):
+        for hand in ['3', '33344455', '3456789TJQKA2BR', '3334445556667778888AA22BR']:
+            self.assertEqual(Judger.playable_cards_from_hand(hand), Judger.enumerate_playable_cards(hand))
+
+    def test_calc_playable_cards(self):
+        game = Game()
+        state, player_id = game.init_game()
+        game.step(max(state['actions'], key=len))
+        player = game.players[player_id]
+        expected = Judger.enumerate_playable_cards(cards2str(player.current_hand))
+        self.assertEqual(game.judger.playable_cards[player_id], expected)
+
     def test_judge_payoffs(self):
         payoffs = Judger.judge_payoffs(0, 0)
         self.assertEqual(payoffs[0], 1)
@@ -6,6 +6,7 @@ import numpy as np
 from rlcard.utils import seeding
 
 from rlcard.games.nolimitholdem.round import Action
+from rlcard.games.nolimitholdem.abstraction import ACTIONS, Raise, pseudo_harmonic, translate
 
 
 class TestNolimitholdemMethods(unittest.TestCase):
@@ -204,6 +205,47 @@ class TestNolimitholdemMethods(unittest.TestCase):
         game.step(Action.CHECK_CALL)
         self.assertTrue(game.is_over())
 
+    def test_bet_sizes(self):
+        game = Game()
+        game.configure({'game_num_players': 2, 'chips_for_each': 100, 'dealer_id': 0,
+                        'game_bet_sizes': {1: [0.75, 'geometric', 3]}})
+        self.assertEqual(game.get_num_actions(), 14)
+        self.assertEqual([action.value for action in ACTIONS], list(range(14)))
+
+        # The preflop keeps the default grid
+        game.init_game()
+        self.assertListEqual([Action.FOLD, Action.CHECK_CALL, Action.RAISE_POT, Action.ALL_IN], game.get_legal_actions())
+        game.step(Action.CHECK_CALL)
+        game.step(Action.CHECK_CALL)
+
+        # On the flop, the pot is 4 and the geometric size puts 98 chips in by the river
+        legal_actions = game.get_legal_actions()
+        self.assertListEqual([0, 1, 4, 8, 12, 13], [action.value for action in legal_actions])
+        self.assertEqual(Raise(8, 0.75), legal_actions[3])
+        self.assertEqual([3, 12, 5], [game.round.get_raise_amount(game.players, action) for action in legal_actions[3:]])
+        player_id = game.round.game_pointer
+        game.step(Raise(8, 0.75))
+        self.assertEqual(3, game.round.raised[player_id])
+
+        with self.assertRaises(ValueError):
+            game.configure({'game_num_players': 2, 'chips_for_each': 100, 'dealer_id': 0, 'game_bet_sizes': [0.4]})
+
+    def test_translate_bet(self):
+        self.assertAlmostEqual(pseudo_harmonic(0.5, 0.5, 1.0), 1)
+        self.assertAlmostEqual(pseudo_harmonic(1.0, 0.5, 1.0), 0)
+        self.assertEqual(translate(0.6, {'half': 0.5, 'pot': 1.0}), 'half')
+        self.assertEqual(translate(0.9, {'half': 0.5, 'pot': 1.0}), 'pot')
+        self.assertEqual(translate(5, {'half': 0.5, 'pot': 1.0}), 'pot')
+
+        game = Game()
+        game.init_game()
+        game.step(Action.CHECK_CALL)
+        # The pot is 4, so 2 chips are half pot and 4 chips are pot
+        self.assertEqual(Action.CHECK_CALL, game.translate_bet(0))
+        self.assertEqual(Action.RAISE_HALF_POT, game.translate_bet(2))
+        self.assertEqual(Action.RAISE_POT, game.translate_bet(4))
+        self.assertEqual(Action.ALL_IN, game.translate_bet(90))
+
 
 if __name__ == '__main__':
     unittest.main()
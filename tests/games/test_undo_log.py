@@ -0,0 +1,106 @@
+import unittest
+import numpy as np
+
+from rlcard.games.base import UndoLog
+from rlcard.games.limitholdem.game import LimitHoldemGame
+from rlcard.games.nolimitholdem.game import NolimitholdemGame
+from rlcard.games.mahjong.game import MahjongGame
+from rlcard.games.uno.game import UnoGame
+
+
+class _Obj:
+    def __init__(self):
+        self.a = 1
+        self.items = [1, 2, 3]
+
+
+def _snapshot(game, decks):
+    ''' Get a printable summary of the game from the view of every player
+    '''
+    states = [str(game.get_state(player_id)) for player_id in range(game.get_num_players())]
+    return states, [[str(card) for card in deck] for deck in decks(game)]
+
+def _random_walk(test, game, decks, legal_actions, np_random, max_steps=50):
+    ''' Step forward randomly, then step back to the start and check that every
+        intermediate state is restored
+    '''
+    game.init_game()
+    snapshots = []
+    while not game.is_over() and len(snapshots) < max_steps:
+        snapshots.append(_snapshot(game, decks))
+        actions = legal_actions(game)
+        game.step(actions[np_random.randint(len(actions))])
+    while snapshots:
+        test.assertTrue(game.step_back())
+        test.assertEqual(_snapshot(game, decks), snapshots.pop())
+    test.assertFalse(game.step_back())
+
+
+class TestUndoLog(unittest.TestCase):
+
+    def test_undo(self):
+        obj = _Obj()
+        log = UndoLog()
+        self.assertFalse(log.undo())
+
+        log.checkpoint()
+        log.save(obj, 'a', 'items')
+        items = obj.items
+        obj.a = 2
+        obj.items.append(4)
+        obj.items = [5]
+
+        log.checkpoint()
+        log.save_items(items)
+        log.call(setattr, obj, 'a', 3)
+        items.pop(0)
+        self.assertEqual(len(log), 2)
+
+        self.assertTrue(log.undo())
+        self.assertEqual(obj.a, 3)
+        self.assertEqual(items, [1, 2, 3, 4])
+        self.assertTrue(log.undo())
+        self.assertEqual(obj.a, 1)
+        self.assertIs(obj.items, items)
+        self.assertEqual(obj.items, [1, 2, 3])
+        self.assertEqual(len(log), 0)
+
+    def test_clear(self):
+        log = UndoLog()
+        log.checkpoint()
+        log.call(print)
+        log.clear()
+        self.assertEqual(len(log), 0)
+        self.assertFalse(log.undo())
+
+    def test_limitholdem_step_back(self):
+        np_random = np.random.RandomState(0)
+        for _ in range(20):
+            _random_walk(self, LimitHoldemGame(allow_step_back=True),
+                         lambda game: [game.dealer.deck, game.public_cards],
+                         lambda game: game.get_legal_actions(), np_random)
+
+    def test_nolimitholdem_step_back(self):
+        np_random = np.random.RandomState(1)
+        for _ in range(20):
+            _random_walk(self, NolimitholdemGame(allow_step_back=True),
+                         lambda game: [game.dealer.deck, game.public_cards],
+                         lambda game: game.get_legal_actions(), np_random)
+
+    def test_mahjong_step_back(self):
+        np_random = np.random.RandomState(2)
+        for _ in range(3):
+            _random_walk(self, MahjongGame(allow_step_back=True),
+                         lambda game: [game.dealer.deck, game.dealer.table],
+                         lambda game: game.get_legal_actions(game.get_state(game.round.current_player)),
+                         np_random)
+
+    def test_uno_step_back(self):
+        np_random = np.random.RandomState(3)
+        for _ in range(5):
+            _random_walk(self, UnoGame(allow_step_back=True),
+                         lambda game: [game.dealer.deck, game.round.played_cards, [card.color for card in game.wild_cards]],
+                         lambda game: game.get_legal_actions(), np_random)
+
+if __name__ == '__main__':
+    unittest.main()
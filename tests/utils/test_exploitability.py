@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents import CFRAgent, RandomAgent
+from rlcard.utils.exploitability import exploitability, PublicTreeBestResponse
+
+class TestExploitability(unittest.TestCase):
+
+    def test_leduc(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'seed': 0})
+        uniform = exploitability(env, lambda state: np.ones(env.num_actions))
+        self.assertGreater(uniform, 0)
+
+        # An agent that reports uniform probabilities gives the same result
+        agent = RandomAgent(num_actions=env.num_actions)
+        self.assertAlmostEqual(exploitability(env, agent), uniform)
+
+        agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back': True, 'seed': 0}), model_path='')
+        for _ in range(100):
+            agent.train()
+        trained = exploitability(env, agent)
+        self.assertGreater(trained, 0)
+        self.assertLess(trained, uniform)
+
+    def test_best_response_value(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        best_response = PublicTreeBestResponse(env, lambda state: np.ones(env.num_actions))
+        values = [best_response.best_response_value(player_id) for player_id in range(env.num_players)]
+        # The best response does better than the policy itself in the zero-sum game
+        self.assertGreater(sum(values), 0)
+        self.assertFalse(env.is_over())
+
+    def test_limit_holdem(self):
+        env = rlcard.make('limit-holdem', config={'allow_step_back': True})
+        env.game.allowed_raise_num = 0
+        deck = ['SA', 'SK', 'SQ', 'SJ', 'ST', 'HA', 'HK', 'HQ', 'HJ']
+        value = exploitability(env, lambda state: np.ones(env.num_actions), deck=deck)
+        self.assertGreater(value, 0)
+
+    def test_invalid_env(self):
+        env = rlcard.make('limit-holdem', config={'allow_step_back': True})
+        with self.assertRaises(ValueError):
+            exploitability(env, lambda state: np.ones(env.num_actions), deck=['SA', 'SK', 'SQ'])
+        env = rlcard.make('leduc-holdem')
+        with self.assertRaises(ValueError):
+            exploitability(env, lambda state: np.ones(env.num_actions))
+        env = rlcard.make('limit-holdem', config={'allow_step_back': True, 'game_num_players': 3})
+        with self.assertRaises(ValueError):
+            exploitability(env, lambda state: np.ones(env.num_actions))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 import itertools
+import tempfile
 import unittest
 
 from rlcard.games.limitholdem.judger import LimitHoldemJudger
 from rlcard.games.limitholdem.utils import compare_hands
 from rlcard.games.limitholdem.utils import Hand as Hand
+from rlcard.games.limitholdem.evaluator import evaluate_cards, evaluate_hands, cards2ids, hand_category
+from rlcard.games.limitholdem.equity import EquityCalculator, canonicalize
+from rlcard.games.limitholdem.abstraction import CardAbstraction
 import numpy as np
 ''' Combinations selected for testing compare_hands function
 Royal straight flush ['CJ', 'CT', 'CQ', 'CK', 'C9', 'C8', 'CA']
@@ -291,6 +295,53 @@ class TestHoldemUtils(unittest.TestCase):
                                 ])
         self.assertEqual(winner, [0, 0, 1, 1])
 
+    def test_evaluate_hands(self):
+        deck = [suit + rank for suit in 'SHDC' for rank in 'A23456789TJQK']
+        self.assertEqual(cards2ids(deck), list(range(52)))
+        rng = np.random.RandomState(0)
+        hands = [[deck[i] for i in rng.choice(52, 7, replace=False)] for _ in range(200)]
+        hands.append(['D5', 'ST', 'S2', 'S3', 'S4', 'S5', 'SA'])  # A,2,3,4,5 suited
+        values = [evaluate_cards(cards) for cards in hands]
+        for cards, value in zip(hands, values):
+            hand = Hand(cards)
+            hand.evaluateHand()
+            self.assertEqual(hand_category(value), hand.category)
+        self.assertEqual(evaluate_hands(np.array([cards2ids(cards) for cards in hands])).tolist(), values)
+        self.assertGreater(evaluate_cards(['SK', 'SQ', 'SJ', 'ST', 'S9']), evaluate_cards(['S5', 'S4', 'S3', 'S2', 'SA']))
+        with self.assertRaises(ValueError):
+            evaluate_hands(np.arange(4))
+
+    def test_equity_features(self):
+        calculator = EquityCalculator(num_samples=500, cache_size=2)
+        aces = calculator.features(cards2ids(['SA', 'HA']), [])
+        self.assertGreater(aces[0], 0.8)
+        self.assertLess(calculator.features(cards2ids(['S7', 'H2']), [])[0], 0.45)
+        # The nuts on the river
+        self.assertEqual(calculator.features(cards2ids(['SA', 'SK']), cards2ids(['SQ', 'SJ', 'ST', 'H2', 'D3'])).tolist(), [1, 1, 0, 0])
+        # Relabeling the suits gives the same cached features
+        hole, board = cards2ids(['SA', 'HK']), cards2ids(['D2', 'S3', 'C4'])
+        self.assertEqual(canonicalize(hole, board), canonicalize(cards2ids(['HA', 'CK']), cards2ids(['S2', 'H3', 'D4'])))
+        self.assertIs(calculator.features(hole, board), calculator.features(cards2ids(['HA', 'CK']), cards2ids(['S2', 'H3', 'D4'])))
+        self.assertEqual(len(calculator._cache), 2)
+
+    def test_card_abstraction(self):
+        lossless = CardAbstraction()
+        self.assertEqual(lossless.card_key(cards2ids(['SA', 'HK']), cards2ids(['D2', 'S3', 'C4'])),
+                         lossless.card_key(cards2ids(['HA', 'CK']), cards2ids(['S2', 'H3', 'D4'])))
+        self.assertNotEqual(lossless.card_key(cards2ids(['SA', 'SK']), []), lossless.card_key(cards2ids(['SA', 'HK']), []))
+
+        with tempfile.TemporaryDirectory() as path:
+            CardAbstraction.build(path, num_buckets=(4, 4, 4, 4), num_hands=20, num_runouts=8, num_samples=16)
+            abstraction = CardAbstraction(path)
+            self.assertEqual(len(abstraction.tables[0][0]), 169)
+            self.assertIsInstance(abstraction.tables[0][0], np.memmap)
+            # The buckets are ordered by strength
+            self.assertEqual(abstraction.card_key(cards2ids(['SA', 'HA']), []), (0, 3))
+            self.assertLess(abstraction.card_key(cards2ids(['S7', 'H2']), [])[1], 3)
+            street, bucket = abstraction.card_key(cards2ids(['SA', 'HK']), cards2ids(['D2', 'S3', 'C4', 'H9']))
+            self.assertEqual(street, 2)
+            self.assertIn(bucket, range(4))
+
     def test_split_pots_among_players(self):
         j = LimitHoldemJudger(np.random.RandomState(seed=7))
 
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.utils import RolloutPool
+from rlcard.utils.rollout_pool import _strip_buffers
+
+
+class FailingAgent(RandomAgent):
+    def eval_step(self, state):
+        raise RuntimeError('failing agent')
+
+
+class TestRolloutPool(unittest.TestCase):
+
+    def test_run(self):
+        env = rlcard.make('leduc-holdem')
+        agents = [RandomAgent(env.num_actions) for _ in range(env.num_players)]
+        with RolloutPool('leduc-holdem', num_workers=2, seed=0) as pool:
+            pool.set_agents(agents)
+            trajectories, payoffs = pool.run(10)
+        self.assertEqual(len(trajectories), 10)
+        self.assertEqual(len(payoffs), 10)
+        for trajectory, _payoffs in zip(trajectories, payoffs):
+            self.assertEqual(len(trajectory), env.num_players)
+            self.assertAlmostEqual(sum(_payoffs), 0)
+
+    def test_deterministic(self):
+        env = rlcard.make('leduc-holdem')
+        agents = [RandomAgent(env.num_actions) for _ in range(env.num_players)]
+        results = []
+        for num_workers in [1, 3]:
+            with RolloutPool('leduc-holdem', num_workers=num_workers, seed=7) as pool:
+                pool.set_agents(agents)
+                _, payoffs = pool.run(20)
+                results.append((np.array(payoffs), pool.tournament(20)))
+        self.assertTrue(np.array_equal(results[0][0], results[1][0]))
+        self.assertEqual(results[0][1], results[1][1])
+
+    def test_stale_results(self):
+        env = rlcard.make('leduc-holdem')
+        agents = [RandomAgent(env.num_actions) for _ in range(env.num_players)]
+        with RolloutPool('leduc-holdem', num_workers=2, seed=3) as pool:
+            pool.set_agents(agents)
+            pool.run(10)
+            expected = pool.run(10)[1]
+        with RolloutPool('leduc-holdem', num_workers=2, seed=3) as pool:
+            # A failed run and a run that is not read to the end leave results in the queue
+            pool.set_agents([FailingAgent(env.num_actions) for _ in range(env.num_players)])
+            with self.assertRaises(Exception):
+                pool.run(4)
+            pool.set_agents(agents)
+            pool.num_episodes = 0
+            for _ in pool.imap(10):
+                break
+            self.assertTrue(np.array_equal(np.array(expected), np.array(pool.run(10)[1])))
+
+    def test_strip_buffers(self):
+        env = rlcard.make('leduc-holdem')
+        agent = DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[8])
+        stripped = _strip_buffers(agent)
+        self.assertIsNone(stripped.memory)
+        self.assertIsNotNone(agent.memory)
+        self.assertIs(stripped.q_estimator, agent.q_estimator)
+        with RolloutPool('leduc-holdem', num_workers=1, seed=0) as pool:
+            pool.set_agents([agent, agent])
+            self.assertEqual(len(pool.run(2)[1]), 2)
+
+    def test_invalid_num_workers(self):
+        with self.assertRaises(ValueError):
+            RolloutPool('leduc-holdem', num_workers=0)
+
+if __name__ == '__main__':
+    unittest.main()